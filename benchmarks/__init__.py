@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""Performance benchmarks of the easy-acl library.
+
+Run all benchmarks and write results into JSON file:
+
+    PYTHONPATH=src python -m benchmarks.run --output results.json
+
+"""
+
+from __future__ import absolute_import
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""Synthetic data for benchmarks.
+
+All generators take `random.Random` instance, so the data are reproducible by
+the seed.
+
+"""
+
+from __future__ import absolute_import
+
+import bisect
+import itertools
+
+import easy_acl.acl as acls
+import easy_acl.evaluator as evaluators
+import easy_acl.rule as rules
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+def create_deep_hierarchy(acl, depth):
+    """Create chain of roles, each role inherits from the previous one.
+
+    Args:
+        acl (easy_acl.acl.Acl): Acl to create roles in.
+        depth (int): Count of roles.
+
+    Returns:
+        List[str]: Role names from the root to the leaf.
+
+    """
+    names = []
+    parents = None
+
+    for i in range(depth):
+        name = "deep_{}".format(i)
+        acl.roles.create_role(name, parents)
+        names.append(name)
+        parents = [name]
+
+    return names
+
+
+def create_wide_hierarchy(acl, width, levels, rng):
+    """Create layers of roles, each role inherits from two roles of the layer
+    above, so there are many shared ancestors (diamonds).
+
+    Args:
+        acl (easy_acl.acl.Acl): Acl to create roles in.
+        width (int): Count of roles in one layer.
+        levels (int): Count of layers.
+        rng (random.Random): Random generator.
+
+    Returns:
+        List[str]: Role names, the last layer at the end.
+
+    """
+    names = []
+    previous_layer = []
+
+    for level in range(levels):
+        layer = []
+
+        for i in range(width):
+            name = "wide_{}_{}".format(level, i)
+
+            if previous_layer:
+                parents = rng.sample(previous_layer, min(2, len(previous_layer)))
+            else:
+                parents = None
+
+            acl.roles.create_role(name, parents)
+            layer.append(name)
+
+        names += layer
+        previous_layer = layer
+
+    return names
+
+
+def create_resource_names(count, depth, rng):
+    """Create unique resource names.
+
+    Args:
+        count (int): Count of resources.
+        depth (int): Maximal count of parts of resource name.
+        rng (random.Random): Random generator.
+
+    Returns:
+        List[str]: Resource names.
+
+    """
+    resources = set()
+    fanout = max(2, int(round(count ** (1.0 / depth))) + 1)
+
+    while len(resources) < count:
+        length = rng.randint(1, depth)
+        parts = ["p{}".format(rng.randrange(fanout)) for _ in range(length)]
+        resources.add(".".join(parts))
+
+    return sorted(resources)
+
+
+def create_rules(resources, count, wildcard_ratio, rng):
+    """Create `Simple` and `WildcardEnding` rules covering the resources.
+
+    Args:
+        resources (List[str]): Resource names.
+        count (int): Count of rules.
+        wildcard_ratio (float): Ratio of the wildcard rules.
+        rng (random.Random): Random generator.
+
+    Returns:
+        List[easy_acl.rule.AbstractRule]: The rules.
+
+    """
+    result = []
+
+    for _ in range(count):
+        resource = rng.choice(resources)
+        evaluator = evaluators.allow if rng.random() < 0.5 else evaluators.deny
+
+        if rng.random() < wildcard_ratio:
+            parts = resource.split(".")
+            prefix = parts[:rng.randint(0, len(parts) - 1)]
+            definition = ".".join(prefix + ["*"])
+            result.append(rules.WildcardEnding(definition, evaluator))
+        else:
+            result.append(rules.Simple(resource, evaluator))
+
+    return result
+
+
+def create_zipf_workload(resources, count, exponent, rng):
+    """Create query workload with Zipf distribution of resources.
+
+    Args:
+        resources (List[str]): Resource names.
+        count (int): Count of queries.
+        exponent (float): Zipf exponent.
+        rng (random.Random): Random generator.
+
+    Returns:
+        List[str]: Queried resources.
+
+    """
+    shuffled = list(resources)
+    rng.shuffle(shuffled)
+
+    weights = [1.0 / (rank ** exponent) for rank in range(1, len(shuffled) + 1)]
+    cumulative = list(itertools.accumulate(weights))
+    total = cumulative[-1]
+
+    return [shuffled[bisect.bisect(cumulative, rng.random() * total)]
+            for _ in range(count)]
+
+
+def create_acl(role_count, rules_per_role, resources, wildcard_ratio, rng,
+               rule_list_factory=None, cache=None):
+    """Create Acl with wide role hierarchy and random rules.
+
+    Args:
+        role_count (int): Approximate count of roles.
+        rules_per_role (int): Count of rules of each role.
+        resources (List[str]): Resource names.
+        wildcard_ratio (float): Ratio of the wildcard rules.
+        rng (random.Random): Random generator.
+        rule_list_factory (Optional[Callable[[], easy_acl.rule.RuleList]]):
+            Factory of rule lists.
+        cache (Optional[easy_acl.cache.AbstractCache]): Decision cache.
+
+    Returns:
+        Tuple[easy_acl.acl.Acl, List[str]]: The Acl and the role names.
+
+    """
+    acl = acls.Acl(rule_list_factory=rule_list_factory, cache=cache)
+    levels = 4
+    width = max(1, role_count // levels)
+    names = create_wide_hierarchy(acl, width, levels, rng)
+
+    for name in names:
+        for rule in create_rules(resources, rules_per_role, wildcard_ratio, rng):
+            acl.add_rule(name, rule)
+
+    return acl, names
+
+
+def write_config_file(fileobj, role_count, rules_per_role, resources, rng):
+    """Write INI config with random roles and rules.
+
+    Args:
+        fileobj (TextIO): File to write to.
+        role_count (int): Count of roles.
+        rules_per_role (int): Count of rules of each role.
+        resources (List[str]): Resource names.
+        rng (random.Random): Random generator.
+
+    """
+    names = ["role_{}".format(i) for i in range(role_count)]
+
+    fileobj.write("[global]\nevaluator=deny\n\n[roles]\n")
+
+    for i, name in enumerate(names):
+        parents = rng.sample(names[:i], min(2, i))
+        fileobj.write("{}={}\n".format(name, ",".join(parents)))
+
+    for name in names:
+        fileobj.write("\n[{}_rules]\n".format(name))
+
+        definitions = set()
+
+        for rule in create_rules(resources, rules_per_role, 0.5, rng):
+            if rule.definition in definitions:
+                # duplicate keys are not allowed in the config
+                continue
+
+            definitions.add(rule.definition)
+            rule_type = "wildcardending" if rule.definition.endswith("*") \
+                else "simple"
+            evaluator = "allow" if rule.evaluator is evaluators.allow else "deny"
+            fileobj.write("{}={},{}\n".format(rule.definition, rule_type, evaluator))
@@ -0,0 +1,676 @@
+# -*- coding: utf-8 -*-
+"""Run benchmarks and write machine readable results.
+
+Usage:
+
+    PYTHONPATH=src python -m benchmarks.run [--quick] [--seed N] [--output FILE]
+        [--filter SUBSTRING]
+
+Each benchmark is run `repeat` times and the best and median times are stored.
+Memory benchmarks store the memory retained by created objects instead. Results
+of different runs can be compared by the benchmark name and params.
+
+"""
+
+from __future__ import absolute_import
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import easy_acl.acl as acls
+import easy_acl.config as config
+import easy_acl.role as roles
+import easy_acl.rule as rules
+import easy_acl.shared_cache as shared_caches
+import easy_acl.snapshot as snapshots
+import easy_acl.vectorized as vectorized
+
+from benchmarks import generators
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+FULL_SIZES = {
+    "roles": 200,
+    "rules_per_role": 1000,
+    "resources": 20000,
+    "queries": 20000,
+    "deep_roles": 50,
+    "config_roles": 500,
+    "config_rules_per_role": 200,
+    "repeat": 5,
+}
+
+QUICK_SIZES = {
+    "roles": 20,
+    "rules_per_role": 100,
+    "resources": 2000,
+    "queries": 2000,
+    "deep_roles": 10,
+    "config_roles": 50,
+    "config_rules_per_role": 20,
+    "repeat": 3,
+}
+
+
+BENCHMARKS = []
+MEMORY_BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register benchmark function.
+
+    The function is called with sizes and random generator and returns pair of
+    setup function and measured function. The setup function is called before
+    each repetition and its result is passed to the measured function. The
+    measured function returns count of operations it did. The function returns
+    None if the benchmark can not run (e.g. an optional package is missing).
+
+    Args:
+        name (str): Name of the benchmark.
+
+    Returns:
+        Callable: Decorator.
+
+    """
+    def decorator(func):
+        BENCHMARKS.append((name, func))
+        return func
+
+    return decorator
+
+
+def memory_benchmark(name):
+    """Register memory benchmark function.
+
+    The function is called with sizes and random generator and returns function
+    creating the measured objects. The creating function returns pair of the
+    objects and their count. Memory allocated by the creating function and
+    retained by the objects is measured.
+
+    Args:
+        name (str): Name of the benchmark.
+
+    Returns:
+        Callable: Decorator.
+
+    """
+    def decorator(func):
+        MEMORY_BENCHMARKS.append((name, func))
+        return func
+
+    return decorator
+
+
+@benchmark("acl.is_allowed.cold")
+def bench_acl_is_allowed_cold(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    acl, names = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng)
+    workload = generators.create_zipf_workload(resources, sizes["queries"], 1.1, rng)
+    role_names = [rng.choice(names) for _ in workload]
+    queries = list(zip(role_names, workload))
+
+    def setup():
+        acl.clear_cache()
+
+    def run(_):
+        is_allowed = acl.is_allowed
+
+        for role_name, resource in queries:
+            is_allowed(role_name, resource)
+
+        return len(queries)
+
+    return setup, run
+
+
+@benchmark("acl.is_allowed.cold.indexed")
+def bench_acl_is_allowed_cold_indexed(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    acl, names = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng,
+                                       rule_list_factory=rules.IndexedRuleList)
+    workload = generators.create_zipf_workload(resources, sizes["queries"], 1.1, rng)
+    role_names = [rng.choice(names) for _ in workload]
+    queries = list(zip(role_names, workload))
+
+    def setup():
+        acl.clear_cache()
+
+    def run(_):
+        is_allowed = acl.is_allowed
+
+        for role_name, resource in queries:
+            is_allowed(role_name, resource)
+
+        return len(queries)
+
+    return setup, run
+
+
+@benchmark("acl.is_allowed.cold.columnar")
+def bench_acl_is_allowed_cold_columnar(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    acl, names = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng,
+                                       rule_list_factory=rules.ColumnarRuleList)
+    workload = generators.create_zipf_workload(resources, sizes["queries"], 1.1, rng)
+    role_names = [rng.choice(names) for _ in workload]
+    queries = list(zip(role_names, workload))
+
+    def setup():
+        acl.clear_cache()
+
+    def run(_):
+        is_allowed = acl.is_allowed
+
+        for role_name, resource in queries:
+            is_allowed(role_name, resource)
+
+        return len(queries)
+
+    return setup, run
+
+
+@benchmark("acl.is_allowed.warm")
+def bench_acl_is_allowed_warm(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    acl, names = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng)
+    workload = generators.create_zipf_workload(resources, sizes["queries"], 1.1, rng)
+    role_names = [rng.choice(names) for _ in workload]
+    queries = list(zip(role_names, workload))
+
+    for role_name, resource in queries:
+        acl.is_allowed(role_name, resource)
+
+    def run(_):
+        is_allowed = acl.is_allowed
+
+        for role_name, resource in queries:
+            is_allowed(role_name, resource)
+
+        return len(queries)
+
+    return None, run
+
+
+@benchmark("acl.is_allowed.shared_cache")
+def bench_acl_is_allowed_shared_cache(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    acl, names = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng)
+    workload = generators.create_zipf_workload(resources, sizes["queries"], 1.1, rng)
+    role_names = [rng.choice(names) for _ in workload]
+    queries = list(zip(role_names, workload))
+
+    fd, filename = tempfile.mkstemp(suffix=".cache")
+    os.close(fd)
+    os.remove(filename)
+    _TEMPORARY_FILES.append(filename)
+    acl.set_shared_cache(shared_caches.MappedSharedCache(filename), "benchmark")
+
+    # the shared cache is warmed by "another process"
+    for role_name, resource in queries:
+        acl.is_allowed(role_name, resource)
+
+    def setup():
+        acl.clear_cache()
+
+    def run(_):
+        is_allowed = acl.is_allowed
+
+        for role_name, resource in queries:
+            is_allowed(role_name, resource)
+
+        return len(queries)
+
+    return setup, run
+
+
+@benchmark("snapshot.is_allowed")
+def bench_snapshot_is_allowed(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    acl, names = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng)
+    workload = generators.create_zipf_workload(resources, sizes["queries"], 1.1, rng)
+    role_names = [rng.choice(names) for _ in workload]
+    queries = list(zip(role_names, workload))
+
+    fd, filename = tempfile.mkstemp(suffix=".snapshot")
+    os.close(fd)
+    _TEMPORARY_FILES.append(filename)
+    snapshots.write_snapshot(acl, filename)
+    mapped = snapshots.MappedAcl(filename)
+
+    def run(_):
+        is_allowed = mapped.is_allowed
+
+        for role_name, resource in queries:
+            is_allowed(role_name, resource)
+
+        return len(queries)
+
+    return None, run
+
+
+@benchmark("vectorized.is_allowed_pairs")
+def bench_vectorized_is_allowed_pairs(sizes, rng):
+    if vectorized.numpy is None:
+        return None
+
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    acl, names = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng)
+    workload = generators.create_zipf_workload(resources, sizes["queries"], 1.1, rng)
+    role_names = [rng.choice(names) for _ in workload]
+    instance = vectorized.VectorizedAcl(acl)
+
+    def run(_):
+        instance.is_allowed_pairs(role_names, workload)
+        return len(workload)
+
+    return None, run
+
+
+@benchmark("acl.is_allowed.deep_hierarchy")
+def bench_acl_is_allowed_deep(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    acl = acls.Acl()
+    names = generators.create_deep_hierarchy(acl, sizes["deep_roles"])
+
+    for name in names:
+        for rule in generators.create_rules(resources, sizes["rules_per_role"] // 10,
+                                            0.5, rng):
+            acl.add_rule(name, rule)
+
+    workload = generators.create_zipf_workload(resources, sizes["queries"], 1.1, rng)
+    leaf = names[-1]
+
+    def setup():
+        acl.clear_cache()
+
+    def run(_):
+        is_allowed = acl.is_allowed
+
+        for resource in workload:
+            is_allowed(leaf, resource)
+
+        return len(workload)
+
+    return setup, run
+
+
+@benchmark("rule_list.get_best_result")
+def bench_rule_list(sizes, rng):
+    return _create_rule_list_benchmark(sizes, rng, rules.RuleList)
+
+
+@benchmark("indexed_rule_list.get_best_result")
+def bench_indexed_rule_list(sizes, rng):
+    return _create_rule_list_benchmark(sizes, rng, rules.IndexedRuleList)
+
+
+def _create_rule_list_benchmark(sizes, rng, factory):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    rule_list = factory()
+
+    for rule in generators.create_rules(resources, sizes["rules_per_role"], 0.5, rng):
+        rule_list.add_rule(rule)
+
+    workload = generators.create_zipf_workload(resources, sizes["queries"] // 10,
+                                               1.1, rng)
+    role = roles.Role("role")
+
+    def run(_):
+        get_best_result = rule_list.get_best_result
+
+        for resource in workload:
+            get_best_result(role, resource)
+
+        return len(workload)
+
+    return None, run
+
+
+@benchmark("indexed_rule_list.remove_rule")
+def bench_indexed_rule_list_remove(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    rule_set = generators.create_rules(resources, sizes["rules_per_role"] * 10,
+                                       0.5, rng)
+    order = list(rule_set)
+    rng.shuffle(order)
+
+    def setup():
+        rule_list = rules.IndexedRuleList()
+
+        for rule in rule_set:
+            rule_list.add_rule(rule)
+
+        # build the index
+        rule_list.get_best_result(roles.Role("role"), resources[0])
+        return rule_list
+
+    def run(rule_list):
+        remove_rule = rule_list.remove_rule
+
+        for rule in order:
+            remove_rule(rule)
+
+        return len(order)
+
+    return setup, run
+
+
+@benchmark("role_manager.get_role")
+def bench_role_manager(sizes, rng):
+    manager = roles.RoleManager()
+    names = ["role_{}".format(i) for i in range(sizes["roles"] * 10)]
+
+    for name in names:
+        manager.create_role(name)
+
+    workload = [rng.choice(names) for _ in range(sizes["queries"])]
+
+    def run(_):
+        get_role = manager.get_role
+
+        for name in workload:
+            get_role(name)
+
+        return len(workload)
+
+    return None, run
+
+
+@benchmark("configurator.load_data_from_config_file")
+def bench_configurator_load(sizes, rng):
+    filename = _create_config_file(sizes, rng)
+
+    def run(_):
+        configurator = config.AclConfigurator()
+        configurator.load_data_from_config_file(filename)
+        return 1
+
+    return None, run
+
+
+@benchmark("configurator.load_data_from_artifact")
+def bench_configurator_load_artifact(sizes, rng):
+    filename = _create_config_file(sizes, rng)
+    artifact_filename = filename + ".artifact"
+    _TEMPORARY_FILES.append(artifact_filename)
+
+    configurator = config.AclConfigurator()
+    configurator.load_data_from_config_file(filename, artifact_filename)
+
+    def run(_):
+        configurator = config.AclConfigurator()
+        configurator.load_data_from_config_file(filename, artifact_filename)
+        return 1
+
+    return None, run
+
+
+@benchmark("configurator.create_new_acl")
+def bench_configurator_create_acl(sizes, rng):
+    filename = _create_config_file(sizes, rng)
+
+    def setup():
+        configurator = config.AclConfigurator()
+        configurator.load_data_from_config_file(filename)
+        return configurator
+
+    def run(configurator):
+        configurator.create_new_acl()
+        return 1
+
+    return setup, run
+
+
+@benchmark("configurator.load_config_file_into")
+def bench_configurator_stream(sizes, rng):
+    filename = _create_config_file(sizes, rng)
+
+    def run(_):
+        configurator = config.AclConfigurator()
+        configurator.load_config_file_into(acls.Acl(), filename)
+        return 1
+
+    return None, run
+
+
+@memory_benchmark("memory.rules")
+def bench_memory_rules(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    count = sizes["roles"] * sizes["rules_per_role"]
+
+    def create():
+        return generators.create_rules(resources, count, 0.5, rng), count
+
+    return create
+
+
+@memory_benchmark("memory.roles")
+def bench_memory_roles(sizes, rng):
+    count = sizes["roles"] * 10
+
+    def create():
+        role_list = []
+
+        for i in range(count):
+            parents = rng.sample(role_list, min(len(role_list), 2))
+            role = roles.Role("role_{}".format(i), parents)
+            role.lineage
+            role_list.append(role)
+
+        return role_list, count
+
+    return create
+
+
+@memory_benchmark("memory.acl")
+def bench_memory_acl(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+
+    def create():
+        acl, _ = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng)
+        return acl, sizes["roles"] * sizes["rules_per_role"]
+
+    return create
+
+
+@memory_benchmark("memory.acl.columnar")
+def bench_memory_acl_columnar(sizes, rng):
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+
+    def create():
+        acl, _ = generators.create_acl(sizes["roles"], sizes["rules_per_role"],
+                                       resources, 0.5, rng,
+                                       rule_list_factory=rules.ColumnarRuleList)
+        return acl, sizes["roles"] * sizes["rules_per_role"]
+
+    return create
+
+
+def _create_config_file(sizes, rng):
+    """Write random config into temporary file removed at exit.
+
+    Args:
+        sizes (Dict[str, int]): Benchmark sizes.
+        rng (random.Random): Random generator.
+
+    Returns:
+        str: Filename.
+
+    """
+    resources = generators.create_resource_names(sizes["resources"], 5, rng)
+    fd, filename = tempfile.mkstemp(suffix=".conf")
+
+    with os.fdopen(fd, "w") as fileobj:
+        generators.write_config_file(fileobj, sizes["config_roles"],
+                                     sizes["config_rules_per_role"], resources, rng)
+
+    _TEMPORARY_FILES.append(filename)
+    return filename
+
+
+_TEMPORARY_FILES = []
+
+
+def run_benchmark(name, factory, sizes, seed):
+    """Run one benchmark.
+
+    Args:
+        name (str): Benchmark name.
+        factory (Callable): Benchmark factory.
+        sizes (Dict[str, int]): Benchmark sizes.
+        seed (int): Random seed.
+
+    Returns:
+        Optional[Dict[str, Any]]: Result of the benchmark or None if it can not
+            run.
+
+    """
+    rng = random.Random(seed)
+    created = factory(sizes, rng)
+
+    if created is None:
+        return None
+
+    setup, run = created
+    timings = []
+    operations = 0
+
+    for _ in range(sizes["repeat"]):
+        argument = setup() if setup is not None else None
+        gc.collect()
+
+        start = time.perf_counter()
+        operations = run(argument)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    best = timings[0]
+    median = timings[len(timings) // 2]
+
+    return {
+        "name": name,
+        "operations": operations,
+        "repeat": len(timings),
+        "best_s": best,
+        "median_s": median,
+        "best_ns_per_op": best / operations * 1e9,
+        "median_ns_per_op": median / operations * 1e9,
+    }
+
+
+def run_memory_benchmark(name, factory, sizes, seed):
+    """Run one memory benchmark.
+
+    Args:
+        name (str): Benchmark name.
+        factory (Callable): Benchmark factory.
+        sizes (Dict[str, int]): Benchmark sizes.
+        seed (int): Random seed.
+
+    Returns:
+        Dict[str, Any]: Result of the benchmark.
+
+    """
+    rng = random.Random(seed)
+    create = factory(sizes, rng)
+    gc.collect()
+
+    tracemalloc.start()
+
+    try:
+        objects, count = create()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del objects
+
+    return {
+        "name": name,
+        "objects": count,
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+        "bytes_per_object": retained / count,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true",
+                        help="use small data sizes")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--output", help="output JSON file (default stdout)")
+    parser.add_argument("--filter", default="",
+                        help="run only benchmarks containing the substring")
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_SIZES if args.quick else FULL_SIZES
+    results = []
+
+    try:
+        for name, factory in BENCHMARKS:
+            if args.filter not in name:
+                continue
+
+            result = run_benchmark(name, factory, sizes, args.seed)
+
+            if result is None:
+                sys.stderr.write("{}: skipped\n".format(name))
+                continue
+
+            results.append(result)
+            sys.stderr.write("{name}: {median_ns_per_op:.0f} ns/op\n".format(**result))
+
+        for name, factory in MEMORY_BENCHMARKS:
+            if args.filter not in name:
+                continue
+
+            result = run_memory_benchmark(name, factory, sizes, args.seed)
+            results.append(result)
+            sys.stderr.write("{name}: {bytes_per_object:.0f} B/object\n".format(
+                **result))
+    finally:
+        for filename in _TEMPORARY_FILES:
+            os.remove(filename)
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as fileobj:
+            json.dump(report, fileobj, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
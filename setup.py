@@ -21,5 +21,6 @@ setup(
     version=get_version(),
     name="easy-acl",
     package_dir={"": SRC_DIR},
-    packages=["easy_acl"]
+    packages=["easy_acl"],
+    extras_require={"numpy": ["numpy"]}
 )
@@ -7,8 +7,12 @@ from __future__ import absolute_import
 
 import collections
 import sys
+import threading
 
+import easy_acl.cache as caches
+import easy_acl.compiled as compiled
 import easy_acl.evaluator as evaluators
+import easy_acl.instrumentation as instrumentation
 import easy_acl.role as roles
 import easy_acl.rule as rules
 
@@ -22,22 +26,60 @@ class Acl(object):
         default_evaluator (Optional[Callable[[Role, str, int,
             easy_acl.rule.AbstractRule], bool]]): Evaluator used if no rule found.
                 Default is deny.
+        rule_list_factory (Optional[Callable[[], easy_acl.rule.RuleList]]):
+            Factory of rule lists for roles. Default is `easy_acl.rule.RuleList`.
+            Use `easy_acl.rule.IndexedRuleList` for large rule sets or
+            `easy_acl.rule.ColumnarRuleList` to save memory.
+        cache (Optional[easy_acl.cache.AbstractCache]): Cache of the decisions.
+            Default is unbounded dict. Cache keys are `(role name, resource)`
+            tuples.
+        instrument (Optional[easy_acl.instrumentation.AbstractInstrument]):
+            Instrument receiving report of each `is_allowed` query. Queries are
+            not measured if it is not set.
 
     Attributes:
         roles (easy_acl.role.RoleManager): Role manager
         default_evaluator (Callable[[Role, str, int, easy_acl.rule.AbstractRule],
             bool]): Default evaluator.
+        cache (Union[dict, easy_acl.cache.AbstractCache]): Cache of the decisions.
+        instrument (Optional[easy_acl.instrumentation.AbstractInstrument]):
+            Instrument of the queries.
+        shared_cache (Optional[easy_acl.shared_cache.AbstractSharedCache]):
+            Second level cache shared by processes. Set it by
+            `set_shared_cache`.
+        shared_generation (Optional[str]): Config generation of the shared
+            cache entries. It is None when the shared cache is not used.
 
     """
 
-    def __init__(self, default_evaluator=None):
+    def __init__(self, default_evaluator=None, rule_list_factory=None, cache=None,
+                 instrument=None):
         if default_evaluator is None:
             default_evaluator = evaluators.deny
 
+        if rule_list_factory is None:
+            rule_list_factory = rules.RuleList
+
+        if cache is None:
+            cache = {}
+
         self.__default_evaluator = default_evaluator
         self.__roles = roles.RoleManager()
-        self.__rules = collections.defaultdict(rules.RuleList)
-        self.__cache = {}
+        self.__rules = collections.defaultdict(rule_list_factory)
+        self.__cache = cache
+        # role name -> cached resources, used to invalidate the cache
+        self.__cached_resources = collections.defaultdict(set)
+        self.__instrument = instrument
+        # cache key -> computation of the missing decision shared by threads
+        self.__flights = {}
+        self.__flights_lock = threading.Lock()
+        self.__generation = 0
+        self.__shared_cache = None
+        # None if the shared cache is not set or the ACL was changed locally
+        self.__shared_generation = None
+
+        if isinstance(cache, caches.AbstractCache):
+            cache.eviction_callback = self._forget_cache_key
 
     @property
     def roles(self):
@@ -51,28 +93,213 @@ class Acl(object):
     def rules(self):
         return dict(self.__rules.items())
 
+    @property
+    def cache(self):
+        return self.__cache
+
+    @property
+    def instrument(self):
+        return self.__instrument
+
+    @instrument.setter
+    def instrument(self, value):
+        self.__instrument = value
+
+    @property
+    def shared_cache(self):
+        return self.__shared_cache
+
+    @property
+    def shared_generation(self):
+        return self.__shared_generation
+
+    def set_shared_cache(self, shared_cache, generation):
+        """Set the second level cache shared by processes.
+
+        Only processes with the same generation share the decisions, so the
+        generation has to identify the current ACL content (e.g. the hash of
+        the loaded config). Any local change of rules or roles stops using the
+        shared cache until this method is called again with a new generation.
+
+        Args:
+            shared_cache (Optional[easy_acl.shared_cache.AbstractSharedCache]):
+                The shared cache or None to stop using it.
+            generation (Optional[str]): Config generation.
+
+        Raises:
+            ValueError: The shared cache is set without the generation.
+
+        """
+        if shared_cache is not None and generation is None:
+            raise ValueError("Generation of the shared cache has to be set")
+
+        self.__shared_cache = shared_cache
+        self.__shared_generation = None if shared_cache is None else generation
+
     def clear_cache(self):
         """Clear internal cache.
 
         """
-        self.__cache = {}
+        self._discard_in_flight()
+        self.__cache.clear()
+        self.__cached_resources.clear()
+
+    def invalidate_role(self, role_name):
+        """Remove cached decisions of the role and all its descendants.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        self._invalidate_removed_role(self._get_role(role_name))
+
+    def _invalidate_removed_role(self, role):
+        """Remove cached decisions of the role and all its descendants.
+
+        The role need not be registered anymore.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+
+        """
+        self._discard_in_flight()
+        self.__shared_generation = None
+
+        for affected_role in self._get_affected_roles(role):
+            resources = self.__cached_resources.pop(affected_role.name, ())
+
+            for resource in resources:
+                self.__cache.pop(self._get_cache_key(affected_role, resource), None)
+
+    def compile(self):
+        """Freeze the current state into immutable ACL.
+
+        Returns:
+            easy_acl.compiled.CompiledAcl: Compiled ACL.
+
+        """
+        return compiled.CompiledAcl(self.__roles, self.rules,
+                                    self.__default_evaluator)
 
     def add_rule(self, role_name, rule):
         """Add new rule to the system.
 
+        Cached decisions affected by the rule are removed from the cache.
+
         Args:
-            role_name (str): Role name.
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
             rule (easy_acl.rule.AbstractRule): Rule to add.
 
         """
-        role = self.__roles.get_role(role_name)
-        self.__rules[role].rules.append(rule)
+        role = self._get_role(role_name)
+        self.__rules[role].add_rule(rule)
+        self._invalidate_rule(role, rule)
+
+    def remove_rule(self, role_name, rule):
+        """Remove the rule instance or all rules with the definition.
+
+        Cached decisions affected by the removed rules are removed from the
+        cache.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            rule (Union[easy_acl.rule.AbstractRule, str]): Rule instance or
+                definition of the rules to remove.
+
+        Returns:
+            List[easy_acl.rule.AbstractRule]: Removed rules.
+
+        Raises:
+            ValueError: Role was not found or no rule of the role was found.
+
+        """
+        role = self._get_role(role_name)
+        removed = self._get_rule_list(role, rule).remove_rule(rule)
+
+        for removed_rule in removed:
+            self._invalidate_rule(role, removed_rule)
+
+        return removed
+
+    def replace_rule(self, role_name, rule, new_rule):
+        """Replace the rule by the new rule.
+
+        The new rule keeps the precedence of the replaced rule. Cached decisions
+        affected by both rules are removed from the cache.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            rule (Union[easy_acl.rule.AbstractRule, str]): Rule instance or
+                definition of the rule to replace.
+            new_rule (easy_acl.rule.AbstractRule): The new rule.
+
+        Returns:
+            easy_acl.rule.AbstractRule: The replaced rule.
+
+        Raises:
+            ValueError: Role was not found or no rule or more rules of the role
+                were found.
+
+        """
+        role = self._get_role(role_name)
+        old_rule = self._get_rule_list(role, rule).replace_rule(rule, new_rule)
+        self._invalidate_rule(role, old_rule)
+        self._invalidate_rule(role, new_rule)
+        return old_rule
+
+    def replace_role(self, role):
+        """Replace the role with the same name by the new role instance.
+
+        Rules of the old role are moved to the new one. Cached decisions of the
+        role and its descendants are removed. Roles inheriting from the
+        replaced role have to be replaced too to inherit from the new instance.
+
+        Args:
+            role (easy_acl.role.Role): New role instance.
+
+        Raises:
+            ValueError: Role with the name does not exist.
+
+        """
+        old_role = self.__roles.get_role(role.name)
+        self.invalidate_role(old_role)
+        self.__roles.replace_role(role)
+
+        if old_role in self.__rules:
+            self.__rules[role] = self.__rules.pop(old_role)
+
+    def remove_role(self, role_name):
+        """Remove the role with all its rules.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+
+        Raises:
+            ValueError: Role was not found or another role inherits from it.
+
+        """
+        role = self._get_role(role_name)
+        self.__roles.remove_role(role.name)
+        self.__rules.pop(role, None)
+        self._invalidate_removed_role(role)
 
     def is_allowed(self, role_name, resource):
         """Test if access to the resource is allowed for role defined by its name.
 
+        The registered role instance can be passed instead of the name. An
+        instance which is not registered (e.g. replaced one) is refused.
+
         Args:
-            role_name (str): Role name.
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
             resource (str): Resource name.
 
         Returns:
@@ -82,15 +309,425 @@ class Acl(object):
             ValueError: Role with given name was not found.
 
         """
-        role = self.__roles.get_role(role_name)
+        if self.__instrument is not None:
+            return self._is_allowed_instrumented(role_name, resource)
+
+        role = self._get_role(role_name)
         key = self._get_cache_key(role, resource)
 
         try:
             return self.__cache[key]
         except KeyError:
-            result = self._get_permission(role, resource)
-            self.__cache[key] = result
+            return self._compute_once(role, resource, key)
+
+    def _compute_once(self, role, resource, key):
+        """Compute the missing decision once for all concurrent callers.
+
+        The first caller computes the decision, other threads asking for the
+        same key meanwhile wait for its result (or exception). Callers coming
+        after the computation finished get the cached decision. The decision
+        is not cached if the ACL was changed during the computation.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource name.
+            key (Tuple[str, str]): The cache key.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        """
+        with self.__flights_lock:
+            flight = self.__flights.get(key)
+
+            if flight is not None:
+                is_leader = False
+            else:
+                # the flight could finish since the cache was asked
+                if key in self.__cache:
+                    try:
+                        return self.__cache[key]
+                    except KeyError:
+                        # expired meanwhile
+                        pass
+
+                is_leader = True
+                flight = _Flight()
+                self.__flights[key] = flight
+
+        if not is_leader:
+            return flight.wait()
+
+        generation = self.__generation
+
+        try:
+            result = self._get_shared_permission(role, resource, key)
+
+            if generation == self.__generation:
+                self._store_decision(role, resource, result)
+
+            flight.set_result(result)
             return result
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self.__flights_lock:
+                if self.__flights.get(key) is flight:
+                    del self.__flights[key]
+
+    def _is_allowed_instrumented(self, role_name, resource):
+        """Test access like `is_allowed` and report the query to the instrument.
+
+        Rules are matched first and only the best matching rule is evaluated,
+        so the matching and the evaluation are measured separately.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            resource (str): Resource name.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        instrument = self.__instrument
+        timer = instrument.timer
+
+        start = timer()
+        role = self._get_role(role_name)
+        role_resolved = timer()
+        key = self._get_cache_key(role, resource)
+
+        try:
+            is_allowed = self.__cache[key]
+        except KeyError:
+            pass
+        else:
+            end = timer()
+            instrument.on_query(instrumentation.QueryReport(
+                role.name, resource, is_allowed, True, end - start,
+                role_resolved - start, 0, 0, 0, 0, 0, None))
+            return is_allowed
+
+        is_allowed = self._get_shared_decision(key)
+
+        if is_allowed is not None:
+            self._store_decision(role, resource, is_allowed)
+            end = timer()
+            instrument.on_query(instrumentation.QueryReport(
+                role.name, resource, is_allowed, True, end - start,
+                role_resolved - start, 0, 0, 0, 0, 0, None))
+            return is_allowed
+
+        walk_start = timer()
+        best_match, best_owner, matching_time, roles_visited, rules_tested = \
+            self._find_best_match_measured(role, resource, timer)
+        evaluation_start = timer()
+
+        if best_match is None:
+            is_allowed = self._get_default_permission(role, resource).is_allowed
+        elif best_match.result is not None:
+            is_allowed = best_match.result.is_allowed
+        else:
+            is_allowed = best_match.rule.evaluate(best_owner, resource,
+                                                  best_match.level)
+
+        end = timer()
+        self._store_decision(role, resource, is_allowed)
+        self._store_shared_decision(key, is_allowed)
+
+        instrument.on_query(instrumentation.QueryReport(
+            role.name, resource, is_allowed, False, end - start,
+            role_resolved - start, evaluation_start - walk_start - matching_time,
+            matching_time, end - evaluation_start, roles_visited, rules_tested,
+            None if best_match is None else best_match.rule))
+        return is_allowed
+
+    def is_allowed_many(self, role_name, resources):
+        """Test access to many resources for one role.
+
+        The role and its lineage rules are resolved only once for all resources.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            resources (Iterable[str]): Resource names.
+
+        Returns:
+            List[bool]: Permission of each resource in the input order.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        role = self._get_role(role_name)
+        return self._is_allowed_many(role, resources)
+
+    def is_allowed_matrix(self, role_names, resources):
+        """Test access to many resources for many roles.
+
+        Args:
+            role_names (Iterable[Union[str, easy_acl.role.Role]]): Role names or
+                role instances.
+            resources (Iterable[str]): Resource names.
+
+        Returns:
+            List[List[bool]]: For each role (in the input order) list of
+                permissions of each resource (in the input order).
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        role_list = [self._get_role(n) for n in role_names]
+        resources = list(resources)
+        parts_lookup = {}
+        return [self._is_allowed_many(r, resources, parts_lookup)
+                for r in role_list]
+
+    def _is_allowed_many(self, role, resources, parts_lookup=None):
+        """Test access to many resources for one role.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resources (Iterable[str]): Resource names.
+            parts_lookup (Optional[Dict[str, Tuple[str]]]): Resources split to
+                parts shared between calls. It is filled by missing resources.
+
+        Returns:
+            List[bool]: Permission of each resource in the input order.
+
+        """
+        if parts_lookup is None:
+            parts_lookup = {}
+
+        cache = self.__cache
+        cached_resources = self.__cached_resources[role.name]
+        lineage_rules = None
+        results = []
+
+        for resource in resources:
+            key = self._get_cache_key(role, resource)
+
+            try:
+                result = cache[key]
+            except KeyError:
+                if lineage_rules is None:
+                    lineage_rules = self._get_lineage_rules(role)
+
+                try:
+                    parts = parts_lookup[resource]
+                except KeyError:
+                    parts = rules.AbstractRule.split_resource_to_parts(resource)
+                    parts_lookup[resource] = parts
+
+                result = self._get_shared_permission(role, resource, key,
+                                                     lineage_rules, parts)
+                cache[key] = result
+                cached_resources.add(resource)
+
+            results.append(result)
+
+        return results
+
+    def _get_generation(self):
+        """Get the number of changes of the ACL.
+
+        Returns:
+            int: The number of changes.
+
+        """
+        return self.__generation
+
+    def _discard_in_flight(self):
+        """Stop sharing and caching of decisions computed before a change.
+
+        Callers already waiting for a computation get its result, new callers
+        start a new computation.
+
+        """
+        with self.__flights_lock:
+            self.__generation += 1
+            self.__flights.clear()
+
+    def _store_decision(self, role, resource, is_allowed):
+        """Store the decision in the cache.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource name.
+            is_allowed (bool): The decision.
+
+        """
+        self.__cache[self._get_cache_key(role, resource)] = is_allowed
+        self.__cached_resources[role.name].add(resource)
+
+    def _get_shared_permission(self, role, resource, key, lineage_rules=None,
+                               parts=None):
+        """Get permission from the shared cache or compute and share it.
+
+        Args:
+            role (easy_acl.role.Role): Role to test.
+            resource (str): Resource name.
+            key (Tuple[str, str]): The cache key.
+            lineage_rules (Optional[Tuple[Tuple[easy_acl.role.Role,
+                easy_acl.rule.RuleList]]]): Precomputed rules of the role's
+                    lineage.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        """
+        is_allowed = self._get_shared_decision(key)
+
+        if is_allowed is None:
+            is_allowed = self._get_permission(role, resource, lineage_rules, parts)
+            self._store_shared_decision(key, is_allowed)
+
+        return is_allowed
+
+    def _get_shared_decision(self, key):
+        """Get the decision from the shared cache.
+
+        Args:
+            key (Tuple[str, str]): The cache key.
+
+        Returns:
+            Optional[bool]: The decision or None if it is not shared.
+
+        """
+        generation = self.__shared_generation
+
+        if generation is None:
+            return None
+
+        return self.__shared_cache.get(generation, key)
+
+    def _store_shared_decision(self, key, is_allowed):
+        """Store the decision in the shared cache if it is used.
+
+        Args:
+            key (Tuple[str, str]): The cache key.
+            is_allowed (bool): The decision.
+
+        """
+        generation = self.__shared_generation
+
+        if generation is not None:
+            self.__shared_cache.set(generation, key, is_allowed)
+
+    def _get_role(self, role_name):
+        """Get role instance by its name.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance. The instance is returned as is if it is the
+                registered one.
+
+        Returns:
+            easy_acl.role.Role: Role instance.
+
+        Raises:
+            ValueError: Role with given name was not found or the instance is
+                not the registered one (e.g. it was replaced).
+
+        """
+        if isinstance(role_name, roles.Role):
+            if not self.__roles.is_registered(role_name):
+                raise ValueError("Role '{}' is not the registered instance".format(
+                    role_name.name))
+
+            return role_name
+
+        return self.__roles.get_role(role_name)
+
+    def _get_rule_list(self, role, rule):
+        """Get existing rule list of the role.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            rule (Union[easy_acl.rule.AbstractRule, str]): Rule searched in the
+                list, used in the error message.
+
+        Returns:
+            easy_acl.rule.RuleList: The rule list.
+
+        Raises:
+            ValueError: The role has no rules.
+
+        """
+        if role not in self.__rules:
+            raise ValueError("Rule '{}' is not in the list".format(
+                getattr(rule, "definition", rule)))
+
+        return self.__rules[role]
+
+    def _get_affected_roles(self, role):
+        """Get roles whose decisions depend on the role.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+
+        Returns:
+            List[easy_acl.role.Role]: The role and its descendants.
+
+        """
+        return [role] + self.__roles.get_descendants(role.name)
+
+    def _invalidate_rule(self, role, rule):
+        """Remove cached decisions which can be changed by the new rule.
+
+        Only decisions of the role and its descendants for resources matching
+        the rule are removed.
+
+        Args:
+            role (easy_acl.role.Role): Role the rule belongs to.
+            rule (easy_acl.rule.AbstractRule): The rule.
+
+        """
+        self._discard_in_flight()
+        self.__shared_generation = None
+
+        if not self.__cached_resources:
+            return
+
+        index_key = rules.get_index_key(rule)
+
+        for affected_role in self._get_affected_roles(role):
+            resources = self.__cached_resources.get(affected_role.name)
+
+            if not resources:
+                continue
+
+            if index_key is not None and index_key[0] == rules.INDEX_EXACT:
+                matching = [index_key[1]] if index_key[1] in resources else []
+            elif rules.is_matchable(rule):
+                matching = [r for r in resources if rule.try_match(r) is not None]
+            else:
+                # unknown rule can match anything
+                matching = list(resources)
+
+            for resource in matching:
+                resources.discard(resource)
+                self.__cache.pop(self._get_cache_key(affected_role, resource), None)
+
+    def _forget_cache_key(self, key):
+        """Remove the key removed by the cache from the cached resources.
+
+        Args:
+            key (Tuple[str, str]): The cache key.
+
+        """
+        role_name, resource = key
+        resources = self.__cached_resources.get(role_name)
+
+        if resources is not None:
+            resources.discard(resource)
 
     def _get_cache_key(self, role, resource):
         """Create key for the cache.
@@ -105,57 +742,174 @@ class Acl(object):
         """
         return (role.name, resource)
 
-    def _get_permission(self, role, resource):
+    def _get_lineage_rules(self, role):
+        """Get rule lists of all roles in the role's lineage.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+
+        Returns:
+            Tuple[Tuple[easy_acl.role.Role, easy_acl.rule.RuleList]]: Pairs of
+                the role from lineage and its rules.
+
+        """
+        return tuple((r, self.__rules[r]) for r in role.lineage)
+
+    def _get_permission(self, role, resource, lineage_rules=None, parts=None):
         """Get permission for the resource.
 
         Args:
             role (easy_acl.role.Role): Role to test.
             resource (str): Resource name.
+            lineage_rules (Optional[Tuple[Tuple[easy_acl.role.Role,
+                easy_acl.rule.RuleList]]]): Precomputed rules of the role's
+                    lineage.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
 
         Returns:
             bool: True if access is granted, False otherwise.
 
         """
-        result = self._search_for_best_rule_result(role, resource)
+        result = self._search_for_best_rule_result(role, resource, lineage_rules,
+                                                   parts)
 
         if not result:
             result = self._get_default_permission(role, resource)
 
         return result.is_allowed
 
-    def _search_for_best_rule_result(self, role, resource):
+    def _search_for_best_rule_result(self, role, resource, lineage_rules=None,
+                                     parts=None):
         """Search for the ACL query result.
 
-        Search is done recursively over role's parents until the exact permission
-        is found. This secures the best matching rule is found.
+        Search is done over role's lineage until the exact permission is found.
+        This secures the best matching rule is found. The resource is split to
+        parts only once for all rules.
 
         Args:
             role (easy_acl.role.Role): Role instance.
             resource (str): Resource name.
+            lineage_rules (Optional[Tuple[Tuple[easy_acl.role.Role,
+                easy_acl.rule.RuleList]]]): Precomputed rules of the role's
+                    lineage.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
 
         Returns:
             Optional[easy_acl.rule.Result]: Result of the query or None if no
                 matching rule was found.
 
         """
-        open_list = [role]
-        best_result = None
+        if lineage_rules is None:
+            lineage_rules = self._get_lineage_rules(role)
 
-        while len(open_list) > 0:
-            current_role = open_list.pop(0)
-            open_list += list(current_role.parents)
-            rules = self.__rules[current_role]
+        if parts is None:
+            parts = rules.AbstractRule.split_resource_to_parts(resource)
 
-            current_result = rules.get_best_result(current_role, resource)
+        best_result = None
+
+        for current_role, rule_list in lineage_rules:
+            current_result = rule_list.get_best_result(current_role, resource,
+                                                       parts)
 
             if current_result is not None:
                 if current_result.level == 0:
                     return current_result
-                elif best_result is None or best_result.level > current_result:
+                elif best_result is None or best_result.level > current_result.level:
                     best_result = current_result
 
         return best_result
 
+    def _find_best_match(self, role, resource, lineage_rules=None, parts=None):
+        """Find the best matching rule over role's lineage without evaluating it.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource name.
+            lineage_rules (Optional[Tuple[Tuple[easy_acl.role.Role,
+                easy_acl.rule.RuleList]]]): Precomputed rules of the role's
+                    lineage.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
+
+        Returns:
+            Tuple[Optional[easy_acl.rule.Match], Optional[easy_acl.role.Role]]:
+                The best match and the role owning the rule or Nones if no
+                rule matches.
+
+        """
+        if lineage_rules is None:
+            lineage_rules = self._get_lineage_rules(role)
+
+        if parts is None:
+            parts = rules.AbstractRule.split_resource_to_parts(resource)
+
+        best_match = None
+        best_owner = None
+
+        for current_role, rule_list in lineage_rules:
+            match, _ = rule_list.find_best_match(current_role, resource, parts)
+
+            if match is None:
+                continue
+            elif best_match is None or match.level < best_match.level:
+                if best_match is not None:
+                    rules.discard_result(best_match.result)
+
+                best_match = match
+                best_owner = current_role
+
+                if match.level == 0:
+                    break
+            else:
+                rules.discard_result(match.result)
+
+        return best_match, best_owner
+
+    def _find_best_match_measured(self, role, resource, timer):
+        """Find the best matching rule like `_find_best_match` and measure it.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource name.
+            timer (Callable[[], float]): Timer of the instrument.
+
+        Returns:
+            Tuple[Optional[easy_acl.rule.Match], Optional[easy_acl.role.Role],
+                float, int, int]: The best match, the role owning the rule,
+                    time of the rule matching, count of visited roles and
+                    count of tested rules.
+
+        """
+        lineage_rules = self._get_lineage_rules(role)
+        parts = rules.AbstractRule.split_resource_to_parts(resource)
+        matching_time = 0
+        roles_visited = 0
+        rules_tested = 0
+        best_match = None
+        best_owner = None
+
+        for current_role, rule_list in lineage_rules:
+            roles_visited += 1
+            matching_start = timer()
+            match, tested = rule_list.find_best_match(current_role, resource, parts)
+            matching_time += timer() - matching_start
+            rules_tested += tested
+
+            if match is None:
+                continue
+            elif best_match is None or match.level < best_match.level:
+                if best_match is not None:
+                    rules.discard_result(best_match.result)
+
+                best_match = match
+                best_owner = current_role
+
+                if match.level == 0:
+                    break
+            else:
+                rules.discard_result(match.result)
+
+        return best_match, best_owner, matching_time, roles_visited, rules_tested
+
     def _get_default_permission(self, role, resource):
         """Get default permission for the role.
 
@@ -177,9 +931,9 @@ class Acl(object):
     def _get_default_evaluator(self, role):
         """Get default permission evaluator.
 
-        If role has not any default evaluator, the role's parents are searched
-        recursivey. If no parent has any default evaluator, the global default
-        evaluator is returned.
+        If role has not any default evaluator, the role's lineage is searched.
+        If no parent has any default evaluator, the global default evaluator is
+        returned.
 
         Args:
             role (easy_acl.role.Role): Role to search the evaluator for.
@@ -189,15 +943,48 @@ class Acl(object):
                 default permission evaluator.
 
         """
-        evaluator = None
-        open_list = [role]
-
-        while evaluator is None and len(open_list) > 0:
-            current_role = open_list.pop(0)
+        for current_role in role.lineage:
             evaluator = current_role.default_evaluator
-            open_list += list(current_role.parents)
 
-        if evaluator is None:
-            evaluator = self.__default_evaluator
+            if evaluator is not None:
+                return evaluator
+
+        return self.__default_evaluator
+
+
+class _Flight(object):
+    """Computation of one decision shared by concurrent callers.
+
+    """
+
+    __slots__ = ("event", "result", "exception")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exception = None
+
+    def set_result(self, result):
+        self.result = result
+        self.event.set()
+
+    def set_exception(self, exception):
+        self.exception = exception
+        self.event.set()
+
+    def wait(self):
+        """Wait for the result.
+
+        Returns:
+            bool: The computed decision.
+
+        Raises:
+            Exception: Exception raised by the computation.
+
+        """
+        self.event.wait()
+
+        if self.exception is not None:
+            raise self.exception
 
-        return evaluator
+        return self.result
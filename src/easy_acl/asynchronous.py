@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""Asyncio ACL.
+
+The `AsyncAcl` is made for asyncio applications with evaluators which have to
+wait for I/O (e.g. to look up an owner of the resource). Its `is_allowed`
+method is a coroutine. Evaluators (including default evaluators) may be plain
+functions or coroutine functions, the returned awaitable is awaited.
+
+Rules are matched first and only the evaluator of the best matching rule is
+called. Concurrent queries of the same role and resource share one evaluation.
+Decisions are stored in the same cache as in `easy_acl.acl.Acl` and
+invalidated by the same methods. The shared cache set by `set_shared_cache`
+is asked before rules are matched, same as in `easy_acl.acl.Acl`. Queries
+evaluated while the ACL is changed are not cached.
+
+Queries are reported to the instrument like in `easy_acl.acl.Acl`, the
+evaluation time includes waiting for the async evaluator. Queries waiting for
+the evaluation started by another query are not reported.
+
+The instance has to be used from one event loop.
+
+Example
+-------
+
+acl = AsyncAcl()
+AclConfigurator().load_config_file_into(acl, "acl.conf")
+
+async def handler(request):
+    if not await acl.is_allowed(request.user.role, "post.edit"):
+        raise Forbidden()
+
+"""
+
+from __future__ import absolute_import
+
+import asyncio
+import functools
+import inspect
+
+import easy_acl.acl as acls
+import easy_acl.instrumentation as instrumentation
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+class AsyncAcl(acls.Acl):
+    """ACL with coroutine queries supporting async evaluators.
+
+    Args:
+        default_evaluator (Optional[Callable[[Role, str, int,
+            easy_acl.rule.AbstractRule], Union[bool, Awaitable[bool]]]]):
+                Evaluator used if no rule found. Default is deny.
+        rule_list_factory (Optional[Callable[[], easy_acl.rule.RuleList]]):
+            Factory of rule lists for roles.
+        cache (Optional[easy_acl.cache.AbstractCache]): Cache of the decisions.
+            Default is unbounded dict.
+        instrument (Optional[easy_acl.instrumentation.AbstractInstrument]):
+            Instrument receiving report of each evaluated or cached query.
+
+    """
+
+    def __init__(self, default_evaluator=None, rule_list_factory=None, cache=None,
+                 instrument=None):
+        super(AsyncAcl, self).__init__(default_evaluator, rule_list_factory, cache,
+                                       instrument)
+        # cache key -> task evaluating the query
+        self.__in_flight = {}
+
+    async def is_allowed(self, role_name, resource):
+        """Test if access to the resource is allowed for role defined by its name.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            resource (str): Resource name.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        instrument = self.instrument
+        measurement = None
+
+        if instrument is not None:
+            start = instrument.timer()
+
+        role = self._get_role(role_name)
+        key = self._get_cache_key(role, resource)
+
+        if instrument is not None:
+            measurement = (instrument, start, instrument.timer())
+
+        try:
+            is_allowed = self.cache[key]
+        except KeyError:
+            pass
+        else:
+            if measurement is not None:
+                self._report_cache_hit(measurement, role, resource, is_allowed)
+
+            return is_allowed
+
+        task = self.__in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(self._evaluate_query(role, resource, key,
+                                                              measurement))
+            self.__in_flight[key] = task
+            task.add_done_callback(functools.partial(self._forget_task, key))
+
+        # cancelling one of the waiting queries does not cancel the others
+        return await asyncio.shield(task)
+
+    async def is_allowed_many(self, role_name, resources):
+        """Test access to many resources for one role concurrently.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            resources (Iterable[str]): Resource names.
+
+        Returns:
+            List[bool]: Permission of each resource in the input order.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        role = self._get_role(role_name)
+        return list(await asyncio.gather(*[self.is_allowed(role, r)
+                                           for r in resources]))
+
+    async def is_allowed_matrix(self, role_names, resources):
+        """Test access to many resources for many roles concurrently.
+
+        Args:
+            role_names (Iterable[Union[str, easy_acl.role.Role]]): Role names or
+                role instances.
+            resources (Iterable[str]): Resource names.
+
+        Returns:
+            List[List[bool]]: For each role (in the input order) list of
+                permissions of each resource (in the input order).
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        role_list = [self._get_role(n) for n in role_names]
+        resources = list(resources)
+        return list(await asyncio.gather(*[self.is_allowed_many(r, resources)
+                                           for r in role_list]))
+
+    async def _evaluate_query(self, role, resource, key, measurement=None):
+        """Find the best rule, evaluate it and cache the decision.
+
+        The decision is taken from the shared cache if it is there.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource name.
+            key (Tuple[str, str]): The cache key.
+            measurement (Optional[Tuple[
+                easy_acl.instrumentation.AbstractInstrument, float, float]]):
+                The instrument, start time of the query and time when the role
+                was resolved. The query is not measured if it is None.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        """
+        generation = self._get_generation()
+        is_allowed = self._get_shared_decision(key)
+
+        if is_allowed is not None:
+            self._store_decision(role, resource, is_allowed)
+
+            if measurement is not None:
+                self._report_cache_hit(measurement, role, resource, is_allowed)
+
+            return is_allowed
+
+        if measurement is None:
+            match, owner = self._find_best_match(role, resource)
+        else:
+            timer = measurement[0].timer
+            walk_start = timer()
+            match, owner, matching_time, roles_visited, rules_tested = \
+                self._find_best_match_measured(role, resource, timer)
+            evaluation_start = timer()
+
+        if match is None:
+            evaluator = self._get_default_evaluator(role)
+            is_allowed = evaluator(role, resource, 0, None)
+        elif match.result is not None:
+            is_allowed = match.result.is_allowed
+        else:
+            is_allowed = match.rule.evaluate(owner, resource, match.level)
+
+        if inspect.isawaitable(is_allowed):
+            is_allowed = await is_allowed
+
+        if generation == self._get_generation():
+            self._store_decision(role, resource, is_allowed)
+            self._store_shared_decision(key, is_allowed)
+
+        if measurement is not None:
+            instrument, start, role_resolved = measurement
+            end = timer()
+            instrument.on_query(instrumentation.QueryReport(
+                role.name, resource, is_allowed, False, end - start,
+                role_resolved - start, evaluation_start - walk_start - matching_time,
+                matching_time, end - evaluation_start, roles_visited, rules_tested,
+                None if match is None else match.rule))
+
+        return is_allowed
+
+    @staticmethod
+    def _report_cache_hit(measurement, role, resource, is_allowed):
+        """Report the query answered from the cache to the instrument.
+
+        Args:
+            measurement (Tuple[easy_acl.instrumentation.AbstractInstrument,
+                float, float]): The instrument, start time of the query and
+                time when the role was resolved.
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource name.
+            is_allowed (bool): The decision.
+
+        """
+        instrument, start, role_resolved = measurement
+        instrument.on_query(instrumentation.QueryReport(
+            role.name, resource, is_allowed, True, instrument.timer() - start,
+            role_resolved - start, 0, 0, 0, 0, 0, None))
+
+    def _forget_task(self, key, task):
+        """Remove finished task from the in-flight queries.
+
+        Args:
+            key (Tuple[str, str]): The cache key.
+            task (asyncio.Future): The finished task.
+
+        """
+        if self.__in_flight.get(key) is task:
+            del self.__in_flight[key]
+
+    def _discard_in_flight(self):
+        super(AsyncAcl, self)._discard_in_flight()
+        self.__in_flight.clear()
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""Bounded caches for ACL decisions.
+
+All caches have same dict-like interface used by `easy_acl.acl.Acl`: item is
+read by `cache[key]` (raises `KeyError` if key is not cached), written by
+`cache[key] = value`, tested by `key in cache` (not counted as a read) and the
+whole cache is dropped by the `clear` method.
+
+When the cache is full, an item is evicted before a new one is stored. The item
+to evict is selected by the cache policy:
+
+* `LruCache` - the least recently used item is evicted
+* `LfuCache` - the least frequently used item is evicted (the least recently
+    used one if there are more of them)
+* `TtlCache` - items expire after given time; the oldest item is evicted if
+    there is no expired item
+
+Example
+-------
+
+acl = Acl(cache=LruCache(10000))
+acl.is_allowed("user", "post.list")
+
+stats = acl.cache.get_stats()
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import time
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+CacheStats = collections.namedtuple("CacheStats", "hits misses evictions size "
+    "max_size")
+
+
+class AbstractCache(object):
+    """Base for all bounded caches.
+
+    Args:
+        max_size (int): Maximal count of cached items.
+
+    Attributes:
+        max_size (int): Maximal count of cached items.
+        hits (int): Count of successful reads.
+        misses (int): Count of reads of missing keys.
+        evictions (int): Count of evicted items.
+        eviction_callback (Optional[Callable[[Hashable], None]]): Called with
+            the key of each item removed by the cache itself (evicted or
+            expired).
+
+    Raises:
+        ValueError: Maximal size is not positive number.
+
+    """
+
+    def __init__(self, max_size):
+        if max_size < 1:
+            raise ValueError("Maximal size of cache has to be positive")
+
+        self.__max_size = max_size
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.eviction_callback = None
+
+    @property
+    def max_size(self):
+        return self.__max_size
+
+    @property
+    def hits(self):
+        return self.__hits
+
+    @property
+    def misses(self):
+        return self.__misses
+
+    @property
+    def evictions(self):
+        return self.__evictions
+
+    def __getitem__(self, key):
+        try:
+            value = self._get(key)
+        except KeyError:
+            self.__misses += 1
+            raise
+
+        self.__hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        if not self._contains(key):
+            while len(self) >= self.__max_size:
+                evicted_key = self._evict()
+                self.__evictions += 1
+                self._notify_removed(evicted_key)
+
+        self._set(key, value)
+
+    def __delitem__(self, key):
+        if not self._contains(key):
+            raise KeyError(key)
+
+        self._remove(key)
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def __contains__(self, key):
+        # the test does not count as a read
+        return self._contains(key)
+
+    def pop(self, key, default=None):
+        """Remove the key from the cache.
+
+        Args:
+            key (Hashable): The key.
+            default (Any): Value returned if key is not cached.
+
+        Returns:
+            Any: The removed value or the default value.
+
+        """
+        if not self._contains(key):
+            return default
+
+        return self._remove(key)
+
+    def clear(self):
+        """Remove all items from the cache.
+
+        Counters are kept.
+
+        """
+        raise NotImplementedError()
+
+    def get_stats(self):
+        """Get statistics of the cache.
+
+        Returns:
+            CacheStats: Current statistics.
+
+        """
+        return CacheStats(self.__hits, self.__misses, self.__evictions, len(self),
+                          self.__max_size)
+
+    def _get(self, key):
+        """Get cached value.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            Any: Cached value.
+
+        Raises:
+            KeyError: The key is not cached.
+
+        """
+        raise NotImplementedError()
+
+    def _set(self, key, value):
+        """Store the value. There is always free space for a new key.
+
+        Args:
+            key (Hashable): The key.
+            value (Any): The value.
+
+        """
+        raise NotImplementedError()
+
+    def _contains(self, key):
+        """Test if the key is stored without touching the usage statistics.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            bool: True if key is stored, False otherwise.
+
+        """
+        raise NotImplementedError()
+
+    def _remove(self, key):
+        """Remove stored key.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            Any: The removed value.
+
+        """
+        raise NotImplementedError()
+
+    def _evict(self):
+        """Remove one item selected by the cache policy.
+
+        Returns:
+            Hashable: The key of the removed item.
+
+        """
+        raise NotImplementedError()
+
+    def _notify_removed(self, key):
+        """Call the eviction callback.
+
+        Args:
+            key (Hashable): Key removed by the cache.
+
+        """
+        if self.eviction_callback is not None:
+            self.eviction_callback(key)
+
+
+class LruCache(AbstractCache):
+    """Cache evicting the least recently used item.
+
+    Args:
+        max_size (int): Maximal count of cached items.
+
+    """
+
+    def __init__(self, max_size):
+        super(LruCache, self).__init__(max_size)
+        self.__data = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def clear(self):
+        self.__data.clear()
+
+    def _get(self, key):
+        # move the key to the end
+        value = self.__data.pop(key)
+        self.__data[key] = value
+        return value
+
+    def _set(self, key, value):
+        self.__data.pop(key, None)
+        self.__data[key] = value
+
+    def _contains(self, key):
+        return key in self.__data
+
+    def _remove(self, key):
+        return self.__data.pop(key)
+
+    def _evict(self):
+        return self.__data.popitem(last=False)[0]
+
+
+class LfuCache(AbstractCache):
+    """Cache evicting the least frequently used item.
+
+    All operations are done in constant time. Items with the same use count are
+    evicted in the least recently used order.
+
+    Args:
+        max_size (int): Maximal count of cached items.
+
+    """
+
+    def __init__(self, max_size):
+        super(LfuCache, self).__init__(max_size)
+        self.__values = {}
+        self.__counts = {}
+        self.__buckets = collections.defaultdict(collections.OrderedDict)
+        self.__min_count = 0
+
+    def __len__(self):
+        return len(self.__values)
+
+    def clear(self):
+        self.__values = {}
+        self.__counts = {}
+        self.__buckets = collections.defaultdict(collections.OrderedDict)
+        self.__min_count = 0
+
+    def _get(self, key):
+        value = self.__values[key]
+        self._touch(key)
+        return value
+
+    def _set(self, key, value):
+        if key in self.__values:
+            self.__values[key] = value
+            self._touch(key)
+        else:
+            self.__values[key] = value
+            self.__counts[key] = 1
+            self.__buckets[1][key] = None
+            self.__min_count = 1
+
+    def _contains(self, key):
+        return key in self.__values
+
+    def _remove(self, key):
+        count = self.__counts.pop(key)
+        bucket = self.__buckets[count]
+        del bucket[key]
+
+        if not bucket:
+            del self.__buckets[count]
+
+        # the minimal count is fixed by the next insert
+        return self.__values.pop(key)
+
+    def _evict(self):
+        bucket = self.__buckets[self.__min_count]
+        key, _ = bucket.popitem(last=False)
+
+        if not bucket:
+            del self.__buckets[self.__min_count]
+
+        del self.__values[key]
+        del self.__counts[key]
+        return key
+
+    def _touch(self, key):
+        """Increment use count of the key.
+
+        Args:
+            key (Hashable): The key.
+
+        """
+        count = self.__counts[key]
+        bucket = self.__buckets[count]
+        del bucket[key]
+
+        if not bucket:
+            del self.__buckets[count]
+
+            if self.__min_count == count:
+                self.__min_count = count + 1
+
+        self.__counts[key] = count + 1
+        self.__buckets[count + 1][key] = None
+
+
+class TtlCache(AbstractCache):
+    """Cache with items expiring after given time.
+
+    Expired items are removed when they are read or when space is needed for
+    a new item. If there is no expired item, the oldest item is evicted.
+
+    Args:
+        max_size (int): Maximal count of cached items.
+        ttl (float): Time to live of an item in seconds.
+        timer (Optional[Callable[[], float]]): Clock used to measure time.
+            Default is monotonic clock.
+
+    Attributes:
+        ttl (float): Time to live of an item in seconds.
+
+    """
+
+    def __init__(self, max_size, ttl, timer=None):
+        super(TtlCache, self).__init__(max_size)
+
+        if timer is None:
+            timer = getattr(time, "monotonic", time.time)
+
+        self.__ttl = ttl
+        self.__timer = timer
+        self.__data = collections.OrderedDict()
+
+    @property
+    def ttl(self):
+        return self.__ttl
+
+    def __len__(self):
+        return len(self.__data)
+
+    def clear(self):
+        self.__data.clear()
+
+    def _get(self, key):
+        expires_at, value = self.__data[key]
+
+        if expires_at <= self.__timer():
+            del self.__data[key]
+            self._notify_removed(key)
+            raise KeyError(key)
+
+        return value
+
+    def _set(self, key, value):
+        # keep the data ordered by the expiration time
+        self.__data.pop(key, None)
+        self.__data[key] = (self.__timer() + self.__ttl, value)
+
+    def _contains(self, key):
+        return key in self.__data
+
+    def _remove(self, key):
+        return self.__data.pop(key)[1]
+
+    def _evict(self):
+        # the oldest item is either expired or the one to evict
+        return self.__data.popitem(last=False)[0]
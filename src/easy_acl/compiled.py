@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""Compiled (frozen) ACL.
+
+The `CompiledAcl` is immutable snapshot of an `easy_acl.acl.Acl` instance. Rules
+of each role and all its ancestors are merged into one lookup structure:
+
+* rules matching one exact resource are stored in a hash map
+* rules with the wildcard at the end are stored in a prefix trie
+* other (custom) rules are tested one by one
+
+Decisions are same as decisions of the source `Acl`. Nothing is changed after
+the compilation, so the instance can be shared across threads without locks.
+Changes made in the source `Acl` after compilation are not reflected.
+
+Example
+-------
+
+acl = configurator.create_new_acl()
+compiled = acl.compile()
+
+compiled.is_allowed("user", "post.list")
+
+"""
+
+from __future__ import absolute_import
+
+import easy_acl.role as roles
+import easy_acl.rule as rules
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+class CompiledAcl(object):
+    """Immutable ACL answering queries by merged per-role lookups.
+
+    Args:
+        role_manager (easy_acl.role.RoleManager): Roles to compile.
+        rule_lists (Dict[easy_acl.role.Role, easy_acl.rule.RuleList]): Rules of
+            the roles.
+        default_evaluator (Callable[[easy_acl.role.Role, str, int,
+            easy_acl.rule.AbstractRule], bool]): Global default evaluator.
+
+    Attributes:
+        role_names (Tuple[str]): Names of compiled roles.
+
+    """
+
+    def __init__(self, role_manager, rule_lists, default_evaluator):
+        self.__roles = {}
+        # id of the role instance -> compiled role
+        self.__roles_by_id = {}
+
+        for name in role_manager.get_names():
+            role = role_manager.get_role(name)
+            self.__roles[name] = CompiledRole(role, rule_lists, default_evaluator)
+            self.__roles_by_id[id(role)] = self.__roles[name]
+
+    @property
+    def role_names(self):
+        return tuple(self.__roles.keys())
+
+    def get_compiled_role(self, role_name):
+        """Get compiled data of one role.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance. The instance has to be the compiled one.
+
+        Returns:
+            CompiledRole: Compiled role.
+
+        Raises:
+            ValueError: Role with given name was not found or the role instance
+                is not the compiled one.
+
+        """
+        if isinstance(role_name, roles.Role):
+            compiled_role = self.__roles_by_id.get(id(role_name))
+
+            if compiled_role is None or compiled_role.role is not role_name:
+                raise ValueError("Role '{}' is not the registered instance".format(
+                    role_name.name))
+
+            return compiled_role
+
+        try:
+            return self.__roles[role_name]
+        except KeyError:
+            raise ValueError("Role '{}' does not exist".format(role_name))
+
+    def is_allowed(self, role_name, resource):
+        """Test if access to the resource is allowed for role defined by its name.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            resource (str): Resource name.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        return self.get_compiled_role(role_name).is_allowed(resource)
+
+
+class CompiledRole(object):
+    """Rules of one role merged with rules of its ancestors.
+
+    Rule precedence is same as in `easy_acl.acl.Acl`: the lowest match level
+    wins, then the nearest role in the lineage and then the first added rule.
+
+    Args:
+        role (easy_acl.role.Role): The role.
+        rule_lists (Dict[easy_acl.role.Role, easy_acl.rule.RuleList]): Rules of
+            the roles.
+        default_evaluator (Callable[[easy_acl.role.Role, str, int,
+            easy_acl.rule.AbstractRule], bool]): Global default evaluator.
+
+    Attributes:
+        role (easy_acl.role.Role): The role.
+        default_evaluator (Callable[[easy_acl.role.Role, str, int,
+            easy_acl.rule.AbstractRule], bool]): Evaluator used if no rule
+                matches.
+
+    """
+
+    __slots__ = ("__role", "__default_evaluator", "__exact", "__trie",
+                 "__fallback")
+
+    def __init__(self, role, rule_lists, default_evaluator):
+        # entries are (role position, rule position, rule, owner role)
+        exact = {}
+        trie = ({}, [])
+        fallback = []
+
+        for position, owner in enumerate(role.lineage):
+            rule_list = rule_lists.get(owner)
+
+            if rule_list is None:
+                continue
+
+            for seq, rule in enumerate(rule_list.rules):
+                entry = (position, seq, rule, owner)
+                index_key = rules.get_index_key(rule)
+
+                if index_key is None:
+                    fallback.append(entry)
+                elif index_key[0] == rules.INDEX_PREFIX:
+                    node = trie
+
+                    for part in index_key[1]:
+                        node = node[0].setdefault(part, ({}, []))
+
+                    node[1].append(entry)
+                else:
+                    exact.setdefault(index_key[1], []).append(entry)
+
+        self.__role = role
+        self.__default_evaluator = self._select_default_evaluator(
+            role, default_evaluator)
+        self.__exact = {k: min(v) for k, v in exact.items()}
+        self.__trie = self._freeze_node(trie)
+        self.__fallback = tuple(fallback)
+
+    @property
+    def role(self):
+        return self.__role
+
+    @property
+    def default_evaluator(self):
+        return self.__default_evaluator
+
+    def is_allowed(self, resource):
+        """Test if access to the resource is allowed.
+
+        Args:
+            resource (str): Resource name.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        """
+        result = self.get_best_result(resource)
+
+        if result is None:
+            return self.__default_evaluator(self.__role, resource, 0, None)
+
+        return result.is_allowed
+
+    def get_best_result(self, resource, parts=None):
+        """Get result of the best matching rule.
+
+        Args:
+            resource (str): Resource name.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
+
+        Returns:
+            Optional[easy_acl.rule.Result]: The result or None if no rule
+                matches.
+
+        """
+        # candidate is (level, role position, rule position, rule, owner, result)
+        entry = self.__exact.get(resource)
+
+        if entry is not None:
+            if not self.__fallback:
+                return entry[2].resolve(entry[3], resource)
+
+            best = (0, ) + entry + (None, )
+        else:
+            if parts is None:
+                parts = rules.AbstractRule.split_resource_to_parts(resource)
+
+            best = self._find_prefix_candidate(parts)
+
+        return self._resolve_best(resource, parts, best)
+
+    def _find_prefix_candidate(self, parts):
+        """Find the deepest wildcard rule matching the resource.
+
+        Args:
+            parts (Tuple[str]): Resource parts.
+
+        Returns:
+            Optional[Tuple[int, int, int, easy_acl.rule.AbstractRule,
+                easy_acl.role.Role, None]]: The candidate or None.
+
+        """
+        parts_count = len(parts)
+        node = self.__trie
+        best = None
+
+        for depth, part in enumerate(parts):
+            if node[1] is not None:
+                best = (parts_count - depth, ) + node[1] + (None, )
+
+            node = node[0].get(part)
+
+            if node is None:
+                break
+
+        return best
+
+    def _resolve_best(self, resource, parts, best):
+        """Compare the indexed candidate with fallback rules and resolve it.
+
+        Args:
+            resource (str): Resource name.
+            parts (Optional[Tuple[str]]): The resource split to parts.
+            best (Optional[Tuple[int, int, int, easy_acl.rule.AbstractRule,
+                easy_acl.role.Role, None]]): The best indexed candidate.
+
+        Returns:
+            Optional[easy_acl.rule.Result]: Result of the best rule.
+
+        """
+        for position, seq, rule, owner in self.__fallback:
+            if best is not None and best[0] == 0 and best[1:3] < (position, seq):
+                # nothing better can be found
+                break
+
+            result = rules.try_resolve(rule, owner, resource, parts)
+
+            if result is None:
+                # rule does not match
+                continue
+
+            if best is None or (result.level, position, seq) < best[:3]:
+                best = (result.level, position, seq, rule, owner, result)
+
+        if best is None:
+            return None
+        elif best[5] is None:
+            return best[3].resolve(best[4], resource, parts)
+        else:
+            return best[5]
+
+    @staticmethod
+    def _select_default_evaluator(role, default_evaluator):
+        """Select default evaluator of the role.
+
+        Args:
+            role (easy_acl.role.Role): The role.
+            default_evaluator (Callable[[easy_acl.role.Role, str, int,
+                easy_acl.rule.AbstractRule], bool]): Global default evaluator.
+
+        Returns:
+            Callable[[easy_acl.role.Role, str, int, easy_acl.rule.AbstractRule],
+                bool]: The first default evaluator in the lineage or the global
+                    one.
+
+        """
+        for current_role in role.lineage:
+            if current_role.default_evaluator is not None:
+                return current_role.default_evaluator
+
+        return default_evaluator
+
+    @classmethod
+    def _freeze_node(cls, node):
+        """Convert mutable trie node into immutable one.
+
+        Args:
+            node (Tuple[Dict[str, Tuple], List[Tuple]]): Mutable node.
+
+        Returns:
+            Tuple[Dict[str, Tuple], Optional[Tuple]]: Node with frozen children
+                and the best entry or None.
+
+        """
+        children = {k: cls._freeze_node(v) for k, v in node[0].items()}
+        entry = min(node[1]) if node[1] else None
+        return (children, entry)
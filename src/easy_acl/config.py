@@ -12,8 +12,14 @@ except ImportError:
     import ConfigParser as configparser
 
 import collections
+import glob
+import hashlib
 import importlib
+import marshal
+import os
 import re
+import sys
+import tempfile
 
 import easy_acl.acl as acls
 import easy_acl.rule as rules
@@ -27,6 +33,12 @@ RoleDefinition = collections.namedtuple("RoleDefinition", "name parents")
 RuleDefinition = collections.namedtuple("RuleDefinition", "definition rule_type "
     "evaluator_type")
 
+ConfigDiff = collections.namedtuple("ConfigDiff", "added_roles changed_roles "
+    "removed_roles added_rules removed_rules")
+
+ARTIFACT_MAGIC = b"EASYACL"
+ARTIFACT_VERSION = 1
+
 
 class AclConfigurator(object):
     """Create and configure Acl instances.
@@ -43,6 +55,14 @@ class AclConfigurator(object):
             is name of the evaluator.
         rules (Dict[str, List[RuleDefinition]]): Definitions of rules. The key is
             the role name and value is list of the rule definitions.
+        rule_factory_paths (Dict[str, str]): Full qualified names of the custom
+            rule factories. The key is rule identifier.
+        evaluator_paths (Dict[str, str]): Full qualified names of the custom
+            evaluators. The key is evaluator identifier.
+        default_evaluator_name (Optional[str]): Identifier of the global
+            default evaluator.
+        source_hash (Optional[str]): Hash of the loaded config files. It is
+            None if the config was not loaded from files.
 
     """
 
@@ -56,6 +76,8 @@ class AclConfigurator(object):
 
     REGEXP_ROLE_RULE_SECTION = re.compile("([a-zA-Z0-9_]+)_rules")
 
+    CONFIG_FILE_PATTERNS = ("*.conf", "*.ini")
+
     def __init__(self):
         self.role_klass = roles.Role
         self.rule_factories = self._create_rule_factories()
@@ -64,6 +86,10 @@ class AclConfigurator(object):
         self.default_role_evaluators = {}
         self.rules = collections.defaultdict(list)
         self.raw_config = None
+        self.rule_factory_paths = {}
+        self.evaluator_paths = {}
+        self.default_evaluator_name = None
+        self.source_hash = None
 
     def create_new_acl(self):
         """Create new Acl instance and setup it.
@@ -80,17 +106,226 @@ class AclConfigurator(object):
         self.setup_instance(instance)
         return instance
 
-    def load_data_from_config_file(self, filename):
+    def load_data_from_config_file(self, filename, artifact_filename=None):
         """Load data from config file and setup self by this data.
 
+        If the artifact filename is set, the data are loaded from the artifact
+        when it was created from the same config file content. Otherwise the
+        config file is parsed and the artifact is (re)written. The `raw_config`
+        is not set when data are loaded from the artifact.
+
         Args:
             filename (str): Name of the file.
+            artifact_filename (Optional[str]): Name of the artifact file.
 
         """
+        try:
+            self.source_hash = self._get_source_hash(filename)
+        except (IOError, OSError):
+            # missing file is ignored by the config parser too
+            self.source_hash = None
+            artifact_filename = None
+
+        if artifact_filename is not None and \
+                self.load_data_from_artifact(artifact_filename, self.source_hash):
+            return
+
         config = self._read_config(filename)
         self.raw_config = config
         self.process_dict_like_config(config)
 
+        if artifact_filename is not None:
+            self.save_artifact(artifact_filename)
+
+    def load_data_from_config_files(self, filenames, executor=None):
+        """Load data from more config files and setup self by the merged data.
+
+        Files are parsed by the executor and merged in the order of the
+        filenames. An entry defined in more files has to have the same value
+        in all of them (lists of parent roles are compared without
+        whitespace), so roles, evaluators and rules can be split across files
+        but not redefined. Rule sections of the same role are joined.
+
+        Parsing is CPU bound, so use process pool to parse files in parallel:
+
+            with concurrent.futures.ProcessPoolExecutor() as executor:
+                configurator.load_data_from_config_files("conf.d", executor)
+
+        Args:
+            filenames (Union[str, Iterable[str]]): Names of the files, glob
+                pattern or directory. Files matching `CONFIG_FILE_PATTERNS` are
+                loaded from the directory. Names found by pattern are sorted.
+            executor (Optional[concurrent.futures.Executor]): Executor used to
+                parse files. Any object with the `map` method can be used.
+                Files are parsed serially by default.
+
+        Raises:
+            ValueError: No config file was found or entry has different values
+                in more files.
+
+        """
+        filenames = self._find_config_files(filenames)
+        map_function = map if executor is None else executor.map
+        configs = list(map_function(_read_config_data, filenames))
+
+        config = self._merge_configs(filenames, configs)
+        self.raw_config = config
+        self.process_dict_like_config(config)
+        self.source_hash = self._get_sources_hash(filenames)
+
+    def load_config_file_into(self, instance, filename):
+        """Setup existing Acl instance directly from the config file.
+
+        The file is streamed twice. The first pass loads all sections except
+        rule sections and creates roles. The second pass creates rules one by
+        one and adds them to the instance, so rule definitions are never held
+        in memory. Rule types and evaluators are validated as rules are
+        created. Neither `rules` nor `raw_config` are filled.
+
+        Only the subset of the INI syntax produced by the `ConfigParser` is
+        supported: `key=value` and `key: value` entries (keys are lowercased),
+        indented continuation lines and `#` or `;` comments. The `DEFAULT`
+        section, interpolation and detection of duplicate keys are not
+        supported.
+
+        Args:
+            instance (easy_acl.acl.Acl): Instance to setup.
+            filename (str): Name of the file.
+
+        Raises:
+            ValueError: Config is invalid.
+            KeyError: Missig reference to evaluator type or rule type.
+
+        """
+        def is_rule_section(section):
+            return self.REGEXP_ROLE_RULE_SECTION.match(section) is not None
+
+        config = collections.OrderedDict()
+
+        with open(filename) as fileobj:
+            entries = self._iterate_config_entries(fileobj, is_rule_section)
+
+            for section, key, value in entries:
+                config.setdefault(section, collections.OrderedDict())[key] = value
+
+        self.process_dict_like_config(config)
+        self._create_roles(instance)
+
+        def is_not_rule_section(section):
+            return not is_rule_section(section)
+
+        with open(filename) as fileobj:
+            entries = self._iterate_config_entries(fileobj, is_not_rule_section)
+
+            for section, definition, value in entries:
+                role_name = self.REGEXP_ROLE_RULE_SECTION.match(section).group(1)
+                rule_type, eval_type = value.split(",")
+                rule_definition = RuleDefinition(definition, rule_type, eval_type)
+                rule = self._create_rule_from_definition(rule_definition)
+                instance.add_rule(role_name, rule)
+
+        self.source_hash = self._get_source_hash(filename)
+
+    def load_data_from_artifact(self, filename, source_hash=None):
+        """Load data from the artifact created by `save_artifact`.
+
+        Nothing is loaded if the artifact does not exist, is not readable or
+        is stale.
+
+        Args:
+            filename (str): Name of the artifact file.
+            source_hash (Optional[str]): Expected hash of the source config.
+                The hash is not checked if it is None.
+
+        Returns:
+            bool: True if data were loaded, False otherwise.
+
+        """
+        try:
+            with open(filename, "rb") as fileobj:
+                content = fileobj.read()
+        except (IOError, OSError):
+            return False
+
+        if not content.startswith(ARTIFACT_MAGIC):
+            return False
+
+        try:
+            data = marshal.loads(content[len(ARTIFACT_MAGIC):])
+            (version, python_version, artifact_hash, rule_factory_paths,
+             evaluator_paths, default_evaluator_name, role_definitions,
+             default_role_evaluators, rule_definitions) = data
+        except (EOFError, ValueError, TypeError):
+            return False
+
+        if version != ARTIFACT_VERSION or \
+                tuple(python_version) != tuple(sys.version_info[:2]):
+            return False
+
+        if source_hash is not None and artifact_hash != source_hash:
+            return False
+
+        self.setup_rule_types(dict(rule_factory_paths))
+        self.setup_evaluators_types(dict(evaluator_paths))
+
+        if default_evaluator_name is not None:
+            self.setup_global_settings({self.GLOBAL_EVALUATOR: default_evaluator_name})
+
+        # roles are stored already ordered by the inheritance
+        self.roles.extend(RoleDefinition(n, tuple(p)) for n, p in role_definitions)
+        self.default_role_evaluators.update(default_role_evaluators)
+
+        for role_name, definitions in rule_definitions:
+            self.rules[role_name].extend(RuleDefinition(*d) for d in definitions)
+
+        self.source_hash = artifact_hash
+        return True
+
+    def save_artifact(self, filename):
+        """Save loaded data into the artifact file.
+
+        The artifact contains references to the custom rule factories and
+        evaluators, roles ordered by their inheritance, default evaluators and
+        rule definitions. It is keyed by the hash of the source config, so the
+        config has to be loaded from file. The file is replaced atomically, so
+        concurrent readers never see partially written artifact.
+
+        Args:
+            filename (str): Name of the artifact file.
+
+        Raises:
+            ValueError: Cycle or missing link found in the roles.
+
+        """
+        role_lookup = {x.name: x for x in self.roles}
+        role_definitions = [(n, tuple(role_lookup[n].parents))
+                            for n in self._get_role_order()]
+
+        data = (
+            ARTIFACT_VERSION,
+            tuple(sys.version_info[:2]),
+            self.source_hash,
+            sorted(self.rule_factory_paths.items()),
+            sorted(self.evaluator_paths.items()),
+            self.default_evaluator_name,
+            role_definitions,
+            dict(self.default_role_evaluators),
+            [(k, [tuple(d) for d in v]) for k, v in self.rules.items()],
+        )
+        content = ARTIFACT_MAGIC + marshal.dumps(data)
+
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, temporary_filename = tempfile.mkstemp(dir=directory)
+
+        try:
+            with os.fdopen(fd, "wb") as fileobj:
+                fileobj.write(content)
+
+            getattr(os, "replace", os.rename)(temporary_filename, filename)
+        except BaseException:
+            os.remove(temporary_filename)
+            raise
+
     def process_dict_like_config(self, config):
         """Setup self from a dict like data.
 
@@ -126,6 +361,136 @@ class AclConfigurator(object):
         self._create_roles(instance)
         self._create_rules(instance)
 
+    def reload_config_file(self, instance, filename):
+        """Load the changed config file and apply only the changes.
+
+        See `update_instance`.
+
+        Args:
+            instance (easy_acl.acl.Acl): Instance set up by this configurator.
+            filename (str): Name of the file.
+
+        Returns:
+            ConfigDiff: Applied changes.
+
+        Raises:
+            ValueError: Config is invalid.
+            KeyError: Missig reference to evaluator type or rule type.
+
+        """
+        other = self.__class__()
+        other.role_klass = self.role_klass
+        other.load_data_from_config_file(filename)
+        return self.update_instance(instance, other)
+
+    def update_instance(self, instance, other):
+        """Change the instance set up by this configurator to the state of the
+        other configurator and take over its data.
+
+        Only differences are applied. New roles are added, changed roles (and
+        their descendants, which have to inherit from the new role instances)
+        are replaced and removed roles are removed. Removed rules are removed
+        and new rules are added. If the order of kept rules changed, all rules
+        of the role are replaced to keep precedence of rules with equal level.
+        Only cached decisions affected by the changes are invalidated.
+
+        The new config is validated before the instance is changed: roles are
+        ordered, evaluators and rule types are resolved and new rules are
+        created. Rules of roles which are not defined are refused. Rules and
+        roles added to the instance by other means are kept.
+
+        Args:
+            instance (easy_acl.acl.Acl): Instance set up by this configurator.
+            other (AclConfigurator): Configurator with the new config loaded.
+
+        Returns:
+            ConfigDiff: Applied changes.
+
+        Raises:
+            ValueError: Config is invalid or it has rules of unknown role.
+            KeyError: Missig reference to evaluator type or rule type.
+
+        """
+        old_roles = {x.name: x for x in self.roles}
+        new_roles = {x.name: x for x in other.roles}
+        new_order = other._get_role_order()
+
+        added_roles = [n for n in new_order if n not in old_roles]
+        changed_roles = [n for n in new_order if n in old_roles and
+                         self._get_role_signature(old_roles[n]) !=
+                         other._get_role_signature(new_roles[n])]
+        removed_roles = [n for n in reversed(self._get_role_order())
+                         if n not in new_roles]
+
+        # descendants of changed roles have to inherit from the new instances
+        replaced_roles = set(changed_roles)
+
+        for name in new_order:
+            if name in old_roles and replaced_roles.intersection(
+                    new_roles[name].parents):
+                replaced_roles.add(name)
+
+        unknown_roles = sorted(n for n, d in other.rules.items()
+                               if d and n not in new_roles)
+
+        if unknown_roles:
+            raise ValueError("Role '{}' does not exist".format(unknown_roles[0]))
+
+        # evaluators of created roles are resolved before the first change
+        for name in new_order:
+            if name not in old_roles or name in replaced_roles:
+                other._select_default_role_evaluator(new_roles[name])
+
+        rule_changes = []
+
+        for name in new_order:
+            removed, added = self._diff_role_rules(other, name)
+            rule_changes.append((name, removed, added, [
+                other._create_rule_from_definition(d) for d in added]))
+
+        for name in new_order:
+            if name not in old_roles:
+                instance.roles.add_role(other._create_role_from_definition(
+                    new_roles[name], instance.roles))
+            elif name in replaced_roles:
+                instance.replace_role(other._create_role_from_definition(
+                    new_roles[name], instance.roles))
+
+        rule_lists = instance.rules
+
+        for name, removed, _, added_rules in rule_changes:
+            if removed:
+                rule_list = rule_lists.get(instance.roles.get_role(name))
+
+            for key, _ in removed:
+                instance.remove_rule(name, self._find_rule(rule_list, name, key))
+
+            for rule in added_rules:
+                instance.add_rule(name, rule)
+
+        for name in removed_roles:
+            instance.remove_role(name)
+
+        self.role_klass = other.role_klass
+        self.rule_factories = other.rule_factories
+        self.evaluators_lookup = other.evaluators_lookup
+        self.roles = other.roles
+        self.default_role_evaluators = other.default_role_evaluators
+        self.rules = other.rules
+        self.raw_config = other.raw_config
+        self.rule_factory_paths = other.rule_factory_paths
+        self.evaluator_paths = other.evaluator_paths
+        self.default_evaluator_name = other.default_evaluator_name
+        self.source_hash = other.source_hash
+
+        if hasattr(other, "default_evaluator"):
+            self.default_evaluator = other.default_evaluator
+
+        return ConfigDiff(
+            added_roles, changed_roles, removed_roles,
+            [(n, d) for n, _, added, _ in rule_changes for d in added],
+            [(n, d) for n, removed, _, _ in rule_changes for _, d in removed])
+
     def setup_rule_types(self, config):
         """Setup rule types from config.
 
@@ -137,6 +502,7 @@ class AclConfigurator(object):
         """
         for k, v in config.items():
             self.rule_factories[k] = self._import_factory(v)
+            self.rule_factory_paths[k] = v
 
     def setup_evaluators_types(self, config):
         """Setup evaluators from config data.
@@ -149,6 +515,7 @@ class AclConfigurator(object):
         """
         for k, v in config.items():
             self.evaluators_lookup[k] = self._import_factory(v)
+            self.evaluator_paths[k] = v
 
     def setup_global_settings(self, config):
         """Setup global ACL settings from the config data.
@@ -161,6 +528,7 @@ class AclConfigurator(object):
 
         if default_evaluator_name is not None:
             self.default_evaluator = self.evaluators_lookup[default_evaluator_name]
+            self.default_evaluator_name = default_evaluator_name
 
     def setup_roles(self, config):
         """Setup role list from the config.
@@ -239,6 +607,174 @@ class AclConfigurator(object):
         package = importlib.import_module(factory_package)
         return getattr(package, factory_name)
 
+    def _find_config_files(self, filenames):
+        """Expand directory or glob pattern to the list of filenames.
+
+        Args:
+            filenames (Union[str, Iterable[str]]): Names of the files, glob
+                pattern or directory.
+
+        Returns:
+            List[str]: Names of the files.
+
+        Raises:
+            ValueError: No file was found.
+
+        """
+        if not isinstance(filenames, str):
+            result = list(filenames)
+        else:
+            if os.path.isdir(filenames):
+                patterns = [os.path.join(filenames, p)
+                            for p in self.CONFIG_FILE_PATTERNS]
+            else:
+                patterns = [filenames]
+
+            result = sorted(set(f for p in patterns for f in glob.glob(p)))
+
+        if not result:
+            raise ValueError("No config file found in '{}'".format(filenames))
+
+        return result
+
+    def _merge_configs(self, filenames, configs):
+        """Merge configs of more files.
+
+        Args:
+            filenames (List[str]): Names of the files.
+            configs (List[Dict[str, Dict[str, str]]]): Config data of the files.
+
+        Returns:
+            Dict[str, Dict[str, str]]: Merged config data.
+
+        Raises:
+            ValueError: Entry has different values in more files.
+
+        """
+        result = collections.OrderedDict()
+        # (section, key) -> filename where the entry was defined first
+        origins = {}
+
+        for filename, config in zip(filenames, configs):
+            for section, entries in config.items():
+                merged = result.setdefault(section, collections.OrderedDict())
+
+                for key, value in entries.items():
+                    if section == self.SECTION_ROLES:
+                        value = ",".join(p.strip() for p in value.split(","))
+
+                    if key not in merged:
+                        merged[key] = value
+                        origins[(section, key)] = filename
+                    elif merged[key] != value:
+                        raise ValueError(
+                            "Conflicting values of '{}' in section [{}]: '{}' "
+                            "in '{}' and '{}' in '{}'".format(
+                                key, section, merged[key],
+                                origins[(section, key)], value, filename))
+
+        return result
+
+    @staticmethod
+    def _iterate_config_entries(fileobj, skip_section):
+        """Iterate over entries of the INI file.
+
+        Args:
+            fileobj (Iterable[str]): Lines of the file.
+            skip_section (Callable[[str], bool]): Returns True for sections
+                which should be skipped.
+
+        Yields:
+            Tuple[str, str, str]: Section name, lowercased key and value.
+
+        Raises:
+            ValueError: Line can not be parsed.
+
+        """
+        section = None
+        skip = True
+        entry = None
+
+        for number, line in enumerate(fileobj, 1):
+            stripped = line.strip()
+
+            if not stripped or stripped[0] in "#;":
+                continue
+
+            if line[0].isspace() and entry is not None:
+                # continuation of the previous value
+                entry[2] = "\n".join([entry[2], stripped]).strip()
+                continue
+
+            if entry is not None:
+                yield tuple(entry)
+                entry = None
+
+            if stripped[0] == "[" and stripped[-1] == "]":
+                section = stripped[1:-1]
+                skip = skip_section(section)
+                continue
+
+            if section is None:
+                raise ValueError("Entry out of section on line {}".format(number))
+
+            if skip:
+                continue
+
+            positions = [p for p in (stripped.find("="), stripped.find(":"))
+                         if p > 0]
+
+            if not positions:
+                raise ValueError("Invalid entry on line {}".format(number))
+
+            position = min(positions)
+            key = stripped[:position].strip().lower()
+            entry = [section, key, stripped[position + 1:].strip()]
+
+        if entry is not None:
+            yield tuple(entry)
+
+    @staticmethod
+    def _get_source_hash(filename):
+        """Compute hash of the config file content.
+
+        Args:
+            filename (str): Name of the config file.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest.
+
+        Raises:
+            IOError: The file can not be read.
+
+        """
+        with open(filename, "rb") as fileobj:
+            return hashlib.sha256(fileobj.read()).hexdigest()
+
+    @classmethod
+    def _get_sources_hash(cls, filenames):
+        """Compute hash of content of more config files.
+
+        Files which can not be read are skipped as the config parser skips
+        them.
+
+        Args:
+            filenames (List[str]): Names of the config files in the merge order.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest.
+
+        """
+        digest = hashlib.sha256()
+
+        for filename in filenames:
+            try:
+                digest.update(cls._get_source_hash(filename).encode("ascii"))
+            except (IOError, OSError):
+                continue
+
+        return digest.hexdigest()
+
     @staticmethod
     def _read_config(filename):
         """Read config from the file.
@@ -349,71 +885,195 @@ class AclConfigurator(object):
     def _get_role_order(self):
         """Get role names ordered by their inheritance.
 
+        Every role is placed after all its parents. Roles are sorted
+        topologically in linear time; roles without dependencies between them
+        keep their definition order.
+
         Returns:
             List[str]: Role names.
 
         Raises:
-            ValueError: Cycle or missing link found in resolving process.
+            ValueError: Role defined more than once, cycle or missing link
+                found in resolving process.
 
         """
-        result = []
-        open_list = list(self.roles)
-        do_step = True
+        counts = collections.Counter(x.name for x in self.roles)
+        duplicates = sorted(n for n, c in counts.items() if c > 1)
+
+        if duplicates:
+            raise ValueError("Unable to resolve role dependency tree: roles {} "
+                             "are defined more than once"
+                             .format(", ".join("'{}'".format(n) for n in duplicates)))
+
+        names = set(counts)
+        children = collections.defaultdict(list)
+        unresolved_parents = {}
+
+        for item in self.roles:
+            for p in item.parents:
+                if p not in names:
+                    raise ValueError("Unable to resolve role dependency tree: "
+                                     "role '{}' has unknown parent '{}'"
+                                     .format(item.name, p))
+
+                children[p].append(item.name)
+
+            unresolved_parents[item.name] = len(item.parents)
 
-        while len(open_list) > 0 and do_step:
-            result, new_open = self._do_ordering_step(result, open_list)
-            do_step = open_list != new_open
-            open_list = new_open
+        result = [x.name for x in self.roles if not x.parents]
 
-        if len(open_list) > 0:
-            raise ValueError("Unable to resolve role dependency tree")
+        # the result list is the queue of resolved roles
+        for name in result:
+            for child in children[name]:
+                unresolved_parents[child] -= 1
+
+                if unresolved_parents[child] == 0:
+                    result.append(child)
+
+        if len(result) < len(self.roles):
+            cycle = self._find_role_cycle(names.difference(result))
+            raise ValueError("Unable to resolve role dependency tree: cycle "
+                             "found in roles {} (child -> parent)"
+                             .format(" -> ".join(cycle)))
 
         return result
 
-    def _do_ordering_step(self, known_order, open_list):
-        """Resolve roles with fulfilled dependencies.
+    def _find_role_cycle(self, unresolved_names):
+        """Find a cycle in the unresolved roles.
+
+        Each unresolved role has an unresolved parent, so walking over the
+        unresolved parents always ends in a cycle.
+
+        Args:
+            unresolved_names (Set[str]): Names of roles which were not ordered.
+
+        Returns:
+            List[str]: Role names in the cycle, each role is followed by its
+                parent. The first name is repeated at the end.
+
+        """
+        parents = {x.name: x.parents for x in self.roles}
+        name = min(unresolved_names)
+        path = []
+        positions = {}
+
+        while name not in positions:
+            positions[name] = len(path)
+            path.append(name)
+            name = next(p for p in parents[name] if p in unresolved_names)
+
+        return path[positions[name]:] + [name]
+
+    def _get_role_signature(self, role_definition):
+        """Get values of the role definition which are compared on reload.
+
+        Args:
+            role_definition (RoleDefinition): Role definition.
+
+        Returns:
+            Tuple[Tuple[str], Optional[Callable]]: Parent names and resolved
+                default evaluator.
+
+        Raises:
+            KeyError: Invalid default rule identifier.
+
+        """
+        return (tuple(role_definition.parents),
+                self._select_default_role_evaluator(role_definition))
+
+    def _get_rule_key(self, rule_definition):
+        """Get rule definition with resolved rule factory and evaluator.
+
+        Args:
+            rule_definition (RuleDefinition): Definition of the rule.
+
+        Returns:
+            Tuple[Callable, str, Callable]: Rule factory, definition and
+                evaluator.
+
+        Raises:
+            KeyError: Rule factory or evaluator was not found.
+
+        """
+        return (self.rule_factories[rule_definition.rule_type],
+                rule_definition.definition,
+                self.evaluators_lookup[rule_definition.evaluator_type])
 
-        Role with all parents in known_order list is marked as resolved.
+    def _diff_role_rules(self, other, role_name):
+        """Compare rules of the role with rules of the other configurator.
 
         Args:
-            known_order (List[str]): Roles with known order.
-            open_list (List[RoleDefinition]): List of role definitions waiting
-                to be resolved.
+            other (AclConfigurator): Configurator with the new config.
+            role_name (str): Name of the role.
 
         Returns:
-            Tuple[List[str], List[RoleDefinition]]: Items from known_order list
-                extended by items resolved in current step and values for next
-                step open_list.
+            Tuple[List[Tuple[Tuple[Callable, str, Callable], RuleDefinition]],
+                List[RuleDefinition]]: Keys and definitions of the removed
+                    rules and definitions of the added rules.
+
+        Raises:
+            KeyError: Rule factory or evaluator was not found.
 
         """
+        old_definitions = self.rules.get(role_name, [])
+        old_keys = [self._get_rule_key(d) for d in old_definitions]
+        new_definitions = other.rules.get(role_name, [])
+        new_keys = [other._get_rule_key(d) for d in new_definitions]
+
+        remaining = collections.Counter(new_keys)
+        kept = []
+        removed = []
+
+        for key, rule_definition in zip(old_keys, old_definitions):
+            if remaining[key] > 0:
+                remaining[key] -= 1
+                kept.append(key)
+            else:
+                removed.append((key, rule_definition))
 
-        result = list(known_order)
-        new_open = []
+        kept_counts = collections.Counter(kept)
+        added = []
+        added_keys = []
 
-        for item in open_list:
-            if self._is_all_parents_resolved(result, item.parents):
-                result.append(item.name)
+        for key, rule_definition in zip(new_keys, new_definitions):
+            if kept_counts[key] > 0:
+                kept_counts[key] -= 1
             else:
-                new_open.append(item)
+                added.append(rule_definition)
+                added_keys.append(key)
+
+        if kept + added_keys != new_keys:
+            # new rules are appended, so the order can not be kept otherwise
+            return list(zip(old_keys, old_definitions)), list(new_definitions)
 
-        return result, new_open
+        return removed, added
 
-    def _is_all_parents_resolved(self, known_order, parents):
-        """Test if all roles in parent list are in known_order list.
+    @staticmethod
+    def _find_rule(rule_list, role_name, key):
+        """Find the rule instance created by the rule key.
 
         Args:
-            known_order (List[str]): List of resolved role names.
-            parents (Tuple[str]): List of parents.
+            rule_list (Optional[easy_acl.rule.RuleList]): Rule list of the role.
+            role_name (str): Name of the role.
+            key (Tuple[Callable, str, Callable]): Key of the rule.
 
         Returns:
-            bool: True if all parents are in known_order list, False otherwise.
+            easy_acl.rule.AbstractRule: The rule.
+
+        Raises:
+            ValueError: The rule was not found.
 
         """
-        for p in parents:
-            if p not in known_order:
-                return False
+        factory, definition, evaluator = key
+        rules = rule_list.find_rules(definition) if rule_list is not None else ()
 
-        return True
+        for rule in rules:
+            if rule.evaluator is evaluator and \
+                    (not isinstance(factory, type) or type(rule) is factory):
+                return rule
+
+        raise ValueError("Rule '{}' of role '{}' was not found".format(definition,
+                                                                     role_name))
 
     def _create_rules(self, instance):
         """Create rules and write them into instance.
@@ -457,3 +1117,22 @@ class AclConfigurator(object):
         rule_factory = self.rule_factories[rule_definition.rule_type]
         evaluator = self.evaluators_lookup[rule_definition.evaluator_type]
         return rule_factory(rule_definition.definition, evaluator)
+
+
+def _read_config_data(filename):
+    """Read config file into plain data.
+
+    The function is defined on the module level, so it can be used by process
+    pools.
+
+    Args:
+        filename (str): Name of the file.
+
+    Returns:
+        Dict[str, Dict[str, str]]: Config data.
+
+    """
+    parser = AclConfigurator._read_config(filename)
+    return collections.OrderedDict(
+        (s, collections.OrderedDict(parser.items(s)))
+        for s in parser.sections())
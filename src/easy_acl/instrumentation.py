@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""Instrumentation of ACL queries.
+
+An instrument is set to `easy_acl.acl.Acl` by its `instrument` argument or
+attribute. When the instrument is set, each `Acl.is_allowed` call is measured
+and `QueryReport` is passed to the `on_query` method of the instrument. When no
+instrument is set, the query is not measured at all.
+
+The report contains time spent in each phase of the query:
+
+* role resolution - finding the role by its name
+* ancestor walk - collecting rules of the role's lineage and walking over it
+* rule matching - matching the resource against rules
+* evaluation - calling the evaluator of the best rule or the default evaluator
+
+Phase times of the cached queries are zero except the role resolution.
+
+The `MetricsCollector` instrument aggregates reports into counters and
+histograms, which can be exported to a metrics backend.
+
+Example
+-------
+
+collector = MetricsCollector()
+acl = Acl(instrument=collector)
+acl.is_allowed("user", "post.list")
+
+metrics = collector.export()
+
+"""
+
+from __future__ import absolute_import
+
+import bisect
+import collections
+import time
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+QueryReport = collections.namedtuple("QueryReport", [
+    "role_name",
+    "resource",
+    "is_allowed",
+    "cache_hit",
+    "total_time",
+    "role_resolution_time",
+    "ancestor_walk_time",
+    "rule_matching_time",
+    "evaluation_time",
+    "roles_visited",
+    "rules_tested",
+    "matched_rule",
+])
+
+DEFAULT_TIME_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3,
+    5e-3, 1e-2, 2.5e-2, 5e-2, 1e-1,
+)
+
+
+class AbstractInstrument(object):
+    """Base of the instruments.
+
+    Attributes:
+        timer (Callable[[], float]): Clock used to measure the query phases.
+
+    """
+
+    timer = staticmethod(getattr(time, "perf_counter", time.time))
+
+    def on_query(self, report):
+        """Process report of one query.
+
+        Args:
+            report (QueryReport): The report.
+
+        """
+        raise NotImplementedError()
+
+
+class Histogram(object):
+    """Histogram with fixed buckets.
+
+    Args:
+        buckets (Iterable[float]): Upper bounds of the buckets in ascending
+            order. The infinite bucket is added automatically.
+
+    Attributes:
+        buckets (Tuple[float]): Upper bounds of the buckets.
+        counts (List[int]): Count of values in each bucket (not cumulative).
+            The last item is the infinite bucket.
+        count (int): Count of all values.
+        sum (float): Sum of all values.
+
+    """
+
+    def __init__(self, buckets=DEFAULT_TIME_BUCKETS):
+        self.__buckets = tuple(buckets)
+        self.counts = [0] * (len(self.__buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    @property
+    def buckets(self):
+        return self.__buckets
+
+    def observe(self, value):
+        """Add value to the histogram.
+
+        Args:
+            value (float): The value.
+
+        """
+        self.counts[bisect.bisect_left(self.__buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def export(self):
+        """Export the histogram with cumulative buckets.
+
+        Returns:
+            Dict[str, Any]: Cumulative counts by upper bound (the last one is
+                "+Inf"), count and sum of values.
+
+        """
+        cumulative = []
+        total = 0
+
+        for bound, count in zip(self.__buckets + ("+Inf", ), self.counts):
+            total += count
+            cumulative.append([bound, total])
+
+        return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+
+class MetricsCollector(AbstractInstrument):
+    """Instrument aggregating query reports.
+
+    Counters and histograms are not synchronized. Use one collector per thread
+    or accept approximate values in multithreaded applications.
+
+    Args:
+        buckets (Iterable[float]): Upper bounds of the time histogram buckets.
+
+    Attributes:
+        counters (Dict[str, int]): Counters of queries, cache hits and misses,
+            allowed queries, visited roles and tested rules.
+        histograms (Dict[str, Histogram]): Histograms of the total time and
+            times of the phases.
+
+    """
+
+    COUNTERS = ("queries", "cache_hits", "cache_misses", "allowed",
+                "roles_visited", "rules_tested")
+    HISTOGRAMS = ("total_time", "role_resolution_time", "ancestor_walk_time",
+                  "rule_matching_time", "evaluation_time")
+
+    def __init__(self, buckets=DEFAULT_TIME_BUCKETS):
+        self.__buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self):
+        """Reset all counters and histograms.
+
+        """
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.histograms = {n: Histogram(self.__buckets) for n in self.HISTOGRAMS}
+
+    def on_query(self, report):
+        counters = self.counters
+        counters["queries"] += 1
+        counters["allowed"] += report.is_allowed
+        counters["roles_visited"] += report.roles_visited
+        counters["rules_tested"] += report.rules_tested
+
+        if report.cache_hit:
+            counters["cache_hits"] += 1
+        else:
+            counters["cache_misses"] += 1
+
+        histograms = self.histograms
+        histograms["total_time"].observe(report.total_time)
+        histograms["role_resolution_time"].observe(report.role_resolution_time)
+
+        if not report.cache_hit:
+            histograms["ancestor_walk_time"].observe(report.ancestor_walk_time)
+            histograms["rule_matching_time"].observe(report.rule_matching_time)
+            histograms["evaluation_time"].observe(report.evaluation_time)
+
+    def export(self):
+        """Export the metrics.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Counters and exported histograms.
+
+        """
+        return {
+            "counters": dict(self.counters),
+            "histograms": {k: v.export() for k, v in self.histograms.items()},
+        }
@@ -6,6 +6,9 @@ by additional properties. All properties of role should be immutable. Each role
 can has none, one or more parents. When access permission is evaluated and there
 is no specific rule of ACL query, parents are evaluated in order of parents sequence.
 
+The `Role` has `__slots__`, so subclasses not declaring own `__slots__` get the
+instance `__dict__` back.
+
 If no matching rule is found for ACL query, role can has default evaluator. This
 default evaluator is used when no matching rule is found.
 
@@ -54,9 +57,15 @@ class Role(object):
         parents (Tuple[Role]): Parent roles.
         default_evaluator (Optional[Callable[[Role, str, int,
             easy_acl.rule.AbstractRule], bool]]): Default permission resolver.
+        lineage (Tuple[Role]): The role followed by all its ancestors without
+            duplicates. Ancestors are ordered breadth-first by the order of
+            parents, which is the order they are searched for rules in.
 
     """
 
+    __slots__ = ("__name", "__parents", "__default_evaluator", "__lineage",
+                 "__weakref__")
+
     def __init__(self, name, parents=None, default_evaluator=None):
         if parents is None:
             parents = []
@@ -64,6 +73,7 @@ class Role(object):
         self.__name = name
         self.__parents = tuple(parents)
         self.__default_evaluator = default_evaluator
+        self.__lineage = None
 
     @property
     def name(self):
@@ -77,16 +87,52 @@ class Role(object):
     def default_evaluator(self):
         return self.__default_evaluator
 
+    @property
+    def lineage(self):
+        # parents are immutable so the lineage is computed only once
+        if self.__lineage is None:
+            self.__lineage = self._create_lineage()
+
+        return self.__lineage
+
+    def _create_lineage(self):
+        """Walk the role's ancestors breadth-first.
+
+        Each role is visited only once, even if it is reachable by more paths.
+
+        Returns:
+            Tuple[Role]: The role and its ancestors.
+
+        """
+        lineage = [self]
+        visited = {self}
+        index = 0
+
+        while index < len(lineage):
+            for parent in lineage[index].parents:
+                if parent not in visited:
+                    visited.add(parent)
+                    lineage.append(parent)
+
+            index += 1
+
+        return tuple(lineage)
+
 
 class RoleManager(object):
     """Container for roles.
 
-    Each role must have unique name.
+    Each role must have unique name. Roles are indexed by their names so lookup
+    by name is done in constant time. Registered instances are kept in a set
+    so checking a role instance does not need its name.
 
     """
 
     def __init__(self):
         self._roles = []
+        self._roles_by_name = {}
+        self._registered = set()
+        self._children_by_name = {}
 
     def add_role(self, role):
         """Add existing role instance.
@@ -100,6 +146,56 @@ class RoleManager(object):
         """
         self._assert_name_not_exists(role.name)
         self._roles.append(role)
+        self._roles_by_name[role.name] = role
+        self._registered.add(role)
+
+        for parent in role.parents:
+            self._children_by_name.setdefault(parent.name, []).append(role)
+
+    def replace_role(self, role):
+        """Replace the role with the same name by the new role instance.
+
+        Roles inheriting from the replaced role still reference the old
+        instance and have to be replaced too to inherit from the new one.
+
+        Args:
+            role (Role): New role instance.
+
+        Raises:
+            ValueError: Role with the name does not exist.
+
+        """
+        old_role = self.get_role(role.name)
+        self._roles[self._roles.index(old_role)] = role
+        self._roles_by_name[role.name] = role
+        self._registered.discard(old_role)
+        self._registered.add(role)
+        self._forget_child(old_role)
+
+        for parent in role.parents:
+            self._children_by_name.setdefault(parent.name, []).append(role)
+
+    def remove_role(self, name):
+        """Remove the role.
+
+        Args:
+            name (str): Name of the role.
+
+        Raises:
+            ValueError: Role with the name does not exist or another role
+                inherits from it.
+
+        """
+        role = self.get_role(name)
+
+        if self._children_by_name.get(name):
+            raise ValueError("Role '{}' has child roles".format(name))
+
+        self._roles.remove(role)
+        del self._roles_by_name[name]
+        self._registered.discard(role)
+        self._children_by_name.pop(name, None)
+        self._forget_child(role)
 
     def create_role(self, name, parent_names=None, default_evaluator=None):
         """Create new role instance, add it to container and return it
@@ -150,12 +246,60 @@ class RoleManager(object):
             ValueError: Role with name does not exists.
 
         """
-        roles = list(filter(lambda r: r.name == name, self._roles))
-
-        if len(roles) != 1:
+        try:
+            return self._roles_by_name[name]
+        except KeyError:
             raise ValueError("Role '{}' does not exist".format(name))
 
-        return roles[0]
+    def is_registered(self, role):
+        """Check the role instance is the one stored in the container.
+
+        Args:
+            role (Role): Role instance.
+
+        Returns:
+            bool: True if the instance is registered, a replaced or removed
+                instance or another instance with the same name is not.
+
+        """
+        return role in self._registered
+
+    def get_descendants(self, name):
+        """Get all roles inheriting from the role (directly or indirectly).
+
+        Args:
+            name (str): Name of the role.
+
+        Returns:
+            List[Role]: Descendant roles, each role only once.
+
+        """
+        descendants = []
+        visited = set()
+        open_list = [name]
+
+        while open_list:
+            current_name = open_list.pop()
+
+            for child in self._children_by_name.get(current_name, ()):
+                if child.name not in visited:
+                    visited.add(child.name)
+                    descendants.append(child)
+                    open_list.append(child.name)
+
+        return descendants
+
+    def _forget_child(self, role):
+        """Remove the role from children of its parents.
+
+        Args:
+            role (Role): The child role.
+
+        """
+        for parent in role.parents:
+            children = self._children_by_name.get(parent.name, [])
+            self._children_by_name[parent.name] = [c for c in children
+                                                   if c is not role]
 
     def _assert_name_not_exists(self, name):
         """Raise exception if role with name exists.
@@ -167,4 +311,4 @@ class RoleManager(object):
             AssertionError: Role with name exists.
 
         """
-        assert len(list(filter(lambda r: r.name == name, self._roles))) == 0
+        assert name not in self._roles_by_name
@@ -10,44 +10,341 @@ Result of a rule is `Result` instance (named tuple) with two attributes:
 2. int `level` - match level is used as reversed priority (smaller number is more
     importand) when there are more than one matching rule.
 
+Rules are matched by the `try_match` method returning the match level or None
+if the resource does not match. Custom rules implementing only the older
+`_match_resource` method (raising ValueError if the resource does not match)
+are adapted by the `AbstractRule.try_match` default implementation. Custom
+rules overriding the public `resolve` method are always resolved by it.
+
+Built-in rules have `__slots__` and their definitions and definition parts are
+interned, so large rule sets share the strings. Custom rules not declaring own
+`__slots__` get the instance `__dict__` as usual.
+
 """
 
 from __future__ import absolute_import
 
+import array
+import bisect
 import collections
 import operator
+import sys
+import threading
+import weakref
+
+try:
+    _intern = sys.intern
+except AttributeError:
+    # the python 2 fix
+    _intern = intern
 
 __copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
 
 
 Result = collections.namedtuple("Result", ["is_allowed", "level"])
 
+# the best matching rule found without evaluation; the result is set only for
+# rules which can not be matched without evaluation
+Match = collections.namedtuple("Match", ["level", "rule", "result"])
+
+INDEX_EXACT = "exact"
+INDEX_PREFIX = "prefix"
+
+
+# (rule type, base class) -> True if the rule type matches same way as the base
+_matching_of_cache = {}
+
+# rule type -> True if the rule can be matched without evaluation
+_matchable_cache = {}
+
+
+def try_resolve(rule, role, resource, parts=None):
+    """Resolve any rule without raising exception if the rule does not match.
+
+    Rules not derived from `AbstractRule` and rules overriding the
+    `AbstractRule.resolve` method are resolved by their `resolve` method.
+
+    Args:
+        rule (Any): The rule.
+        role (easy_acl.role.Role): Role instance.
+        resource (str): Resource name.
+        parts (Optional[Tuple[str]]): The resource already split to parts.
+
+    Returns:
+        Optional[Result]: Result or None if rule does not match.
+
+    """
+    if is_matchable(rule):
+        return rule.try_resolve(role, resource, parts)
+
+    try:
+        return rule.resolve(role, resource)
+    except ValueError:
+        return None
+
+
+def is_matchable(rule):
+    """Test if the rule can be matched by `try_match` without evaluation.
+
+    Only `AbstractRule` instances resolved by the `AbstractRule.resolve` method
+    are matchable. Other rules have to be resolved by their `resolve` method.
+
+    Args:
+        rule (Any): The rule.
+
+    Returns:
+        bool: True if the rule is matchable.
+
+    """
+    rule_type = type(rule)
+
+    try:
+        return _matchable_cache[rule_type]
+    except KeyError:
+        pass
+
+    result = (
+        issubclass(rule_type, AbstractRule) and
+        rule_type.resolve == AbstractRule.resolve and
+        rule_type.try_resolve == AbstractRule.try_resolve)
+
+    _matchable_cache[rule_type] = result
+    return result
+
+
+def discard_result(result):
+    """Release the result of a rule which lost on precedence.
+
+    Async evaluators return coroutines. The coroutine of the discarded result
+    is closed, so it is not reported as never awaited.
+
+    Args:
+        result (Optional[Result]): The result or None.
+
+    """
+    close = getattr(getattr(result, "is_allowed", None), "close", None)
+
+    if close is not None:
+        close()
+
+
+def _get_definition(rule):
+    """Get definition of any rule.
+
+    Args:
+        rule (Any): The rule.
+
+    Returns:
+        Hashable: Definition of the rule or None if the rule has no definition.
+
+    """
+    return getattr(rule, "definition", None)
+
+
+def get_index_key(rule):
+    """Get index key of any rule.
+
+    Args:
+        rule (Any): The rule.
+
+    Returns:
+        Optional[Tuple[str, Union[str, Tuple[str]]]]: Index key of the rule or
+            None if the rule is not matchable or can not be indexed.
+
+    """
+    if is_matchable(rule):
+        return rule.get_index_key()
+    else:
+        return None
+
 
 class RuleList(object):
+    """Plain list of rules.
+
+    Every rule is tested against the resource on each query.
+
+    Rules are located by their definitions through an index of positions, so
+    removal and replacement do not scan the list. Removed rules leave holes
+    which are skipped by queries. Holes are dropped when they are more than
+    half of the list.
+
+    Attributes:
+        rules (List[AbstractRule]): Stored rules. Rules can be appended to the
+            list directly. While there are holes after removed rules, a new
+            list without the holes is returned instead.
+
+    """
 
     def __init__(self):
         self.__rules = []
+        self.__holes = 0
+        # definition -> ascending positions of the rules
+        self.__positions = {}
+        self.__positions_count = 0
 
     @property
     def rules(self):
+        if self.__holes:
+            return [r for r in self.__rules if r is not None]
+
         return self.__rules
 
-    def get_best_result(self, role, resource):
+    def add_rule(self, rule):
+        """Append the rule to the list.
+
+        Args:
+            rule (AbstractRule): Rule to add.
+
+        """
+        self.__rules.append(rule)
+
+    def find_rules(self, definition):
+        """Find rules by their definition.
+
+        Args:
+            definition (str): Definition of the rules.
+
+        Returns:
+            List[AbstractRule]: Rules with the definition in the list order.
+
+        """
+        return [self.__rules[p] for p in self._get_positions(definition)]
+
+    def remove_rule(self, rule):
+        """Remove the rule instance or all rules with the definition.
+
+        Args:
+            rule (Union[AbstractRule, str]): Rule instance or definition of
+                rules to remove.
+
+        Returns:
+            List[AbstractRule]: Removed rules.
+
+        Raises:
+            ValueError: No rule was found.
+
+        """
+        positions = self._find_positions(rule)
+        removed = [self.__rules[p] for p in positions]
+
+        for position, r in zip(positions, removed):
+            self.__rules[position] = None
+            self._get_positions(_get_definition(r)).remove(position)
+            self._on_rule_removed(position, r)
+
+        self.__holes += len(positions)
+
+        if self.__holes * 2 > len(self.__rules):
+            self._compact()
+
+        return removed
+
+    def replace_rule(self, rule, new_rule):
+        """Replace the rule by the new rule on the same position.
+
+        The new rule keeps the precedence of the replaced rule among rules with
+        equal level.
+
+        Args:
+            rule (Union[AbstractRule, str]): Rule instance or definition of the
+                rule to replace.
+            new_rule (AbstractRule): The new rule.
+
+        Returns:
+            AbstractRule: The replaced rule.
+
+        Raises:
+            ValueError: No rule or more rules were found.
+
+        """
+        positions = self._find_positions(rule)
+
+        if len(positions) > 1:
+            raise ValueError("More rules with definition '{}' found"
+                             .format(rule))
+
+        position = positions[0]
+        old_rule = self.__rules[position]
+        self.__rules[position] = new_rule
+        self._get_positions(_get_definition(old_rule)).remove(position)
+        bisect.insort(self.__positions.setdefault(_get_definition(new_rule), []),
+                      position)
+        self._on_rule_replaced(position, old_rule, new_rule)
+
+        return old_rule
+
+    def get_best_result(self, role, resource, parts=None):
         """Return the best matching result or None, if no matching result was
         found.
 
         Args:
             role (easy_acl.role.Role): Role.
             resource (str): Resource to match.
+            parts (Optional[Tuple[str]]): The resource already split by
+                `AbstractRule.split_resource_to_parts`.
 
         Returns:
             Optional[Result]: The best matching result or None if no result match.
 
         """
-        matching_results = self._get_matching_result_candidates(role, resource)
+        matching_results = self._get_matching_result_candidates(role, resource,
+                                                                parts)
         return self._get_best_result(matching_results)
 
-    def _get_matching_result_candidates(self, role, resource):
+    def find_best_match(self, role, resource, parts=None):
+        """Find the best matching rule without evaluating it.
+
+        Args:
+            role (easy_acl.role.Role): Role.
+            resource (str): Resource to match.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
+
+        Returns:
+            Tuple[Optional[Match], int]: The best match or None if no rule
+                matches and count of tested rules.
+
+        """
+        best = None
+        tested = 0
+
+        for r in self.__rules:
+            if r is None:
+                # removed rule
+                continue
+
+            tested += 1
+
+            if is_matchable(r):
+                level = r.try_match(resource, parts)
+                result = None
+
+                if level is None:
+                    # rule does not match
+                    continue
+            else:
+                result = try_resolve(r, role, resource, parts)
+
+                if result is None:
+                    # rule does not match
+                    continue
+
+                level = result.level
+
+            if best is None or level < best.level:
+                if best is not None:
+                    discard_result(best.result)
+
+                best = Match(level, r, result)
+            else:
+                discard_result(result)
+
+            if level == 0:
+                # exact match - nothing better can be found
+                break
+
+        return best, tested
+
+    def _get_matching_result_candidates(self, role, resource, parts=None):
         """Find candidates for the best result.
 
         Return list of candidates. If there is some result with level equal to
@@ -56,6 +353,7 @@ class RuleList(object):
         Args:
             role (easy_acl.role.Role): Role instance.
             resource (str): Resource name to test against.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
 
         Returns:
             List[Result]: List of matching results.
@@ -64,9 +362,13 @@ class RuleList(object):
         matching_results = []
 
         for r in self.__rules:
-            try:
-                result = r.resolve(role, resource)
-            except ValueError:
+            if r is None:
+                # removed rule
+                continue
+
+            result = try_resolve(r, role, resource, parts)
+
+            if result is None:
                 # rule does not match
                 continue
 
@@ -78,6 +380,99 @@ class RuleList(object):
 
         return matching_results
 
+    def _get_rule_slots(self):
+        """Get the stored rules with holes after removed rules.
+
+        Returns:
+            List[Optional[AbstractRule]]: Rules by their positions, None for
+                removed rules.
+
+        """
+        return self.__rules
+
+    def _find_positions(self, rule):
+        """Find positions of the rule instance or rules with the definition.
+
+        Args:
+            rule (Union[AbstractRule, str]): Rule instance or definition.
+
+        Returns:
+            List[int]: Positions of the rules.
+
+        Raises:
+            ValueError: No rule was found.
+
+        """
+        if isinstance(rule, str):
+            positions = list(self._get_positions(rule))
+        else:
+            positions = [p for p in self._get_positions(_get_definition(rule))
+                         if self.__rules[p] is rule]
+
+        if not positions:
+            raise ValueError("Rule '{}' is not in the list".format(
+                rule if isinstance(rule, str) else _get_definition(rule)))
+
+        return positions
+
+    def _get_positions(self, definition):
+        """Get positions of rules with the definition.
+
+        Rules appended directly into the `rules` list are indexed first.
+
+        Args:
+            definition (str): Definition of the rules.
+
+        Returns:
+            List[int]: Positions of the rules (the index list itself).
+
+        """
+        rules = self.__rules
+
+        if len(rules) < self.__positions_count:
+            # rules were removed from the list directly - rebuild the index
+            self.__positions = {}
+            self.__positions_count = 0
+
+        for position in range(self.__positions_count, len(rules)):
+            if rules[position] is not None:
+                self.__positions.setdefault(_get_definition(rules[position]),
+                                            []).append(position)
+
+        self.__positions_count = len(rules)
+        return self.__positions.get(definition, [])
+
+    def _compact(self):
+        """Drop holes after removed rules.
+
+        Positions of rules are changed, so the index of positions is rebuilt
+        on the next use.
+
+        """
+        self.__rules[:] = [r for r in self.__rules if r is not None]
+        self.__holes = 0
+        self.__positions = {}
+        self.__positions_count = 0
+
+    def _on_rule_removed(self, position, rule):
+        """Called when the rule is removed.
+
+        Args:
+            position (int): Position of the removed rule.
+            rule (AbstractRule): The removed rule.
+
+        """
+
+    def _on_rule_replaced(self, position, old_rule, new_rule):
+        """Called when the rule is replaced.
+
+        Args:
+            position (int): Position of the rule.
+            old_rule (AbstractRule): The replaced rule.
+            new_rule (AbstractRule): The new rule.
+
+        """
+
     def _get_best_result(self, results):
         """Get the best result.
 
@@ -99,126 +494,497 @@ class RuleList(object):
             return None
 
 
-class AbstractRule(object):
-    """Abstract base for all rules.
+class IndexedRuleList(RuleList):
+    """Rule list with an index of the built-in rules.
 
-    Args:
-        defintion (str): Definition of the rule.
-        evaluator (Callable[[easy_acl.role.Role, str, int, AbstractRule], bool]):
-            evaluator of the rule.
+    Rules matching by the `Simple` semantics are stored in a hash map keyed by
+    definition. Rules matching by the `WildcardEnding` semantics with wildcard
+    are stored in a prefix trie keyed by the definition parts. A lookup touches
+    only the rules which can match the resource. Any other rule is tested
+    linearly like in the `RuleList`.
 
-    Attributes:
-        defintion (str): Definition of the rule.
-        evaluator (Callable[[easy_acl.role.Role, str, int, AbstractRule], bool]):
-            evaluator of the rule.
+    The result is same as the result of the `RuleList`: the rule with the
+    lowest level wins and the first added rule wins if levels are equal.
+
+    Rules appended directly into the `rules` list are indexed on the next query.
 
     """
 
-    RESOURCE_PART_DELIMITER = "."
-    WILDCARD = "*"
-    ESCAPE = "\\"
+    def __init__(self):
+        super(IndexedRuleList, self).__init__()
+        self._reset_index()
 
-    def __init__(self, definition, evaluator):
-        self.__definition = definition
-        self.__evaluator = evaluator
-        self._setup()
+    def _get_matching_result_candidates(self, role, resource, parts=None):
+        """Find the best result by the index.
 
-    @property
-    def definition(self):
-        return self.__definition
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource name to test against.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
 
-    @property
-    def evaluator(self):
-        return self.__evaluator
+        Returns:
+            List[Result]: List with the best result or empty list.
 
-    @classmethod
-    def split_resource_to_parts(cls, resource_name):
-        """Split resource name to the parts.
+        """
+        match, _ = self.find_best_match(role, resource, parts)
+
+        if match is None:
+            return []
+        elif match.result is not None:
+            return [match.result]
+        else:
+            is_allowed = match.rule.evaluate(role, resource, match.level)
+            return [Result(is_allowed, match.level)]
+
+    def find_best_match(self, role, resource, parts=None):
+        """Find the best matching rule by the index without evaluating it.
+
+        Lookup in the index is counted as one tested rule.
 
         Args:
-            resource_name (str): Resource name to split.
+            role (easy_acl.role.Role): Role.
+            resource (str): Resource to match.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
 
         Returns:
-            Tuple[str]: Resource parts.
+            Tuple[Optional[Match], int]: The best match or None if no rule
+                matches and count of tested rules.
 
         """
-        return tuple(resource_name.split(cls.RESOURCE_PART_DELIMITER))
+        self._update_index()
 
-    def resolve(self, role, resource):
-        """Try to resolve rule against resource.
+        # candidate is (level, sequence number, rule, result)
+        best = self._find_indexed_candidate(resource, parts)
+        tested = 0 if best is None else 1
 
-        Args:
-            role (easy_acl.role.Role): Role instance.
-            resource (str): Resource.
+        for seq, rule in self.__fallback:
+            if best is not None and best[1] < seq and best[0] == 0:
+                # nothing better can be found
+                break
 
-        Raises:
-            ValueError: Resource is not matching to rule.
+            tested += 1
 
-        """
-        match_level = self._match_resource(resource)
-        is_allowed = self._evaluate(role, resource, match_level)
-        return Result(is_allowed, match_level)
+            if is_matchable(rule):
+                # match only, the best rule is evaluated later
+                level = rule.try_match(resource, parts)
+                result = None
+            else:
+                result = try_resolve(rule, role, resource, parts)
+                level = None if result is None else result.level
 
-    def _match_resource(self, resource):
-        """Match resource against the rule.
+            if level is None:
+                # rule does not match
+                continue
 
-        Args:
-            resource (str): Input resource.
+            if best is None or (level, seq) < best[:2]:
+                if best is not None:
+                    discard_result(best[3])
 
-        Returns:
-            int: Match level.
+                best = (level, seq, rule, result)
+            else:
+                discard_result(result)
 
-        Raises:
-            ValueError: Resource is not match.
+        if best is None:
+            return None, tested
 
-        """
-        raise NotImplementedError()
+        return Match(best[0], best[2], best[3]), tested
 
-    def _evaluate(self, role, resource, match_level):
-        """Evaluate resource access.
+    def _find_indexed_candidate(self, resource, parts=None):
+        """Find the best candidate in the indexed rules.
 
         Args:
-            role (easy_acl.role.Role): Role instance.
-            resource (str): Tested resource.
-            match_level (int): Match level.
+            resource (str): Resource name.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
 
         Returns:
-            bool: True if resource is allowed, False otherwise.
+            Optional[Tuple[int, int, AbstractRule, None]]: Level, sequence
+                number and the rule or None if no indexed rule match.
 
         """
-        return self.__evaluator(role, resource, match_level, self)
+        exact = self.__exact.get(resource)
 
-    def _setup(self):
-        """Setup the instance.
+        if exact:
+            seq, rule = exact[0]
+            return (0, seq, rule, None)
 
-        """
-        pass
+        if parts is None:
+            parts = AbstractRule.split_resource_to_parts(resource)
 
+        parts_count = len(parts)
+        node = self.__trie
+        best = None
 
-class Simple(AbstractRule):
-    """Simple rule matches resource strictly against rule defintion by `==`
-    operator.
+        for depth, part in enumerate(parts):
+            if node.rules:
+                best = (parts_count - depth, ) + node.rules[0] + (None, )
 
-    No wildcards are supported (any wildcard is interpreted as part of the
-    resource name). Result of the `_match_resource` method is always 0 (zero)
-    or raise ValueError.
+            node = node.children.get(part)
 
-    Example:
-        ...
-        rule = Simple('my-resource', some_evaluator)
+            if node is None:
+                break
 
-        r = rule.resolve(some_role, 'my-resource')
-        # the `r` contains result with level=0
+        return best
 
-        x = rule.resolve(some_role, 'other-resource')
-        # raise ValueError
+    def _update_index(self):
+        """Index rules which were added since the last query.
 
-    """
+        """
+        rules = self._get_rule_slots()
 
-    def _match_resource(self, resource):
-        """Match resource to definition by `==` operator.
+        if len(rules) < self.__indexed_count:
+            # rules were removed from the list - rebuild whole index
+            self._reset_index()
 
-        Args:
+        for seq in range(self.__indexed_count, len(rules)):
+            if rules[seq] is not None:
+                self._index_rule(seq, rules[seq])
+
+        self.__indexed_count = len(rules)
+
+    def _reset_index(self):
+        """Drop the index, it is rebuilt on the next query.
+
+        """
+        self.__indexed_count = 0
+        self.__exact = {}
+        self.__trie = _TrieNode()
+        self.__fallback = []
+
+    def _compact(self):
+        super(IndexedRuleList, self)._compact()
+        self._reset_index()
+
+    def _on_rule_removed(self, position, rule):
+        if position < self.__indexed_count:
+            self._get_index_entries(rule, create=False).remove((position, rule))
+
+    def _on_rule_replaced(self, position, old_rule, new_rule):
+        if position < self.__indexed_count:
+            self._get_index_entries(old_rule, create=False).remove(
+                (position, old_rule))
+            self._index_rule(position, new_rule)
+
+    def _index_rule(self, seq, rule):
+        """Put one rule into the index.
+
+        Entries are kept ordered by the sequence number, so the first entry is
+        the first added rule.
+
+        Args:
+            seq (int): Position of the rule in the rule list.
+            rule (AbstractRule): The rule.
+
+        """
+        entries = self._get_index_entries(rule)
+
+        if not entries or entries[-1][0] < seq:
+            entries.append((seq, rule))
+        else:
+            # the replaced rule is put back on its position
+            position = bisect.bisect_left([e[0] for e in entries], seq)
+            entries.insert(position, (seq, rule))
+
+    def _get_index_entries(self, rule, create=True):
+        """Get list of index entries where the rule belongs.
+
+        Args:
+            rule (AbstractRule): The rule.
+            create (bool): Create missing trie nodes and lists.
+
+        Returns:
+            List[Tuple[int, AbstractRule]]: Entries of the exact map, trie node
+                or fallback list.
+
+        """
+        index_key = get_index_key(rule)
+
+        if index_key is None:
+            return self.__fallback
+        elif index_key[0] == INDEX_PREFIX:
+            node = self.__trie
+
+            for part in index_key[1]:
+                node = node.children.setdefault(part, _TrieNode()) if create \
+                    else node.children[part]
+
+            return node.rules
+        elif create:
+            return self.__exact.setdefault(index_key[1], [])
+        else:
+            return self.__exact[index_key[1]]
+
+
+class _TrieNode(object):
+    """Node of the prefix trie used by `IndexedRuleList`.
+
+    Attributes:
+        children (Dict[str, _TrieNode]): Child nodes by resource part.
+        rules (List[Tuple[int, AbstractRule]]): Wildcard rules ending in this
+            node with their sequence numbers.
+
+    """
+
+    __slots__ = ("children", "rules")
+
+    def __init__(self):
+        self.children = {}
+        self.rules = []
+
+
+class AbstractRule(object):
+    """Abstract base for all rules.
+
+    Args:
+        defintion (str): Definition of the rule.
+        evaluator (Callable[[easy_acl.role.Role, str, int, AbstractRule], bool]):
+            evaluator of the rule.
+
+    Attributes:
+        defintion (str): Definition of the rule.
+        evaluator (Callable[[easy_acl.role.Role, str, int, AbstractRule], bool]):
+            evaluator of the rule.
+
+    """
+
+    RESOURCE_PART_DELIMITER = "."
+    WILDCARD = "*"
+    ESCAPE = "\\"
+
+    __slots__ = ("__definition", "__evaluator", "__weakref__")
+
+    def __init__(self, definition, evaluator):
+        if type(definition) is str:
+            definition = _intern(definition)
+
+        self.__definition = definition
+        self.__evaluator = evaluator
+        self._setup()
+
+    @property
+    def definition(self):
+        return self.__definition
+
+    @property
+    def evaluator(self):
+        return self.__evaluator
+
+    @classmethod
+    def split_resource_to_parts(cls, resource_name):
+        """Split resource name to the parts.
+
+        Args:
+            resource_name (str): Resource name to split.
+
+        Returns:
+            Tuple[str]: Resource parts.
+
+        """
+        return tuple(resource_name.split(cls.RESOURCE_PART_DELIMITER))
+
+    def get_index_key(self):
+        """Get key the rule can be found by in rule indexes.
+
+        The key is tuple of the index type and value:
+
+        * `(INDEX_EXACT, resource)` - rule matches exactly one resource with
+            level 0 (zero)
+        * `(INDEX_PREFIX, parts)` - rule matches any resource starting with
+            the parts and having at least one part more. The match level is
+            count of the remaining parts.
+
+        Rules matching by other way has no index key and they are tested one by
+        one.
+
+        Returns:
+            Optional[Tuple[str, Union[str, Tuple[str]]]]: The key or None.
+
+        """
+        return None
+
+    def resolve(self, role, resource, parts=None):
+        """Try to resolve rule against resource.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource.
+            parts (Optional[Tuple[str]]): The resource already split by
+                `AbstractRule.split_resource_to_parts`. Rules can use it to
+                avoid splitting the resource again.
+
+        Raises:
+            ValueError: Resource is not matching to rule.
+
+        """
+        if parts is None:
+            match_level = self._match_resource(resource)
+        else:
+            match_level = self._match_resource_parts(resource, parts)
+
+        is_allowed = self._evaluate(role, resource, match_level)
+        return Result(is_allowed, match_level)
+
+    def evaluate(self, role, resource, match_level):
+        """Evaluate access to the resource already matched by the rule.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource.
+            match_level (int): Match level.
+
+        Returns:
+            bool: True if resource is allowed, False otherwise.
+
+        """
+        return self._evaluate(role, resource, match_level)
+
+    def try_resolve(self, role, resource, parts=None):
+        """Try to resolve rule against resource without raising exception.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Resource.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
+
+        Returns:
+            Optional[Result]: Result or None if resource is not matching.
+
+        """
+        match_level = self.try_match(resource, parts)
+
+        if match_level is None:
+            return None
+
+        is_allowed = self._evaluate(role, resource, match_level)
+        return Result(is_allowed, match_level)
+
+    def try_match(self, resource, parts=None):
+        """Match resource against the rule.
+
+        Default implementation adapts the `_match_resource` method. Subclasses
+        should override it to avoid raising exceptions.
+
+        Args:
+            resource (str): Input resource.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
+
+        Returns:
+            Optional[int]: Match level or None if resource is not matching.
+
+        """
+        try:
+            if parts is None:
+                return self._match_resource(resource)
+            else:
+                return self._match_resource_parts(resource, parts)
+        except ValueError:
+            return None
+
+    def _match_resource(self, resource):
+        """Match resource against the rule.
+
+        Args:
+            resource (str): Input resource.
+
+        Returns:
+            int: Match level.
+
+        Raises:
+            ValueError: Resource is not match.
+
+        """
+        raise NotImplementedError()
+
+    def _match_resource_parts(self, resource, parts):
+        """Match resource already split to parts against the rule.
+
+        Default implementation ignores parts and calls `_match_resource`.
+
+        Args:
+            resource (str): Input resource.
+            parts (Tuple[str]): Resource parts.
+
+        Returns:
+            int: Match level.
+
+        Raises:
+            ValueError: Resource is not match.
+
+        """
+        return self._match_resource(resource)
+
+    def _has_matching_of(self, klass):
+        """Test if the matching methods are not overriden in a subclass.
+
+        Args:
+            klass (Type[AbstractRule]): Class with the expected matching.
+
+        Returns:
+            bool: True if the instance matches same way as the class.
+
+        """
+        key = (type(self), klass)
+
+        try:
+            return _matching_of_cache[key]
+        except KeyError:
+            pass
+
+        rule_type = type(self)
+        result = (
+            rule_type._match_resource == klass._match_resource and
+            rule_type._match_resource_parts == klass._match_resource_parts and
+            rule_type.try_match == klass.try_match)
+
+        _matching_of_cache[key] = result
+        return result
+
+    def _evaluate(self, role, resource, match_level):
+        """Evaluate resource access.
+
+        Args:
+            role (easy_acl.role.Role): Role instance.
+            resource (str): Tested resource.
+            match_level (int): Match level.
+
+        Returns:
+            bool: True if resource is allowed, False otherwise.
+
+        """
+        return self.__evaluator(role, resource, match_level, self)
+
+    def _setup(self):
+        """Setup the instance.
+
+        """
+        pass
+
+
+class Simple(AbstractRule):
+    """Simple rule matches resource strictly against rule defintion by `==`
+    operator.
+
+    No wildcards are supported (any wildcard is interpreted as part of the
+    resource name). Result of the `_match_resource` method is always 0 (zero)
+    or raise ValueError.
+
+    Example:
+        ...
+        rule = Simple('my-resource', some_evaluator)
+
+        r = rule.resolve(some_role, 'my-resource')
+        # the `r` contains result with level=0
+
+        x = rule.resolve(some_role, 'other-resource')
+        # raise ValueError
+
+    """
+
+    __slots__ = ()
+
+    def _match_resource(self, resource):
+        """Match resource to definition by `==` operator.
+
+        Args:
             resource (str): Resource to match.
 
         Returns:
@@ -233,6 +999,23 @@ class Simple(AbstractRule):
         else:
             raise ValueError()
 
+    def try_match(self, resource, parts=None):
+        if not self._has_matching_of(Simple):
+            # matching is customized by a subclass
+            return super(Simple, self).try_match(resource, parts)
+
+        if self.definition == resource:
+            return 0
+        else:
+            return None
+
+    def get_index_key(self):
+        if not self._has_matching_of(Simple):
+            # matching is customized by a subclass
+            return None
+
+        return (INDEX_EXACT, self.definition)
+
 
 class WildcardEnding(Simple):
     """Resource is possible to end with wildcard.
@@ -243,6 +1026,9 @@ class WildcardEnding(Simple):
 
     """
 
+    __slots__ = ("__has_wildcard", "__definition_parts", "__prefix_parts",
+                 "__parts_compatible")
+
     @property
     def has_wildcard(self):
         return self.__has_wildcard
@@ -252,13 +1038,21 @@ class WildcardEnding(Simple):
         return self.__definition_parts
 
     def _setup(self):
-        self.__definition_parts = self.split_resource_to_parts(self.definition)
+        self.__definition_parts = tuple(
+            _intern(p) for p in self.split_resource_to_parts(self.definition))
+        self.__prefix_parts = self.__definition_parts[:-1]
 
         try:
             self.__has_wildcard = self.__definition_parts[-1] == self.WILDCARD
         except IndexError:
             self.__has_wildcard = False
 
+        # pre-split parts are usable only if they are split same way and
+        # matching is not customized by a subclass
+        self.__parts_compatible = (
+            self.RESOURCE_PART_DELIMITER == AbstractRule.RESOURCE_PART_DELIMITER and
+            type(self)._match_resource == WildcardEnding._match_resource)
+
     def _match_resource(self, resource):
         """Match resource to definition by `==` operator.
 
@@ -275,16 +1069,725 @@ class WildcardEnding(Simple):
         """
         if self.__has_wildcard:
             parts = self.split_resource_to_parts(resource)
+            match_level = self._try_match_wildcard_parts(parts)
 
-            if len(parts) < len(self.__definition_parts):
+            if match_level is None:
                 raise ValueError()
 
-            for i, dp in enumerate(self.__definition_parts[:-1]):
-                if parts[i] != dp:
-                    # not match
-                    raise ValueError()
-
-            return len(parts) - len(self.__definition_parts) + 1
+            return match_level
         else:
             # no wildcard is set - match same as simple rule
             return super(WildcardEnding, self)._match_resource(resource)
+
+    def _match_resource_parts(self, resource, parts):
+        if not self.__parts_compatible:
+            return self._match_resource(resource)
+        elif not self.__has_wildcard:
+            return super(WildcardEnding, self)._match_resource(resource)
+
+        match_level = self._try_match_wildcard_parts(parts)
+
+        if match_level is None:
+            raise ValueError()
+
+        return match_level
+
+    def try_match(self, resource, parts=None):
+        if not self._has_matching_of(WildcardEnding):
+            # matching is customized by a subclass
+            return super(WildcardEnding, self).try_match(resource, parts)
+
+        if not self.__has_wildcard:
+            return 0 if self.definition == resource else None
+
+        if parts is None or not self.__parts_compatible:
+            parts = self.split_resource_to_parts(resource)
+
+        return self._try_match_wildcard_parts(parts)
+
+    def _try_match_wildcard_parts(self, parts):
+        """Match resource parts against the definition with wildcard.
+
+        Args:
+            parts (Tuple[str]): Resource parts.
+
+        Returns:
+            Optional[int]: Match level (1 minimal) or None if resource does not
+                match to the definition.
+
+        """
+        prefix = self.__prefix_parts
+        prefix_length = len(prefix)
+
+        if len(parts) <= prefix_length or parts[:prefix_length] != prefix:
+            return None
+
+        return len(parts) - prefix_length
+
+    def get_index_key(self):
+        if not self._has_matching_of(WildcardEnding) or \
+                self.RESOURCE_PART_DELIMITER != AbstractRule.RESOURCE_PART_DELIMITER:
+            # matching is customized by a subclass
+            return None
+
+        if self.__has_wildcard:
+            return (INDEX_PREFIX, self.__prefix_parts)
+        else:
+            return (INDEX_EXACT, self.definition)
+
+
+class PartTable(object):
+    """Interned strings and resource prefixes shared by `ColumnarRuleList`.
+
+    Strings (rule definitions and resource parts) and prefixes (sequences of
+    resource parts) get integer IDs. A prefix is interned as its parent prefix
+    and its last part, so the prefixes form a trie and the ID of each prefix
+    of a resource is found by one dict lookup. The empty prefix has ID 0.
+
+    The table only grows, interned strings are never released.
+
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__strings = []
+        self.__string_ids = {}
+        # (parent ID << 32 | part ID) -> prefix ID, parent and part by prefix ID
+        self.__prefix_ids = {}
+        self.__prefix_parents = array.array("I", [0])
+        self.__prefix_parts = array.array("I", [0])
+
+    def intern_string(self, string):
+        """Get ID of the string, the string is added if it is missing.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            int: ID of the string.
+
+        """
+        string_id = self.__string_ids.get(string)
+
+        if string_id is None:
+            with self.__lock:
+                string_id = self.__string_ids.get(string)
+
+                if string_id is None:
+                    string_id = len(self.__strings)
+                    self.__strings.append(_intern(string))
+                    self.__string_ids[string] = string_id
+
+        return string_id
+
+    def find_string(self, string):
+        """Get ID of the string.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            Optional[int]: ID of the string or None if it is not interned.
+
+        """
+        return self.__string_ids.get(string)
+
+    def get_string(self, string_id):
+        return self.__strings[string_id]
+
+    def intern_prefix(self, parts):
+        """Get ID of the prefix, missing prefixes are added.
+
+        Args:
+            parts (Tuple[str]): Parts of the prefix.
+
+        Returns:
+            int: ID of the prefix.
+
+        """
+        prefix_id = 0
+
+        for part in parts:
+            part_id = self.intern_string(part)
+            key = prefix_id << 32 | part_id
+            child_id = self.__prefix_ids.get(key)
+
+            if child_id is None:
+                with self.__lock:
+                    child_id = self.__prefix_ids.get(key)
+
+                    if child_id is None:
+                        child_id = len(self.__prefix_parents)
+                        self.__prefix_parents.append(prefix_id)
+                        self.__prefix_parts.append(part_id)
+                        self.__prefix_ids[key] = child_id
+
+            prefix_id = child_id
+
+        return prefix_id
+
+    def find_prefix(self, parts):
+        """Get ID of the prefix.
+
+        Args:
+            parts (Tuple[str]): Parts of the prefix.
+
+        Returns:
+            Optional[int]: ID of the prefix or None if it is not interned.
+
+        """
+        prefix_id = 0
+
+        for part in parts:
+            part_id = self.__string_ids.get(part)
+
+            if part_id is None:
+                return None
+
+            prefix_id = self.__prefix_ids.get(prefix_id << 32 | part_id)
+
+            if prefix_id is None:
+                return None
+
+        return prefix_id
+
+    def find_resource_prefixes(self, parts):
+        """Find interned prefixes of the resource a wildcard can match.
+
+        Args:
+            parts (Tuple[str]): Resource parts.
+
+        Returns:
+            List[Tuple[int, int]]: Match levels and prefix IDs ordered from the
+                longest prefix.
+
+        """
+        parts_count = len(parts)
+        prefixes = [(parts_count, 0)]
+        prefix_id = 0
+
+        # the wildcard has to match at least one part
+        for depth in range(parts_count - 1):
+            part_id = self.__string_ids.get(parts[depth])
+
+            if part_id is None:
+                break
+
+            prefix_id = self.__prefix_ids.get(prefix_id << 32 | part_id)
+
+            if prefix_id is None:
+                break
+
+            prefixes.append((parts_count - depth - 1, prefix_id))
+
+        prefixes.reverse()
+        return prefixes
+
+    def get_prefix_parts(self, prefix_id):
+        """Get parts of the prefix.
+
+        Args:
+            prefix_id (int): ID of the prefix.
+
+        Returns:
+            Tuple[str]: Parts of the prefix.
+
+        """
+        parts = []
+
+        while prefix_id:
+            parts.append(self.__strings[self.__prefix_parts[prefix_id]])
+            prefix_id = self.__prefix_parents[prefix_id]
+
+        parts.reverse()
+        return tuple(parts)
+
+
+_default_part_table = PartTable()
+
+# rule types stored in columns, the type code is the position + 1
+_COLUMNAR_TYPES = (Simple, WildcardEnding)
+_TYPE_HOLE = 0
+_TYPE_OBJECT = len(_COLUMNAR_TYPES) + 1
+_KEY_NONE = 0xFFFFFFFF
+
+
+class ColumnarRuleList(RuleList):
+    """Rule list storing the built-in rules in compact columns.
+
+    Rules of the exact types `Simple` and `WildcardEnding` are not kept as
+    objects. Each rule is one row of these columns:
+
+    * type - the rule type code, zero for removed rules
+    * key - ID of the definition (exact match) or ID of the definition
+        prefix (wildcard) in the `PartTable`; the lowest bit is the wildcard
+        flag
+    * evaluator - index into the evaluator table of the list
+
+    Other rules (including subclasses of the built-in rules) are kept as
+    objects and tested one by one.
+
+    Rule objects are created when they are read by the `rules` property or
+    returned as the best match. Created and added objects are remembered by
+    weak references, so the same instance is returned while it is alive and it
+    can be removed or replaced by its identity. The `rules` property returns
+    a new list, changes of the list are not reflected.
+
+    The result is same as the result of the `RuleList`: the rule with the
+    lowest level wins and the first added rule wins if levels are equal.
+
+    Rules are located by their definitions through an index of positions. It
+    is built on the first search and kept up to date by the later changes.
+
+    Args:
+        part_table (Optional[PartTable]): Table of interned strings and
+            prefixes. Default is table shared by all lists.
+
+    """
+
+    def __init__(self, part_table=None):
+        super(ColumnarRuleList, self).__init__()
+
+        if part_table is None:
+            part_table = _default_part_table
+
+        self.__table = part_table
+        self.__types = bytearray()
+        self.__keys = array.array("I")
+        self.__evaluators = array.array("I")
+        self.__evaluator_table = []
+        self.__evaluator_ids = {}
+        # position -> rule object not stored in columns
+        self.__objects = {}
+        # ascending positions of the rule objects not stored in columns
+        self.__object_order = []
+        # position -> rule object added or created from columns
+        self.__instances = weakref.WeakValueDictionary()
+        self.__holes = 0
+        # column key -> ascending positions, None until the first search
+        self.__key_positions = None
+        # definition of rule stored as object -> ascending positions
+        self.__object_positions = None
+
+    @property
+    def rules(self):
+        return [self._get_rule(p) for p, t in enumerate(self.__types)
+                if t != _TYPE_HOLE]
+
+    def add_rule(self, rule):
+        self.__types.append(0)
+        self.__keys.append(0)
+        self.__evaluators.append(0)
+        self._set_row(len(self.__types) - 1, rule)
+
+    def find_rules(self, definition):
+        return [self._get_rule(p) for p in self._find_definition_positions(definition)]
+
+    def remove_rule(self, rule):
+        positions = self._find_positions(rule)
+        removed = [self._get_rule(p) for p in positions]
+
+        for position in positions:
+            self._unindex_row(position)
+            self.__types[position] = _TYPE_HOLE
+            self.__keys[position] = _KEY_NONE
+            self._forget_object(position)
+            self.__instances.pop(position, None)
+
+        self.__holes += len(positions)
+
+        if self.__holes * 2 > len(self.__types):
+            self._compact()
+
+        return removed
+
+    def replace_rule(self, rule, new_rule):
+        positions = self._find_positions(rule)
+
+        if len(positions) > 1:
+            raise ValueError("More rules with definition '{}' found"
+                             .format(rule))
+
+        old_rule = self._get_rule(positions[0])
+        self._unindex_row(positions[0])
+        self._forget_object(positions[0])
+        self._set_row(positions[0], new_rule)
+        return old_rule
+
+    def find_best_match(self, role, resource, parts=None):
+        """Find the best matching rule without evaluating it.
+
+        Each scan of the key column is counted as one tested rule.
+
+        Args:
+            role (easy_acl.role.Role): Role.
+            resource (str): Resource to match.
+            parts (Optional[Tuple[str]]): The resource already split to parts.
+
+        Returns:
+            Tuple[Optional[Match], int]: The best match or None if no rule
+                matches and count of tested rules.
+
+        """
+        # candidate is (level, position, result)
+        best = None
+        tested = 0
+        keys = self.__keys
+        table = self.__table
+        string_id = table.find_string(resource)
+
+        if string_id is not None:
+            tested += 1
+            position = _find_first(keys, string_id << 1)
+
+            if position is not None:
+                best = (0, position, None)
+
+        if best is None:
+            if parts is None:
+                parts = AbstractRule.split_resource_to_parts(resource)
+
+            # the longest prefix has the lowest level
+            for level, prefix_id in table.find_resource_prefixes(parts):
+                tested += 1
+                position = _find_first(keys, prefix_id << 1 | 1)
+
+                if position is not None:
+                    best = (level, position, None)
+                    break
+
+        for position, rule in self._iterate_objects():
+            if best is not None and best[1] < position and best[0] == 0:
+                # nothing better can be found
+                break
+
+            tested += 1
+
+            if is_matchable(rule):
+                level = rule.try_match(resource, parts)
+                result = None
+            else:
+                result = try_resolve(rule, role, resource, parts)
+                level = None if result is None else result.level
+
+            if level is None:
+                # rule does not match
+                continue
+
+            if best is None or (level, position) < best[:2]:
+                if best is not None:
+                    discard_result(best[2])
+
+                best = (level, position, result)
+            else:
+                discard_result(result)
+
+        if best is None:
+            return None, tested
+
+        return Match(best[0], self._get_rule(best[1]), best[2]), tested
+
+    def _get_matching_result_candidates(self, role, resource, parts=None):
+        match, _ = self.find_best_match(role, resource, parts)
+
+        if match is None:
+            return []
+        elif match.result is not None:
+            return [match.result]
+        else:
+            is_allowed = match.rule.evaluate(role, resource, match.level)
+            return [Result(is_allowed, match.level)]
+
+    def _get_rule_slots(self):
+        return [self._get_rule(p) if t != _TYPE_HOLE else None
+                for p, t in enumerate(self.__types)]
+
+    def _set_row(self, position, rule):
+        """Write the rule into the columns.
+
+        Args:
+            position (int): Position of the rule.
+            rule (AbstractRule): The rule.
+
+        """
+        rule_type = type(rule)
+
+        if rule_type in _COLUMNAR_TYPES:
+            index_key = rule.get_index_key()
+
+            if index_key[0] == INDEX_EXACT:
+                key = self.__table.intern_string(index_key[1]) << 1
+            else:
+                key = self.__table.intern_prefix(index_key[1]) << 1 | 1
+
+            self.__types[position] = _COLUMNAR_TYPES.index(rule_type) + 1
+            self.__keys[position] = key
+            self.__evaluators[position] = self._get_evaluator_id(rule.evaluator)
+        else:
+            self.__types[position] = _TYPE_OBJECT
+            self.__keys[position] = _KEY_NONE
+
+            bisect.insort(self.__object_order, position)
+            self.__objects[position] = rule
+
+        try:
+            self.__instances[position] = rule
+        except TypeError:
+            # the rule can not be weakly referenced
+            self.__instances.pop(position, None)
+
+        if self.__key_positions is not None:
+            index, key = self._get_row_index_entry(position)
+            bisect.insort(index.setdefault(key, []), position)
+
+    def _unindex_row(self, position):
+        """Remove the row from the index of positions.
+
+        Args:
+            position (int): Position of the row.
+
+        """
+        if self.__key_positions is None or self.__types[position] == _TYPE_HOLE:
+            return
+
+        index, key = self._get_row_index_entry(position)
+        positions = index[key]
+        positions.remove(position)
+
+        if not positions:
+            del index[key]
+
+    def _get_row_index_entry(self, position):
+        """Get the index and the key the row is indexed by.
+
+        Args:
+            position (int): Position of the row which is not a hole.
+
+        Returns:
+            Tuple[Dict[Hashable, List[int]], Hashable]: The index and the key.
+
+        """
+        if self.__types[position] == _TYPE_OBJECT:
+            return self.__object_positions, _get_definition(self.__objects[position])
+        else:
+            return self.__key_positions, self.__keys[position]
+
+    def _get_rule(self, position):
+        """Get rule object on the position.
+
+        Args:
+            position (int): Position of the rule.
+
+        Returns:
+            AbstractRule: The rule.
+
+        """
+        rule_type = self.__types[position]
+
+        if rule_type == _TYPE_OBJECT:
+            return self.__objects[position]
+
+        rule = self.__instances.get(position)
+
+        if rule is None:
+            key = self.__keys[position]
+
+            if key & 1:
+                parts = self.__table.get_prefix_parts(key >> 1)
+                definition = AbstractRule.RESOURCE_PART_DELIMITER.join(
+                    parts + (AbstractRule.WILDCARD, ))
+            else:
+                definition = self.__table.get_string(key >> 1)
+
+            rule = _COLUMNAR_TYPES[rule_type - 1](
+                definition, self.__evaluator_table[self.__evaluators[position]])
+            self.__instances[position] = rule
+
+        return rule
+
+    def _get_evaluator_id(self, evaluator):
+        """Get index of the evaluator in the evaluator table.
+
+        Args:
+            evaluator (Callable): The evaluator.
+
+        Returns:
+            int: Index of the evaluator.
+
+        """
+        try:
+            evaluator_id = self.__evaluator_ids.get(evaluator)
+        except TypeError:
+            # unhashable evaluator is compared by identity
+            evaluator_id = next((i for i, e in enumerate(self.__evaluator_table)
+                                 if e is evaluator), None)
+
+        if evaluator_id is None:
+            evaluator_id = len(self.__evaluator_table)
+            self.__evaluator_table.append(evaluator)
+
+            try:
+                self.__evaluator_ids[evaluator] = evaluator_id
+            except TypeError:
+                pass
+
+        return evaluator_id
+
+    def _iterate_objects(self):
+        """Iterate rules stored as objects by their positions.
+
+        Yields:
+            Tuple[int, Any]: Position and the rule.
+
+        """
+        objects = self.__objects
+        return iter([(p, objects[p]) for p in self.__object_order])
+
+    def _forget_object(self, position):
+        """Remove the rule object on the position if the row has one.
+
+        Args:
+            position (int): Position of the row.
+
+        """
+        if self.__objects.pop(position, None) is not None:
+            order = self.__object_order
+            del order[bisect.bisect_left(order, position)]
+
+    def _find_positions(self, rule):
+        """Find positions of the rule instance or rules with the definition.
+
+        Args:
+            rule (Union[AbstractRule, str]): Rule instance or definition.
+
+        Returns:
+            List[int]: Positions of the rules.
+
+        Raises:
+            ValueError: No rule was found.
+
+        """
+        if isinstance(rule, str):
+            positions = self._find_definition_positions(rule)
+        else:
+            positions = [p for p in self._find_definition_positions(
+                _get_definition(rule)) if self._get_rule_if_created(p) is rule]
+
+        if not positions:
+            raise ValueError("Rule '{}' is not in the list".format(
+                rule if isinstance(rule, str) else _get_definition(rule)))
+
+        return positions
+
+    def _find_definition_positions(self, definition):
+        """Find positions of rules with the definition.
+
+        Args:
+            definition (str): Definition of the rules.
+
+        Returns:
+            List[int]: Ascending positions of the rules.
+
+        """
+        if self.__key_positions is None:
+            self._build_position_index()
+
+        keys = []
+
+        if isinstance(definition, str):
+            string_id = self.__table.find_string(definition)
+
+            if string_id is not None:
+                keys.append(string_id << 1)
+
+            parts = AbstractRule.split_resource_to_parts(definition)
+
+            if parts[-1] == AbstractRule.WILDCARD:
+                prefix_id = self.__table.find_prefix(parts[:-1])
+
+                if prefix_id is not None:
+                    keys.append(prefix_id << 1 | 1)
+
+        positions = list(self.__object_positions.get(definition, ()))
+
+        for key in keys:
+            positions.extend(self.__key_positions.get(key, ()))
+
+        return sorted(positions)
+
+    def _build_position_index(self):
+        """Build the index of positions of all rows.
+
+        """
+        self.__key_positions = {}
+        self.__object_positions = {}
+
+        for position, rule_type in enumerate(self.__types):
+            if rule_type != _TYPE_HOLE:
+                index, key = self._get_row_index_entry(position)
+                index.setdefault(key, []).append(position)
+
+    def _get_rule_if_created(self, position):
+        """Get rule object on the position if it exists.
+
+        Args:
+            position (int): Position of the rule.
+
+        Returns:
+            Optional[AbstractRule]: The rule or None if it was not created or
+                it is not alive.
+
+        """
+        if self.__types[position] == _TYPE_OBJECT:
+            return self.__objects[position]
+
+        return self.__instances.get(position)
+
+    def _compact(self):
+        """Drop holes after removed rules.
+
+        Positions of rules are changed, so the index of positions is rebuilt
+        on the next search.
+
+        """
+        kept = [p for p, t in enumerate(self.__types) if t != _TYPE_HOLE]
+        instances = {}
+        objects = {}
+        object_order = []
+
+        for new_position, position in enumerate(kept):
+            rule = self._get_rule_if_created(position)
+
+            if rule is not None:
+                instances[new_position] = rule
+
+            if position in self.__objects:
+                objects[new_position] = self.__objects[position]
+                object_order.append(new_position)
+
+        self.__types = bytearray(self.__types[p] for p in kept)
+        self.__keys = array.array("I", (self.__keys[p] for p in kept))
+        self.__evaluators = array.array("I", (self.__evaluators[p] for p in kept))
+        self.__objects = objects
+        self.__object_order = object_order
+        self.__instances = weakref.WeakValueDictionary(instances)
+        self.__holes = 0
+        self.__key_positions = None
+        self.__object_positions = None
+
+
+def _find_first(values, value):
+    """Find the first position of the value.
+
+    Args:
+        values (array.array): The values.
+        value (int): The value.
+
+    Returns:
+        Optional[int]: The position or None if the value is missing.
+
+    """
+    try:
+        return values.index(value)
+    except ValueError:
+        return None
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""Decision cache shared by processes.
+
+The shared cache is the second level cache of `easy_acl.acl.Acl`. It is asked
+when the decision is not in the in-process cache and before rules are
+matched, so processes of one host (e.g. workers of the application server)
+warm the cache for each other.
+
+Each entry is keyed by the config generation, the role name and the resource.
+The generation is any string identifying the ACL content (e.g. the
+`source_hash` of the `easy_acl.config.AclConfigurator` set when the config is
+loaded from files). Processes use
+entries of their own generation only, so stale decisions written by processes
+with other config are never served. The `Acl` stops using the shared cache when
+it is changed locally until a new generation is set.
+
+Caches:
+
+* `MappedSharedCache` - lock-free hash table in a memory mapped file
+* `DictSharedCache` - dict living in one process, usable in tests
+
+Example
+-------
+
+shared_cache = MappedSharedCache("/run/app/acl.cache")
+acl = configurator.create_new_acl()
+acl.set_shared_cache(shared_cache, configurator.source_hash)
+
+acl.is_allowed("user", "post.list")
+
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import mmap
+import os
+import tempfile
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+SHARED_CACHE_MAGIC = b"EACLSHC1"
+
+# entries of one bucket are probed, the bucket is one cache line
+_BUCKET_SIZE = 8
+_ENTRY_SIZE = 8
+_HEADER_SIZE = 16
+
+
+class AbstractSharedCache(object):
+    """Base of the shared caches.
+
+    """
+
+    def get(self, generation, key):
+        """Get the cached decision.
+
+        Args:
+            generation (str): Config generation.
+            key (Tuple[str, str]): Role name and resource.
+
+        Returns:
+            Optional[bool]: The decision or None if it is not cached.
+
+        """
+        raise NotImplementedError()
+
+    def set(self, generation, key, is_allowed):
+        """Store the decision.
+
+        Args:
+            generation (str): Config generation.
+            key (Tuple[str, str]): Role name and resource.
+            is_allowed (bool): The decision.
+
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """Remove all decisions of all generations.
+
+        """
+        raise NotImplementedError()
+
+
+class DictSharedCache(AbstractSharedCache):
+    """Shared cache kept in a dict.
+
+    It is shared only by `Acl` instances of one process, so it stands in for
+    the real shared cache in tests.
+
+    Attributes:
+        data (Dict[Tuple[str, str, str], bool]): Decisions by the generation,
+            the role name and the resource.
+
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, generation, key):
+        return self.data.get((generation,) + tuple(key))
+
+    def set(self, generation, key, is_allowed):
+        self.data[(generation,) + tuple(key)] = is_allowed
+
+    def clear(self):
+        self.data.clear()
+
+
+class MappedSharedCache(AbstractSharedCache):
+    """Shared cache in a memory mapped file.
+
+    The file is a hash table of 64 bit entries. An entry contains a fingerprint
+    of the generation, the role name and the resource with the decision in its
+    lowest bit. Entries are written by single aligned stores without any lock,
+    so readers see either the old or the new entry. The table is lossy: when
+    a bucket is full, one of its entries is overwritten.
+
+    The file is created with the given capacity if it does not exist.
+    Otherwise the existing file is mapped and its capacity is used.
+
+    Args:
+        filename (str): Name of the cache file.
+        capacity (int): Count of the entries of a new file. It is rounded up to
+            whole buckets.
+
+    Attributes:
+        capacity (int): Count of the entries.
+
+    Raises:
+        ValueError: The capacity is not positive or the file is not a shared
+            cache.
+
+    """
+
+    def __init__(self, filename, capacity=1 << 20):
+        if capacity < 1:
+            raise ValueError("Capacity of cache has to be positive")
+
+        if not os.path.exists(filename):
+            _create_cache_file(filename, capacity)
+
+        with open(filename, "r+b") as fileobj:
+            self.__mmap = mmap.mmap(fileobj.fileno(), 0)
+
+        if len(self.__mmap) < _HEADER_SIZE + _BUCKET_SIZE * _ENTRY_SIZE or \
+                self.__mmap[:len(SHARED_CACHE_MAGIC)] != SHARED_CACHE_MAGIC:
+            self.__mmap.close()
+            raise ValueError("The file is not a shared ACL cache")
+
+        self.__entries = memoryview(self.__mmap)[_HEADER_SIZE:].cast("Q")
+        self.__bucket_count = len(self.__entries) // _BUCKET_SIZE
+
+    @property
+    def capacity(self):
+        return self.__bucket_count * _BUCKET_SIZE
+
+    def close(self):
+        """Unmap the cache file.
+
+        """
+        self.__entries.release()
+        self.__mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, generation, key):
+        fingerprint = _get_fingerprint(generation, key)
+        entries = self.__entries
+        start = (fingerprint >> 1) % self.__bucket_count * _BUCKET_SIZE
+
+        for index in range(start, start + _BUCKET_SIZE):
+            entry = entries[index]
+
+            if not entry:
+                return None
+
+            if entry & ~1 == fingerprint:
+                return bool(entry & 1)
+
+        return None
+
+    def set(self, generation, key, is_allowed):
+        fingerprint = _get_fingerprint(generation, key)
+        entries = self.__entries
+        start = (fingerprint >> 1) % self.__bucket_count * _BUCKET_SIZE
+        target = None
+
+        for index in range(start, start + _BUCKET_SIZE):
+            entry = entries[index]
+
+            if not entry or entry & ~1 == fingerprint:
+                target = index
+                break
+
+        if target is None:
+            # full bucket, the victim is selected by other bits of the fingerprint
+            target = start + (fingerprint >> 48) % _BUCKET_SIZE
+
+        entries[target] = fingerprint | int(is_allowed)
+
+    def clear(self):
+        self.__mmap[_HEADER_SIZE:] = bytes(len(self.__mmap) - _HEADER_SIZE)
+
+
+def _get_fingerprint(generation, key):
+    """Compute fingerprint of the entry.
+
+    Args:
+        generation (str): Config generation.
+        key (Tuple[str, str]): Role name and resource.
+
+    Returns:
+        int: Non-zero 64 bit number with the lowest bit cleared.
+
+    """
+    digest = hashlib.blake2b(u"\x00".join((generation,) + tuple(key)).encode("utf-8"),
+                             digest_size=8).digest()
+    return (int.from_bytes(digest, "little") & ~1) or 2
+
+
+def _create_cache_file(filename, capacity):
+    """Create empty cache file.
+
+    The file is written under a temporary name and linked to the final name,
+    so processes creating the file concurrently never see partial file and the
+    first created file is kept.
+
+    Args:
+        filename (str): Name of the cache file.
+        capacity (int): Count of the entries.
+
+    """
+    bucket_count = -(-capacity // _BUCKET_SIZE)
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temporary_filename = tempfile.mkstemp(dir=directory)
+
+    try:
+        with os.fdopen(fd, "wb") as fileobj:
+            fileobj.write(SHARED_CACHE_MAGIC)
+            fileobj.write(bytes(_HEADER_SIZE - len(SHARED_CACHE_MAGIC)))
+            fileobj.truncate(_HEADER_SIZE + bucket_count * _BUCKET_SIZE * _ENTRY_SIZE)
+
+        try:
+            os.link(temporary_filename, filename)
+        except OSError:
+            if not os.path.exists(filename):
+                raise
+    finally:
+        os.remove(temporary_filename)
@@ -0,0 +1,686 @@
+# -*- coding: utf-8 -*-
+"""Memory mapped ACL snapshot.
+
+The snapshot is read-only binary image of an `easy_acl.acl.Acl` instance. It is
+written once by `write_snapshot` and any number of processes (e.g. forked or
+separately started workers) can map the same file by `MappedAcl`. Queries are
+answered directly from the mapped pages, so the data are shared by the
+processes through the page cache and nothing is copied into Python objects.
+
+The file contains:
+
+* string table of role names, definitions, resource parts and references
+* roles with their lineage (the role followed by its ancestors) and default
+    evaluator
+* hash table of exact rules keyed by the owner role and the resource
+* prefix trie of wildcard rules, each node keeps rules of all roles ending
+    at the node
+
+Only rules with an index key (`easy_acl.rule.Simple`,
+`easy_acl.rule.WildcardEnding` and their subclasses which do not customize
+matching) can be exported. Evaluators and rule types are stored as dotted
+references and imported again when the snapshot is opened, so they have to be
+importable module level objects. The `allow` and `deny` evaluators are resolved
+without calling them. Other evaluators get a role instance having only the name
+of the role owning the rule (without parents) and the rule created again from
+its definition.
+
+Decisions are same as decisions of the source `Acl`. Changes made in the source
+`Acl` after export are not reflected, write a new snapshot and open it again.
+
+Example
+-------
+
+# master process
+acl = configurator.create_new_acl()
+write_snapshot(acl, "/run/app/acl.snapshot")
+
+# worker process
+acl = MappedAcl("/run/app/acl.snapshot")
+acl.is_allowed("user", "post.list")
+
+"""
+
+from __future__ import absolute_import
+
+import array
+import importlib
+import mmap
+import os
+import tempfile
+import zlib
+
+import easy_acl.evaluator as evaluators
+import easy_acl.role as roles
+import easy_acl.rule as rules
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+SNAPSHOT_MAGIC = b"EACLSNAP"
+SNAPSHOT_VERSION = 1
+
+# written in native byte order, reading on other byte order is refused
+_BYTE_ORDER_MARK = 0x01020304
+_NONE = 0xFFFFFFFF
+
+# header words after the magic
+_HEADER_SIZE = 12
+(_H_VERSION, _H_BYTE_ORDER, _H_WORD_COUNT, _H_STRINGS, _H_ROLES, _H_ROLE_TABLE,
+ _H_LINEAGES, _H_RULES, _H_EXACT_TABLE, _H_NODES, _H_NODE_TABLE,
+ _H_REFERENCES) = range(_HEADER_SIZE)
+
+# record sizes (in words)
+_ROLE_SIZE = 4  # name, default evaluator, lineage start, lineage length
+_RULE_SIZE = 4  # role, definition, evaluator, rule type
+_NODE_SIZE = 4  # parent node, part, rules start, rules count
+
+_CONSTANT_EVALUATORS = {evaluators.allow: True, evaluators.deny: False}
+
+
+def write_snapshot(acl, filename):
+    """Write the ACL into the snapshot file.
+
+    The file is replaced atomically, so processes opening it never see
+    partially written snapshot.
+
+    Args:
+        acl (easy_acl.acl.Acl): The ACL to export.
+        filename (str): Name of the snapshot file.
+
+    Raises:
+        ValueError: A rule can not be indexed or an evaluator or a rule type is
+            not importable by its reference.
+
+    """
+    content = _SnapshotBuilder(acl).build()
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temporary_filename = tempfile.mkstemp(dir=directory)
+
+    try:
+        with os.fdopen(fd, "wb") as fileobj:
+            fileobj.write(content)
+
+        getattr(os, "replace", os.rename)(temporary_filename, filename)
+    except BaseException:
+        os.remove(temporary_filename)
+        raise
+
+
+class MappedAcl(object):
+    """Read-only ACL answering queries from the memory mapped snapshot.
+
+    Args:
+        filename (str): Name of the snapshot file.
+
+    Attributes:
+        role_names (Tuple[str]): Names of the roles.
+
+    Raises:
+        ValueError: The file is not a snapshot or it was written by other
+            version or on platform with other byte order.
+
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as fileobj:
+            self.__mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self.__words = self._map_words()
+        except BaseException:
+            self.__mmap.close()
+            raise
+
+        words = self.__words
+        self.__strings = words[_H_STRINGS]
+        self.__blob_offset = len(SNAPSHOT_MAGIC) + 4 * words[_H_WORD_COUNT]
+        self.__roles = words[_H_ROLES]
+        self.__role_table = words[_H_ROLE_TABLE]
+        self.__lineages = words[_H_LINEAGES]
+        self.__rules = words[_H_RULES]
+        self.__exact_table = words[_H_EXACT_TABLE]
+        self.__nodes = words[_H_NODES]
+        self.__node_table = words[_H_NODE_TABLE]
+
+        # evaluators and rule types are shared by one reference table
+        references = words[_H_REFERENCES]
+        self.__references = [
+            _import_reference(self._get_string(words[references + 1 + i]))
+            for i in range(words[references])]
+        # decisions of evaluators which need not be called
+        self.__constants = [_CONSTANT_EVALUATORS.get(r) for r in self.__references]
+
+    @property
+    def role_names(self):
+        return tuple(self._get_string(self.__words[self.__roles + 1 + i * _ROLE_SIZE])
+                     for i in range(self.__words[self.__roles]))
+
+    def close(self):
+        """Unmap the snapshot.
+
+        """
+        self.__words.release()
+        self.__mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def is_allowed(self, role_name, resource):
+        """Test if access to the resource is allowed for role defined by its name.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            resource (str): Resource name.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        if isinstance(role_name, roles.Role):
+            role_name = role_name.name
+
+        words = self.__words
+        role = self._find_role(role_name)
+        record = self.__roles + 1 + role * _ROLE_SIZE
+        lineage_start = self.__lineages + 1 + words[record + 2]
+        lineage = words[lineage_start:lineage_start + words[record + 3]].tolist()
+
+        # exact rule of any role wins over wildcard rules
+        resource_bytes = resource.encode("utf-8")
+
+        for owner in lineage:
+            rule = self._find_exact_rule(owner, resource_bytes)
+
+            if rule is not None:
+                return self._evaluate(rule, resource, 0)
+
+        parts = rules.AbstractRule.split_resource_to_parts(resource)
+        nodes = []
+        node = 0
+
+        # the wildcard has to match at least one part
+        for depth in range(len(parts)):
+            if words[self.__nodes + 1 + node * _NODE_SIZE + 3]:
+                nodes.append((node, len(parts) - depth))
+
+            if depth + 1 == len(parts):
+                break
+
+            node = self._find_child(node, parts[depth])
+
+            if node is None:
+                break
+
+        for node, level in reversed(nodes):
+            for owner in lineage:
+                rule = self._find_node_rule(node, owner)
+
+                if rule is not None:
+                    return self._evaluate(rule, resource, level)
+
+        evaluator = words[record + 1]
+        constant = self.__constants[evaluator]
+
+        if constant is not None:
+            return constant
+
+        return self.__references[evaluator](roles.Role(role_name), resource, 0, None)
+
+    def _map_words(self):
+        """Check the header and map the words of the snapshot.
+
+        Returns:
+            memoryview: Unsigned 32 bit words of the snapshot.
+
+        Raises:
+            ValueError: The file is not a valid snapshot.
+
+        """
+        magic_size = len(SNAPSHOT_MAGIC)
+        header_end = magic_size + 4 * _HEADER_SIZE
+
+        if len(self.__mmap) < header_end or \
+                self.__mmap[:magic_size] != SNAPSHOT_MAGIC:
+            raise ValueError("The file is not an ACL snapshot")
+
+        header = array.array("I", self.__mmap[magic_size:header_end])
+
+        if header[_H_BYTE_ORDER] != _BYTE_ORDER_MARK:
+            raise ValueError("The snapshot was written with other byte order")
+
+        if header[_H_VERSION] != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot version {}".format(
+                header[_H_VERSION]))
+
+        word_end = magic_size + 4 * header[_H_WORD_COUNT]
+        return memoryview(self.__mmap)[magic_size:word_end].cast("I")
+
+    def _get_string_bytes(self, string_id):
+        """Get UTF-8 encoded string from the string table.
+
+        Args:
+            string_id (int): Index of the string.
+
+        Returns:
+            bytes: The string.
+
+        """
+        offset = self.__strings + 1 + string_id
+        start = self.__blob_offset + self.__words[offset]
+        return self.__mmap[start:self.__blob_offset + self.__words[offset + 1]]
+
+    def _get_string(self, string_id):
+        return self._get_string_bytes(string_id).decode("utf-8")
+
+    def _find_role(self, role_name):
+        """Find index of the role by its name.
+
+        Args:
+            role_name (str): Name of the role.
+
+        Returns:
+            int: The role index.
+
+        Raises:
+            ValueError: Role with name does not exists.
+
+        """
+        words = self.__words
+        name = role_name.encode("utf-8")
+
+        for role in self._probe(self.__role_table, name, 0):
+            if self._get_string_bytes(words[self.__roles + 1 + role * _ROLE_SIZE]) == name:
+                return role
+
+        raise ValueError("Role '{}' does not exist".format(role_name))
+
+    def _find_exact_rule(self, owner, resource):
+        """Find exact rule of the role.
+
+        Args:
+            owner (int): Index of the role owning the rule.
+            resource (bytes): Encoded resource name.
+
+        Returns:
+            Optional[int]: Word offset of the rule record.
+
+        """
+        words = self.__words
+
+        for rule in self._probe(self.__exact_table, resource, owner + 1):
+            record = self.__rules + 1 + rule * _RULE_SIZE
+
+            if words[record] == owner and \
+                    self._get_string_bytes(words[record + 1]) == resource:
+                return record
+
+        return None
+
+    def _find_child(self, node, part):
+        """Find child node of the trie.
+
+        Args:
+            node (int): Index of the parent node.
+            part (str): Resource part of the child.
+
+        Returns:
+            Optional[int]: Index of the child node.
+
+        """
+        words = self.__words
+        part = part.encode("utf-8")
+
+        for child in self._probe(self.__node_table, part, node + 1):
+            record = self.__nodes + 1 + child * _NODE_SIZE
+
+            if words[record] == node and \
+                    self._get_string_bytes(words[record + 1]) == part:
+                return child
+
+        return None
+
+    def _find_node_rule(self, node, owner):
+        """Find rule of the role ending at the trie node.
+
+        Rules of the node are sorted by the role index, so they are bisected.
+
+        Args:
+            node (int): Index of the node.
+            owner (int): Index of the role owning the rule.
+
+        Returns:
+            Optional[int]: Word offset of the rule record.
+
+        """
+        words = self.__words
+        record = self.__nodes + 1 + node * _NODE_SIZE
+        low = words[record + 2]
+        high = low + words[record + 3]
+
+        while low < high:
+            middle = (low + high) // 2
+            role = words[self.__rules + 1 + middle * _RULE_SIZE]
+
+            if role < owner:
+                low = middle + 1
+            elif role > owner:
+                high = middle
+            else:
+                return self.__rules + 1 + middle * _RULE_SIZE
+
+        return None
+
+    def _probe(self, table, key, scope):
+        """Iterate candidates of the key stored in the hash table.
+
+        Args:
+            table (int): Word offset of the hash table.
+            key (bytes): The key.
+            scope (int): Number distinguishing same keys of other owners.
+
+        Yields:
+            int: Index of the candidate record.
+
+        """
+        words = self.__words
+        mask = words[table] - 1
+        index = zlib.crc32(key, scope) & mask
+
+        while True:
+            slot = words[table + 1 + index]
+
+            if not slot:
+                return
+
+            yield slot - 1
+            index = (index + 1) & mask
+
+    def _evaluate(self, record, resource, level):
+        """Evaluate matched rule.
+
+        Args:
+            record (int): Word offset of the rule record.
+            resource (str): Resource name.
+            level (int): Match level.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        """
+        words = self.__words
+        constant = self.__constants[words[record + 2]]
+
+        if constant is not None:
+            return constant
+
+        evaluator = self.__references[words[record + 2]]
+        owner = self.__roles + 1 + words[record] * _ROLE_SIZE
+        role = roles.Role(self._get_string(words[owner]))
+        rule_type = self.__references[words[record + 3]]
+        rule = rule_type(self._get_string(words[record + 1]), evaluator)
+        return evaluator(role, resource, level, rule)
+
+
+class _SnapshotBuilder(object):
+    """Collect data of the ACL and pack them into the snapshot.
+
+    Args:
+        acl (easy_acl.acl.Acl): The ACL to export.
+
+    """
+
+    def __init__(self, acl):
+        self.__acl = acl
+        self.__strings = []
+        self.__string_ids = {}
+        self.__references = []
+        self.__reference_ids = {}
+
+    def build(self):
+        """Pack the ACL.
+
+        Returns:
+            bytes: Content of the snapshot file.
+
+        Raises:
+            ValueError: A rule can not be indexed or an evaluator or a rule type
+                is not importable by its reference.
+
+        """
+        acl = self.__acl
+        role_list = [acl.roles.get_role(n) for n in acl.roles.get_names()]
+        role_ids = {r: i for i, r in enumerate(role_list)}
+
+        role_records = []
+        lineages = []
+
+        for role in role_list:
+            default_evaluator = acl.default_evaluator
+
+            for current_role in role.lineage:
+                if current_role.default_evaluator is not None:
+                    default_evaluator = current_role.default_evaluator
+                    break
+
+            role_records.append((self._add_string(role.name),
+                                 self._add_reference(default_evaluator),
+                                 len(lineages), len(role.lineage)))
+            lineages.extend(role_ids[r] for r in role.lineage)
+
+        exact = {}
+        # node key (parent, part) -> node index, root has no key
+        node_ids = {}
+        node_keys = [(_NONE, None)]
+        node_rules = [{}]
+
+        for role in role_list:
+            rule_list = acl.rules.get(role)
+
+            if rule_list is None:
+                continue
+
+            role_id = role_ids[role]
+
+            for rule in rule_list.rules:
+                index_key = rules.get_index_key(rule)
+
+                if index_key is None:
+                    raise ValueError("Rule '{}' of role '{}' can not be exported".format(
+                        getattr(rule, "definition", rule), role.name))
+
+                record = (self._add_string(rule.definition),
+                          self._add_reference(rule.evaluator),
+                          self._add_reference(type(rule)))
+
+                # first added rule wins among rules of the same role
+                if index_key[0] == rules.INDEX_EXACT:
+                    exact.setdefault((role_id, index_key[1]), record)
+                    continue
+
+                node = 0
+
+                for part in index_key[1]:
+                    child = node_ids.get((node, part))
+
+                    if child is None:
+                        child = len(node_keys)
+                        node_ids[(node, part)] = child
+                        node_keys.append((node, part))
+                        node_rules.append({})
+
+                    node = child
+
+                node_rules[node].setdefault(role_id, record)
+
+        words = array.array("I", [0] * _HEADER_SIZE)
+        words[_H_VERSION] = SNAPSHOT_VERSION
+        words[_H_BYTE_ORDER] = _BYTE_ORDER_MARK
+
+        words[_H_ROLES] = len(words)
+        words.append(len(role_records))
+
+        for role_record in role_records:
+            words.extend(role_record)
+
+        words[_H_ROLE_TABLE] = len(words)
+        words.extend(_create_hash_table(
+            [(self.__strings[r[0]], 0) for r in role_records]))
+
+        words[_H_LINEAGES] = len(words)
+        words.append(len(lineages))
+        words.extend(lineages)
+
+        # exact rules are followed by the rules of the trie nodes
+        rule_records = [(k[0],) + v for k, v in exact.items()]
+        exact_keys = [(k[1], k[0] + 1) for k in exact]
+        node_records = []
+
+        for (parent, part), owners in zip(node_keys, node_rules):
+            node_records.append((parent, _NONE if part is None else self._add_string(part),
+                                 len(rule_records), len(owners)))
+            rule_records.extend((k,) + owners[k] for k in sorted(owners))
+
+        words[_H_RULES] = len(words)
+        words.append(len(rule_records))
+
+        for rule_record in rule_records:
+            words.extend(rule_record)
+
+        words[_H_EXACT_TABLE] = len(words)
+        words.extend(_create_hash_table(exact_keys))
+
+        words[_H_NODES] = len(words)
+        words.append(len(node_records))
+
+        for node_record in node_records:
+            words.extend(node_record)
+
+        words[_H_NODE_TABLE] = len(words)
+        words.extend(_create_hash_table(
+            [(k[1], k[0] + 1) for k in node_keys[1:]], first_index=1))
+
+        words[_H_REFERENCES] = len(words)
+        words.append(len(self.__references))
+        words.extend(self.__references)
+
+        # the table is the last one, all strings are added
+        words[_H_STRINGS] = len(words)
+        encoded = [s.encode("utf-8") for s in self.__strings]
+        words.append(len(encoded))
+        offset = 0
+
+        for string in encoded:
+            words.append(offset)
+            offset += len(string)
+
+        words.append(offset)
+        words[_H_WORD_COUNT] = len(words)
+
+        return SNAPSHOT_MAGIC + words.tobytes() + b"".join(encoded)
+
+    def _add_string(self, string):
+        """Add string into the string table.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            int: Index of the string.
+
+        """
+        string_id = self.__string_ids.get(string)
+
+        if string_id is None:
+            string_id = len(self.__strings)
+            self.__string_ids[string] = string_id
+            self.__strings.append(string)
+
+        return string_id
+
+    def _add_reference(self, obj):
+        """Add evaluator or rule type into the reference table.
+
+        Args:
+            obj (Any): The evaluator or the rule type.
+
+        Returns:
+            int: Index of the reference.
+
+        Raises:
+            ValueError: The object is not importable by its reference.
+
+        """
+        reference_id = self.__reference_ids.get(obj)
+
+        if reference_id is None:
+            reference = "{}.{}".format(getattr(obj, "__module__", None),
+                                       getattr(obj, "__name__", None))
+
+            try:
+                is_importable = _import_reference(reference) is obj
+            except (ImportError, AttributeError, ValueError):
+                is_importable = False
+
+            if not is_importable:
+                raise ValueError("Object {!r} is not importable as '{}'".format(
+                    obj, reference))
+
+            reference_id = len(self.__references)
+            self.__reference_ids[obj] = reference_id
+            self.__references.append(self._add_string(reference))
+
+        return reference_id
+
+
+def _create_hash_table(keys, first_index=0):
+    """Create open addressing hash table of record indexes.
+
+    Args:
+        keys (List[Tuple[str, int]]): Key and scope of each record.
+        first_index (int): Index of the record of the first key.
+
+    Returns:
+        List[int]: Capacity of the table followed by slots. Slot contains
+            the record index increased by one or zero if empty.
+
+    """
+    capacity = 8
+
+    while capacity < 2 * len(keys):
+        capacity *= 2
+
+    mask = capacity - 1
+    slots = [0] * capacity
+
+    for record, (key, scope) in enumerate(keys, first_index):
+        index = zlib.crc32(key.encode("utf-8"), scope) & mask
+
+        while slots[index]:
+            index = (index + 1) & mask
+
+        slots[index] = record + 1
+
+    return [capacity] + slots
+
+
+def _import_reference(reference):
+    """Import object by its full qualified name.
+
+    Args:
+        reference (str): Name of the object.
+
+    Returns:
+        Any: The object.
+
+    """
+    module_name, _, name = reference.rpartition(".")
+    return getattr(importlib.import_module(module_name), name)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Thread safe ACL.
+
+The `ThreadSafeAcl` is made for applications where the ACL is queried from many
+threads while it is changed by another thread.
+
+Readers never take a lock. They use the current snapshot, which is immutable
+`easy_acl.compiled.CompiledAcl` with its own decision cache. Writers are
+serialized by a lock. They change the private `easy_acl.acl.Acl` instance and
+publish a new snapshot by one reference assignment when the change is done.
+Readers see either the state before the change or the state after it, never
+a partial change.
+
+Publishing compiles the whole ACL, so more changes should be grouped by the
+`update` context manager.
+
+Role instances passed to queries have to be the instances registered in the
+current snapshot, same as in `easy_acl.acl.Acl`.
+
+Example
+-------
+
+acl = ThreadSafeAcl()
+
+with acl.update() as master:
+    master.roles.create_role("user")
+    master.add_rule("user", Simple("post.list", allow))
+
+acl.is_allowed("user", "post.list")
+
+"""
+
+from __future__ import absolute_import
+
+import contextlib
+import threading
+
+import easy_acl.acl as acls
+import easy_acl.role as roles
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+class ThreadSafeAcl(object):
+    """ACL with lock-free reads and copy-on-write updates.
+
+    Each change published by the writer methods (`add_rule`, `create_role`,
+    ...) compiles the whole ACL, so it costs time proportional to count of all
+    rules. Apply batches of changes in one `update` block, which publishes
+    once when the block ends.
+
+    Args:
+        default_evaluator (Optional[Callable[[Role, str, int,
+            easy_acl.rule.AbstractRule], bool]]): Evaluator used if no rule found.
+                Default is deny.
+        cache_factory (Optional[Callable[[], dict]]): Factory of the decision
+            cache created for each snapshot. The cache is accessed without
+            locks, so it has to be safe for concurrent access (like dict).
+            Default is dict.
+
+    """
+
+    def __init__(self, default_evaluator=None, cache_factory=None):
+        if cache_factory is None:
+            cache_factory = dict
+
+        self.__lock = threading.RLock()
+        self.__update_depth = 0
+        self.__acl = acls.Acl(default_evaluator)
+        self.__cache_factory = cache_factory
+        self.__snapshot = None
+        self._publish()
+
+    @property
+    def role_names(self):
+        return self.__snapshot[0].role_names
+
+    def snapshot(self):
+        """Get the current immutable snapshot.
+
+        Use the snapshot when more queries have to be answered by the same
+        state of the ACL.
+
+        Returns:
+            easy_acl.compiled.CompiledAcl: The snapshot.
+
+        """
+        return self.__snapshot[0]
+
+    def is_allowed(self, role_name, resource):
+        """Test if access to the resource is allowed for role defined by its name.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            resource (str): Resource name.
+
+        Returns:
+            bool: True if access is granted, False otherwise.
+
+        Raises:
+            ValueError: Role with given name was not found or the role instance
+                is not the registered one.
+
+        """
+        compiled_acl, cache = self.__snapshot
+
+        if isinstance(role_name, roles.Role):
+            # the instance is checked before the cache is asked
+            role_name = compiled_acl.get_compiled_role(role_name).role.name
+
+        key = (role_name, resource)
+
+        try:
+            return cache[key]
+        except KeyError:
+            result = compiled_acl.is_allowed(role_name, resource)
+            cache[key] = result
+            return result
+
+    @contextlib.contextmanager
+    def update(self):
+        """Change the ACL and publish the changes at once.
+
+        The context manager yields the private `easy_acl.acl.Acl` instance which
+        can be changed in the block. Nested blocks publish the changes when the
+        outermost block ends. Changes are published even if the block raises
+        an exception, because they can not be rolled back.
+
+        Yields:
+            easy_acl.acl.Acl: The ACL to change.
+
+        """
+        with self.__lock:
+            self.__update_depth += 1
+
+            try:
+                yield self.__acl
+            finally:
+                self.__update_depth -= 1
+
+                if self.__update_depth == 0:
+                    self._publish()
+
+    def add_rule(self, role_name, rule):
+        """Add new rule and publish the change.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            rule (easy_acl.rule.AbstractRule): Rule to add.
+
+        """
+        with self.update() as acl:
+            acl.add_rule(role_name, rule)
+
+    def remove_rule(self, role_name, rule):
+        """Remove the rule instance or all rules with the definition and
+        publish the change.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            rule (Union[easy_acl.rule.AbstractRule, str]): Rule instance or
+                definition of the rules to remove.
+
+        Returns:
+            List[easy_acl.rule.AbstractRule]: Removed rules.
+
+        Raises:
+            ValueError: Role was not found or no rule of the role was found.
+
+        """
+        with self.update() as acl:
+            return acl.remove_rule(role_name, rule)
+
+    def replace_rule(self, role_name, rule, new_rule):
+        """Replace the rule by the new rule and publish the change.
+
+        Args:
+            role_name (Union[str, easy_acl.role.Role]): Role name or role
+                instance.
+            rule (Union[easy_acl.rule.AbstractRule, str]): Rule instance or
+                definition of the rule to replace.
+            new_rule (easy_acl.rule.AbstractRule): The new rule.
+
+        Returns:
+            easy_acl.rule.AbstractRule: The replaced rule.
+
+        Raises:
+            ValueError: Role was not found or no rule or more rules of the role
+                were found.
+
+        """
+        with self.update() as acl:
+            return acl.replace_rule(role_name, rule, new_rule)
+
+    def add_role(self, role):
+        """Add existing role instance and publish the change.
+
+        Args:
+            role (easy_acl.role.Role): Role to add.
+
+        Raises:
+            AssertionError: Role name is not unique.
+
+        """
+        with self.update() as acl:
+            acl.roles.add_role(role)
+
+    def create_role(self, name, parent_names=None, default_evaluator=None):
+        """Create new role and publish the change.
+
+        Args:
+            name (str): Name of the role.
+            parent_names (Optional[Iterable[str]]): Names of the parent roles.
+            default_evaluator (Optional[Callable[[Role, str, int,
+                easy_acl.rule.AbstractRule], bool]]): Default permission.
+
+        Returns:
+            easy_acl.role.Role: New role.
+
+        Raises:
+            AssertionError: Role name is not unique.
+            ValueError: Parent role not found.
+
+        """
+        with self.update() as acl:
+            return acl.roles.create_role(name, parent_names, default_evaluator)
+
+    def _publish(self):
+        """Compile the private ACL and replace the current snapshot.
+
+        """
+        # the assignment is atomic - readers see the old or the new snapshot
+        self.__snapshot = (self.__acl.compile(), self.__cache_factory())
@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+"""Vectorized bulk evaluation of ACL queries.
+
+The `VectorizedAcl` answers large batches of `(role, resource)` queries (e.g.
+in entitlement exports or access reviews) by NumPy array operations instead of
+one `is_allowed` call per query. It requires the optional `numpy` package.
+
+Resources of the batch are split to parts once and encoded as a matrix of
+interned part IDs. Each prefix of each resource is translated to an ID of the
+prefix trie of all wildcard rules, so all `WildcardEnding` rules of a role are
+matched by one sorted lookup per depth. `Simple` rules (and `WildcardEnding`
+rules without wildcard) are matched by one sorted lookup of the resource ID.
+Rules of the role's lineage are merged with the same precedence as in the
+`easy_acl.acl.Acl`: the lowest match level wins, then the nearest role in the
+lineage and then the first added rule.
+
+The `allow` and `deny` evaluators are applied as constants. Other evaluators
+are called for each query they decide. Queries of roles having rules which can
+not be indexed (custom rules) are answered by the compiled ACL one by one.
+
+Like the `easy_acl.compiled.CompiledAcl`, the instance is a snapshot of the
+source `Acl` built eagerly, later changes are not reflected.
+
+Example
+-------
+
+vectorized = VectorizedAcl(acl)
+decisions = vectorized.is_allowed_pairs(role_names, resources)
+matrix = vectorized.is_allowed_matrix(["user", "admin"], resources)
+
+"""
+
+from __future__ import absolute_import
+
+try:
+    import numpy
+except ImportError:
+    # numpy is optional
+    numpy = None
+
+import easy_acl.evaluator as evaluators
+import easy_acl.rule as rules
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+# decision codes of the rules and default evaluators
+_DENY = 0
+_ALLOW = 1
+_CALL = 2
+
+_CONSTANT_EVALUATORS = {evaluators.deny: _DENY, evaluators.allow: _ALLOW}
+
+_MISSING = -1
+
+
+class VectorizedAcl(object):
+    """Snapshot of the ACL answering batches of queries by array operations.
+
+    Args:
+        acl (easy_acl.acl.Acl): The source ACL.
+
+    Attributes:
+        role_names (Tuple[str]): Names of the roles.
+
+    Raises:
+        ImportError: NumPy is not installed.
+
+    """
+
+    def __init__(self, acl):
+        if numpy is None:
+            raise ImportError("The VectorizedAcl requires numpy")
+
+        self.__compiled = acl.compile()
+        self.__roles = {n: acl.roles.get_role(n) for n in acl.roles.get_names()}
+        rule_lists = acl.rules
+        self.__default_evaluators = {n: acl._get_default_evaluator(r)
+                                     for n, r in self.__roles.items()}
+        self.__part_ids = {}
+        self.__exact_ids = {}
+        # (parent prefix ID << 32 | part ID) -> prefix ID, the root has ID 0
+        self.__prefix_ids = {}
+        self.__role_records = {}
+
+        for rule_list in rule_lists.values():
+            for rule in rule_list.rules:
+                index_key = rules.get_index_key(rule)
+
+                if index_key is None:
+                    continue
+                elif index_key[0] == rules.INDEX_EXACT:
+                    self.__exact_ids.setdefault(index_key[1], len(self.__exact_ids))
+                else:
+                    self._intern_prefix(index_key[1])
+
+        prefix_items = sorted(self.__prefix_ids.items())
+        self.__prefix_keys = numpy.array([k for k, _ in prefix_items],
+                                         dtype=numpy.int64)
+        self.__prefix_values = numpy.array([v for _, v in prefix_items],
+                                           dtype=numpy.int64)
+
+        for role_name, role in self.__roles.items():
+            self.__role_records[role_name] = self._create_role_record(role,
+                                                                      rule_lists)
+
+    @property
+    def role_names(self):
+        return tuple(self.__roles.keys())
+
+    def is_allowed_pairs(self, role_names, resources):
+        """Test access for each pair of the role and the resource.
+
+        Args:
+            role_names (Iterable[Union[str, easy_acl.role.Role]]): Role names or
+                role instances.
+            resources (Iterable[str]): Resource names, one for each role.
+
+        Returns:
+            numpy.ndarray: Boolean decision of each pair in the input order.
+
+        Raises:
+            ValueError: Role with given name was not found or the count of
+                roles and resources differs.
+
+        """
+        role_names = [getattr(n, "name", n) for n in role_names]
+        resources = list(resources)
+
+        if len(role_names) != len(resources):
+            raise ValueError("Count of roles and resources differs")
+
+        batch = _ResourceBatch(self, resources)
+        decisions = numpy.zeros(len(resources), dtype=bool)
+        pairs_by_role = {}
+
+        for position, role_name in enumerate(role_names):
+            pairs_by_role.setdefault(role_name, []).append(position)
+
+        for role_name, positions in pairs_by_role.items():
+            positions = numpy.array(positions, dtype=numpy.int64)
+            decisions[positions] = self._evaluate_role(
+                role_name, batch, batch.resource_indexes[positions])
+
+        return decisions
+
+    def is_allowed_matrix(self, role_names, resources):
+        """Test access to many resources for many roles.
+
+        Args:
+            role_names (Iterable[Union[str, easy_acl.role.Role]]): Role names or
+                role instances.
+            resources (Iterable[str]): Resource names.
+
+        Returns:
+            numpy.ndarray: Boolean matrix, a row for each role and a column for
+                each resource in the input order.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        role_names = [getattr(n, "name", n) for n in role_names]
+        batch = _ResourceBatch(self, list(resources))
+        decisions = numpy.zeros((len(role_names), len(batch.resource_indexes)),
+                                dtype=bool)
+
+        for row, role_name in enumerate(role_names):
+            decisions[row] = self._evaluate_role(role_name, batch,
+                                                 batch.resource_indexes)
+
+        return decisions
+
+    def _get_part_id(self, part):
+        return self.__part_ids.get(part, _MISSING)
+
+    def _get_exact_id(self, resource):
+        return self.__exact_ids.get(resource, _MISSING)
+
+    def _find_prefix_ids(self, parent_ids, part_ids):
+        """Find IDs of the child prefixes.
+
+        Args:
+            parent_ids (numpy.ndarray): IDs of the parent prefixes.
+            part_ids (numpy.ndarray): IDs of the parts.
+
+        Returns:
+            numpy.ndarray: IDs of the child prefixes, -1 if missing.
+
+        """
+        if not len(self.__prefix_keys):
+            return numpy.full(len(parent_ids), _MISSING, dtype=numpy.int64)
+
+        keys = parent_ids << 32 | part_ids
+        positions = numpy.minimum(numpy.searchsorted(self.__prefix_keys, keys),
+                                  len(self.__prefix_keys) - 1)
+        found = (parent_ids >= 0) & (part_ids >= 0) & \
+            (self.__prefix_keys[positions] == keys)
+        return numpy.where(found, self.__prefix_values[positions], _MISSING)
+
+    def _intern_prefix(self, parts):
+        """Add the prefix and all its parents to the prefix trie.
+
+        Args:
+            parts (Tuple[str]): Parts of the prefix.
+
+        Returns:
+            int: ID of the prefix.
+
+        """
+        prefix_id = 0
+
+        for part in parts:
+            part_id = self.__part_ids.setdefault(part, len(self.__part_ids))
+            key = prefix_id << 32 | part_id
+            prefix_id = self.__prefix_ids.setdefault(key, len(self.__prefix_ids) + 1)
+
+        return prefix_id
+
+    def _evaluate_role(self, role_name, batch, resource_indexes):
+        """Evaluate queries of one role.
+
+        Args:
+            role_name (str): Name of the role.
+            batch (_ResourceBatch): Encoded resources.
+            resource_indexes (numpy.ndarray): Indexes of the queried resources
+                in the batch.
+
+        Returns:
+            numpy.ndarray: Boolean decisions.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        record = self._get_role_record(role_name)
+
+        if record.has_fallback:
+            is_allowed = self.__compiled.is_allowed
+            return numpy.array([is_allowed(role_name, batch.resources[i])
+                                for i in resource_indexes.tolist()], dtype=bool)
+
+        lengths = batch.lengths[resource_indexes]
+        winners = numpy.full(len(resource_indexes), _MISSING, dtype=numpy.int64)
+        levels = numpy.zeros(len(resource_indexes), dtype=numpy.int64)
+
+        # deeper prefixes are applied later, so the lowest level wins
+        for depth in range(batch.prefix_ids.shape[1]):
+            found, rule_indexes = _lookup(record.prefix_keys, record.prefix_rules,
+                                          batch.prefix_ids[resource_indexes, depth])
+            found &= depth < lengths
+            winners = numpy.where(found, rule_indexes, winners)
+            levels = numpy.where(found, lengths - depth, levels)
+
+        found, rule_indexes = _lookup(record.exact_keys, record.exact_rules,
+                                      batch.exact_ids[resource_indexes])
+        winners = numpy.where(found, rule_indexes, winners)
+        levels = numpy.where(found, 0, levels)
+
+        default_code = _CONSTANT_EVALUATORS.get(self.__default_evaluators[role_name],
+                                                _CALL)
+        codes = numpy.append(record.codes, default_code)[winners]
+        decisions = codes == _ALLOW
+
+        for position in numpy.flatnonzero(codes == _CALL).tolist():
+            resource = batch.resources[resource_indexes[position]]
+            winner = winners[position]
+
+            if winner == _MISSING:
+                evaluator = self.__default_evaluators[role_name]
+                decisions[position] = evaluator(self.__roles[role_name], resource,
+                                                0, None)
+            else:
+                rule, owner = record.entries[winner]
+                decisions[position] = rule.evaluate(owner, resource,
+                                                    int(levels[position]))
+
+        return decisions
+
+    def _get_role_record(self, role_name):
+        """Get merged rules of the role's lineage.
+
+        Args:
+            role_name (str): Name of the role.
+
+        Returns:
+            _RoleRecord: The merged rules.
+
+        Raises:
+            ValueError: Role with given name was not found.
+
+        """
+        try:
+            return self.__role_records[role_name]
+        except KeyError:
+            raise ValueError("Role '{}' does not exist".format(role_name))
+
+    def _create_role_record(self, role, rule_lists):
+        """Merge rules of the role's lineage.
+
+        Args:
+            role (easy_acl.role.Role): The role.
+            rule_lists (Dict[easy_acl.role.Role, easy_acl.rule.RuleList]): Rules
+                of the roles.
+
+        Returns:
+            _RoleRecord: The merged rules.
+
+        """
+        record = _RoleRecord()
+        exact = {}
+        prefixes = {}
+
+        # rules are visited in the precedence order, so the first one wins
+        for owner in role.lineage:
+            rule_list = rule_lists.get(owner)
+
+            for rule in rule_list.rules if rule_list is not None else ():
+                index_key = rules.get_index_key(rule)
+
+                if index_key is None:
+                    record.has_fallback = True
+                    continue
+                elif index_key[0] == rules.INDEX_EXACT:
+                    lookup = exact
+                    key = self.__exact_ids[index_key[1]]
+                else:
+                    lookup = prefixes
+                    key = self._intern_prefix(index_key[1])
+
+                if key not in lookup:
+                    lookup[key] = len(record.entries)
+                    record.entries.append((rule, owner))
+
+        record.codes = numpy.array(
+            [_CONSTANT_EVALUATORS.get(r.evaluator, _CALL) for r, _ in record.entries],
+            dtype=numpy.int8)
+        record.exact_keys, record.exact_rules = _create_lookup(exact)
+        record.prefix_keys, record.prefix_rules = _create_lookup(prefixes)
+        return record
+
+
+class _RoleRecord(object):
+    """Merged rules of one role.
+
+    Attributes:
+        entries (List[Tuple[easy_acl.rule.AbstractRule, easy_acl.role.Role]]):
+            Winning rules with the roles owning them.
+        codes (numpy.ndarray): Decision code of each entry.
+        exact_keys (numpy.ndarray): Sorted IDs of the exact definitions.
+        exact_rules (numpy.ndarray): Entry index of each exact definition.
+        prefix_keys (numpy.ndarray): Sorted IDs of the wildcard prefixes.
+        prefix_rules (numpy.ndarray): Entry index of each wildcard prefix.
+        has_fallback (bool): The lineage has rules which can not be indexed.
+
+    """
+
+    __slots__ = ("entries", "codes", "exact_keys", "exact_rules", "prefix_keys",
+                 "prefix_rules", "has_fallback")
+
+    def __init__(self):
+        self.entries = []
+        self.codes = None
+        self.exact_keys = None
+        self.exact_rules = None
+        self.prefix_keys = None
+        self.prefix_rules = None
+        self.has_fallback = False
+
+
+class _ResourceBatch(object):
+    """Resources encoded to arrays.
+
+    Each distinct resource is encoded only once.
+
+    Args:
+        acl (VectorizedAcl): The ACL with the part and prefix tables.
+        resources (List[str]): Resource names.
+
+    Attributes:
+        resources (List[str]): Distinct resource names.
+        resource_indexes (numpy.ndarray): Index of the distinct resource of
+            each input resource.
+        lengths (numpy.ndarray): Count of parts of each distinct resource.
+        exact_ids (numpy.ndarray): ID of each distinct resource in the exact
+            definitions, -1 if missing.
+        prefix_ids (numpy.ndarray): Matrix of prefix IDs, the column `d` is
+            the ID of the prefix of `d` parts, -1 if missing.
+
+    """
+
+    __slots__ = ("resources", "resource_indexes", "lengths", "exact_ids",
+                 "prefix_ids")
+
+    def __init__(self, acl, resources):
+        indexes = {}
+        resource_indexes = []
+
+        for resource in resources:
+            resource_indexes.append(indexes.setdefault(resource, len(indexes)))
+
+        self.resources = list(indexes)
+        self.resource_indexes = numpy.array(resource_indexes, dtype=numpy.int64)
+
+        split = rules.AbstractRule.split_resource_to_parts
+        parts_list = [split(r) for r in self.resources]
+        depth = max([len(p) for p in parts_list] or [0])
+
+        self.lengths = numpy.array([len(p) for p in parts_list], dtype=numpy.int64)
+        self.exact_ids = numpy.array([acl._get_exact_id(r) for r in self.resources],
+                                     dtype=numpy.int64)
+
+        part_ids = numpy.full((len(parts_list), depth), _MISSING, dtype=numpy.int64)
+
+        for row, parts in enumerate(parts_list):
+            part_ids[row, :len(parts)] = [acl._get_part_id(p) for p in parts]
+
+        self.prefix_ids = numpy.full((len(parts_list), depth), _MISSING,
+                                     dtype=numpy.int64)
+
+        if depth:
+            self.prefix_ids[:, 0] = 0
+
+        for column in range(1, depth):
+            self.prefix_ids[:, column] = acl._find_prefix_ids(
+                self.prefix_ids[:, column - 1], part_ids[:, column - 1])
+
+
+def _create_lookup(mapping):
+    """Create sorted arrays from the mapping.
+
+    Args:
+        mapping (Dict[int, int]): The mapping.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: Sorted keys and their values.
+
+    """
+    items = sorted(mapping.items())
+    return (numpy.array([k for k, _ in items], dtype=numpy.int64),
+            numpy.array([v for _, v in items], dtype=numpy.int64))
+
+
+def _lookup(keys, values, queried):
+    """Find the queried keys in the sorted keys.
+
+    Args:
+        keys (numpy.ndarray): Sorted keys.
+        values (numpy.ndarray): Values of the keys.
+        queried (numpy.ndarray): Queried keys, negative keys are never found.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: Mask of the found keys and their
+            values (undefined where not found).
+
+    """
+    if not len(keys):
+        return numpy.zeros(len(queried), dtype=bool), numpy.zeros(len(queried),
+                                                                  dtype=numpy.int64)
+
+    positions = numpy.minimum(numpy.searchsorted(keys, queried), len(keys) - 1)
+    return (queried >= 0) & (keys[positions] == queried), values[positions]
@@ -5,11 +5,16 @@
 
 from __future__ import absolute_import
 
+import threading
+import time
+
 import pytest
 
 import easy_acl.acl as acl
+import easy_acl.cache as caches
 import easy_acl.role as roles
 import easy_acl.rule as rules
+import easy_acl.shared_cache as shared_caches
 import easy_acl.evaluator as evaluators
 
 __copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
@@ -40,6 +45,409 @@ def test_is_allowed_global_default(instance):
     assert not instance.is_allowed("user", "default.page")
 
 
+def test_is_allowed_role_instance(instance):
+    user = instance.roles.get_role("user")
+
+    assert instance.is_allowed(user, "index.index")
+    assert not instance.is_allowed(user, "default.page")
+
+
+def test_add_rule_role_instance(instance):
+    presenter = instance.roles.get_role("presenter")
+    instance.add_rule(presenter, rules.Simple("secret", evaluators.deny))
+
+    assert not instance.is_allowed("presenter", "secret")
+
+
+def test_is_allowed_unknown_role(instance):
+    with pytest.raises(ValueError):
+        instance.is_allowed("nobody", "index.index")
+
+
+def test_is_allowed_diamond_hierarchy():
+    instance = acl.Acl()
+    base = instance.roles.create_role("base")
+    instance.roles.create_role("left", ["base"])
+    instance.roles.create_role("right", ["base"], evaluators.allow)
+    instance.roles.create_role("child", ["left", "right"])
+
+    instance.add_rule("base", rules.WildcardEnding("a.*", evaluators.deny))
+    instance.add_rule("left", rules.WildcardEnding("a.b.*", evaluators.allow))
+    instance.add_rule("right", rules.WildcardEnding("a.*", evaluators.allow))
+
+    assert base.lineage[0] is base
+    assert instance.is_allowed("child", "a.b.c")
+    # same level in "right" and "base" - "right" is searched first
+    assert instance.is_allowed("child", "a.c")
+    assert not instance.is_allowed("left", "a.c")
+    # default evaluator of "right" is used
+    assert instance.is_allowed("child", "x")
+
+
+def test_is_allowed_many(instance):
+    resources = ["default.page", "index.index", "other"]
+
+    assert instance.is_allowed_many("user", resources) == [False, True, False]
+    assert instance.is_allowed_many("admin", iter(resources)) == \
+        [instance.is_allowed("admin", r) for r in resources]
+
+
+def test_is_allowed_many_unknown_role(instance):
+    with pytest.raises(ValueError):
+        instance.is_allowed_many("nobody", ["index.index"])
+
+
+def test_is_allowed_matrix(instance):
+    role_names = ["presenter", "user", "admin"]
+    resources = ["default.page", "index.index"]
+
+    result = instance.is_allowed_matrix(role_names, iter(resources))
+
+    assert result == [
+        [instance.is_allowed(n, r) for r in resources] for n in role_names]
+    assert result[1] == [False, True]
+
+
+def test_add_rule_invalidates_affected_entries(instance):
+    assert not instance.is_allowed("user", "post.list")
+    assert instance.is_allowed("admin", "post.list")
+    assert not instance.is_allowed("user", "post.edit")
+    assert instance.is_allowed("presenter", "post.list")
+
+    instance.add_rule("user", rules.Simple("post.list", evaluators.deny))
+
+    assert ("user", "post.list") not in instance.cache
+    assert ("admin", "post.list") not in instance.cache
+    assert ("user", "post.edit") in instance.cache
+    assert ("presenter", "post.list") in instance.cache
+
+    assert not instance.is_allowed("user", "post.list")
+    assert not instance.is_allowed("admin", "post.list")
+
+
+def test_add_wildcard_rule_invalidates_matching_entries(instance):
+    assert instance.is_allowed("admin", "post.list")
+    assert instance.is_allowed("admin", "page.list")
+
+    instance.add_rule("user", rules.WildcardEnding("post.*", evaluators.deny))
+
+    assert ("admin", "post.list") not in instance.cache
+    assert ("admin", "page.list") in instance.cache
+    assert not instance.is_allowed("admin", "post.list")
+
+
+def test_add_rule_invalidates_bounded_cache(instance):
+    instance = acl.Acl(cache=caches.LruCache(2))
+    setup_roles(instance)
+    setup_rules(instance)
+
+    assert not instance.is_allowed("user", "a")
+    assert not instance.is_allowed("user", "b")
+    assert not instance.is_allowed("user", "c")
+
+    instance.add_rule("user", rules.WildcardEnding("*", evaluators.allow))
+
+    assert len(instance.cache) == 0
+    assert instance.is_allowed("user", "a")
+
+
+def test_invalidate_role(instance):
+    assert not instance.is_allowed("user", "post.list")
+    assert instance.is_allowed("admin", "post.list")
+    assert instance.is_allowed("presenter", "post.list")
+
+    instance.invalidate_role("user")
+
+    assert ("user", "post.list") not in instance.cache
+    assert ("admin", "post.list") not in instance.cache
+    assert ("presenter", "post.list") in instance.cache
+
+
+def test_remove_rule(instance):
+    rule = rules.Simple("post.list", evaluators.deny)
+    instance.add_rule("presenter", rule)
+
+    assert not instance.is_allowed("admin", "post.list")
+    assert instance.is_allowed("admin", "post.edit")
+
+    instance.remove_rule("presenter", rule)
+
+    assert ("admin", "post.list") not in instance.cache
+    assert ("admin", "post.edit") in instance.cache
+    assert instance.is_allowed("admin", "post.list")
+
+    with pytest.raises(ValueError):
+        instance.remove_rule("presenter", rule)
+
+    with pytest.raises(ValueError):
+        instance.remove_rule("admin", rule)
+
+
+def test_remove_rule_by_definition(instance):
+    instance.add_rule("user", rules.Simple("post.*", evaluators.allow))
+    instance.add_rule("user", rules.WildcardEnding("post.*", evaluators.allow))
+
+    assert instance.is_allowed("user", "post.list")
+
+    removed = instance.remove_rule("user", "post.*")
+
+    assert [type(r) for r in removed] == [rules.Simple, rules.WildcardEnding]
+    assert not instance.is_allowed("user", "post.list")
+
+    with pytest.raises(ValueError):
+        instance.remove_rule("presenter", "post.*")
+
+
+def test_replace_rule(instance):
+    assert instance.is_allowed("user", "index.index")
+    assert not instance.is_allowed("user", "post.list")
+    assert not instance.is_allowed("user", "other")
+
+    new_rule = rules.WildcardEnding("post.*", evaluators.allow)
+    old_rule = instance.replace_rule("user", "index.index", new_rule)
+
+    assert old_rule.definition == "index.index"
+    assert ("user", "index.index") not in instance.cache
+    assert ("user", "post.list") not in instance.cache
+    assert ("user", "other") in instance.cache
+    assert not instance.is_allowed("user", "index.index")
+    assert instance.is_allowed("user", "post.list")
+
+
+def test_replace_role(instance):
+    assert not instance.is_allowed("user", "post.list")
+    assert instance.is_allowed("user", "index.index")
+    assert instance.is_allowed("admin", "post.list")
+
+    user = roles.Role("user", default_evaluator=evaluators.allow)
+    instance.replace_role(user)
+
+    assert instance.roles.get_role("user") is user
+    assert ("user", "post.list") not in instance.cache
+    assert ("admin", "post.list") not in instance.cache
+    assert instance.is_allowed("user", "post.list")
+    # rules are moved to the new role
+    assert instance.is_allowed("user", "index.index")
+
+
+def test_replaced_role_instance_is_refused(instance):
+    old_user = instance.roles.get_role("user")
+    instance.replace_role(roles.Role("user"))
+
+    with pytest.raises(ValueError):
+        instance.is_allowed(old_user, "index.index")
+
+    # the refused query does not poison the cache nor the rules
+    assert instance.is_allowed("user", "index.index")
+    assert old_user not in instance.rules
+
+
+def test_remove_role(instance):
+    with pytest.raises(ValueError):
+        instance.remove_role("user")
+
+    assert instance.is_allowed("admin", "index.index")
+
+    instance.remove_role("admin")
+    instance.remove_role("user")
+
+    assert instance.roles.get_names() == ["presenter"]
+    assert len(instance.cache) == 0
+
+    with pytest.raises(ValueError):
+        instance.is_allowed("user", "index.index")
+
+
+def test_concurrent_misses_are_computed_once(instance, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def slow(role, resource, level, rule):
+        calls.append(resource)
+        release.wait(5)
+        return True
+
+    instance.add_rule("user", rules.WildcardEnding("file.*", slow))
+    results = []
+
+    def query():
+        results.append(instance.is_allowed("user", "file.a"))
+
+    threads = [threading.Thread(target=query) for _ in range(8)]
+    waiting = count_flight_waiters(monkeypatch)
+
+    for thread in threads:
+        thread.start()
+
+    wait_for(lambda: calls and len(waiting) == 7)
+    release.set()
+
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["file.a"]
+    assert results == [True] * 8
+
+
+def test_concurrent_miss_exception_is_shared(instance, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def failing(role, resource, level, rule):
+        calls.append(resource)
+        release.wait(5)
+        raise RuntimeError("failed")
+
+    instance.add_rule("user", rules.WildcardEnding("file.*", failing))
+    errors = []
+
+    def query():
+        try:
+            instance.is_allowed("user", "file.a")
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query) for _ in range(4)]
+    waiting = count_flight_waiters(monkeypatch)
+
+    for thread in threads:
+        thread.start()
+
+    wait_for(lambda: calls and len(waiting) == 3)
+    release.set()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert len(calls) == 1
+    assert ("user", "file.a") not in instance.cache
+
+
+def test_finished_miss_is_not_computed_again(instance):
+    calls = []
+
+    def counting(role, resource, level, rule):
+        calls.append(resource)
+        return True
+
+    instance.add_rule("user", rules.WildcardEnding("file.*", counting))
+    role = instance.roles.get_role("user")
+
+    assert instance.is_allowed("user", "file.a") is True
+    # the caller missed the cache before the first computation finished
+    assert instance._compute_once(role, "file.a", ("user", "file.a")) is True
+    assert calls == ["file.a"]
+
+
+def test_change_during_miss_is_not_cached(instance):
+    def change(role, resource, level, rule):
+        instance.add_rule("user", rules.Simple("other", evaluators.allow))
+        return True
+
+    instance.add_rule("user", rules.Simple("file.a", change))
+
+    assert instance.is_allowed("user", "file.a")
+    assert ("user", "file.a") not in instance.cache
+
+
+def test_indexed_rule_list_factory():
+    instance = acl.Acl(rule_list_factory=rules.IndexedRuleList)
+    setup_roles(instance)
+    setup_rules(instance)
+
+    assert isinstance(instance.rules[instance.roles.get_role("user")],
+                      rules.IndexedRuleList)
+    assert instance.is_allowed("user", "index.index")
+    assert not instance.is_allowed("user", "default.page")
+
+
+def test_columnar_rule_list_factory():
+    instance = acl.Acl(rule_list_factory=rules.ColumnarRuleList)
+    setup_roles(instance)
+    setup_rules(instance)
+    instance.add_rule("presenter", rules.WildcardEnding("post.*", evaluators.deny))
+
+    assert isinstance(instance.rules[instance.roles.get_role("user")],
+                      rules.ColumnarRuleList)
+    assert instance.is_allowed("user", "index.index")
+    assert not instance.is_allowed("admin", "post.list")
+
+    instance.remove_rule("presenter", "post.*")
+    assert instance.is_allowed("admin", "post.list")
+
+
+def test_bounded_cache():
+    instance = acl.Acl(cache=caches.LruCache(1))
+    setup_roles(instance)
+    setup_rules(instance)
+
+    assert instance.is_allowed("user", "index.index")
+    assert instance.is_allowed("user", "index.index")
+    assert not instance.is_allowed("user", "default.page")
+
+    stats = instance.cache.get_stats()
+    assert stats.hits == 1
+    assert stats.misses == 2
+    assert stats.evictions == 1
+    assert stats.size == 1
+
+    instance.clear_cache()
+    assert len(instance.cache) == 0
+
+
+def test_shared_cache_is_used_after_local_cache():
+    shared_cache = shared_caches.DictSharedCache()
+    first = acl.Acl()
+    second = acl.Acl()
+
+    for instance in (first, second):
+        setup_roles(instance)
+        setup_rules(instance)
+        instance.set_shared_cache(shared_cache, "1")
+
+    assert first.is_allowed("user", "index.index") is True
+    assert shared_cache.data == {("1", "user", "index.index"): True}
+
+    # the decision of the second process is taken from the shared cache
+    shared_cache.data[("1", "user", "index.index")] = False
+    assert second.is_allowed("user", "index.index") is False
+    assert first.is_allowed("user", "index.index") is True
+    assert second.is_allowed_many("user", ["index.index"]) == [False]
+
+
+def test_shared_cache_other_generation(instance):
+    shared_cache = shared_caches.DictSharedCache()
+    shared_cache.set("1", ("user", "index.index"), False)
+    instance.set_shared_cache(shared_cache, "2")
+
+    assert instance.is_allowed("user", "index.index") is True
+    assert instance.shared_generation == "2"
+
+
+def test_shared_cache_not_used_after_local_change(instance):
+    shared_cache = shared_caches.DictSharedCache()
+    instance.set_shared_cache(shared_cache, "1")
+    instance.add_rule("user", rules.Simple("secret", evaluators.allow))
+
+    assert instance.shared_generation is None
+    assert instance.is_allowed("user", "secret") is True
+    assert not shared_cache.data
+
+    instance.set_shared_cache(shared_cache, "2")
+    instance.clear_cache()
+    instance.is_allowed("user", "secret")
+    assert shared_cache.data == {("2", "user", "secret"): True}
+
+
+def test_shared_cache_without_generation(instance):
+    with pytest.raises(ValueError):
+        instance.set_shared_cache(shared_caches.DictSharedCache(), None)
+
+    instance.set_shared_cache(None, None)
+    assert instance.shared_cache is None
+
+
 @pytest.fixture
 def instance():
     instance = acl.Acl()
@@ -61,3 +469,29 @@ def setup_roles(acl):
 
 def setup_rules(acl):
     acl.add_rule("user", rules.Simple("index.index", evaluators.allow))
+
+
+
+def count_flight_waiters(monkeypatch):
+    """Record callers waiting for computations of other threads.
+
+    """
+    waiting = []
+
+    class CountingFlight(acl._Flight):
+        __slots__ = ()
+
+        def wait(self):
+            waiting.append(self)
+            return super(CountingFlight, self).wait()
+
+    monkeypatch.setattr(acl, "_Flight", CountingFlight)
+    return waiting
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.001)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import asyncio
+import gc
+import warnings
+
+import mock
+import pytest
+
+import easy_acl.asynchronous as asynchronous
+import easy_acl.evaluator as evaluators
+import easy_acl.instrumentation as instrumentation
+import easy_acl.rule as rules
+import easy_acl.shared_cache as shared_caches
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+def test_sync_evaluators(instance):
+    assert run(instance.is_allowed("user", "post.list")) is True
+    assert run(instance.is_allowed("user", "post.edit")) is False
+    assert run(instance.is_allowed("admin", "post.edit")) is True
+    assert instance.cache[("admin", "post.edit")] is True
+
+
+def test_async_evaluator(instance):
+    calls = []
+
+    async def is_owner(role, resource, level, rule):
+        calls.append((role.name, resource))
+        await asyncio.sleep(0)
+        return role.name == "user"
+
+    instance.add_rule("user", rules.WildcardEnding("comment.*", is_owner))
+
+    assert run(instance.is_allowed("admin", "comment.edit")) is True
+    # evaluator gets the role owning the rule
+    assert calls == [("user", "comment.edit")]
+
+
+def test_async_default_evaluator():
+    async def allow(role, resource, level, rule):
+        return True
+
+    instance = asynchronous.AsyncAcl(default_evaluator=allow)
+    instance.roles.create_role("user")
+
+    assert run(instance.is_allowed("user", "anything")) is True
+
+
+def test_only_best_rule_is_evaluated(instance):
+    evaluator = mock.Mock(return_value=True)
+    instance.add_rule("user", rules.WildcardEnding("post.*", evaluator))
+
+    assert run(instance.is_allowed("user", "post.list")) is True
+    evaluator.assert_not_called()
+
+
+def test_concurrent_queries_are_coalesced(instance):
+    calls = []
+
+    async def slow(role, resource, level, rule):
+        calls.append(resource)
+        await asyncio.sleep(0.01)
+        return True
+
+    instance.add_rule("user", rules.WildcardEnding("file.*", slow))
+
+    async def query():
+        return await asyncio.gather(
+            instance.is_allowed("user", "file.a"),
+            instance.is_allowed("user", "file.a"),
+            instance.is_allowed("user", "file.b"),
+            instance.is_allowed("user", "file.a"),
+        )
+
+    assert run(query()) == [True, True, True, True]
+    assert sorted(calls) == ["file.a", "file.b"]
+
+
+def test_change_during_evaluation_is_not_cached(instance):
+    events = {}
+
+    async def slow(role, resource, level, rule):
+        events["started"].set()
+        await asyncio.sleep(0.01)
+        return True
+
+    instance.add_rule("user", rules.WildcardEnding("file.*", slow))
+
+    async def query():
+        events["started"] = asyncio.Event()
+        task = asyncio.ensure_future(instance.is_allowed("user", "file.a"))
+        await events["started"].wait()
+        instance.add_rule("user", rules.Simple("file.a", evaluators.deny))
+
+        first = await task
+        second = await instance.is_allowed("user", "file.a")
+        return first, second
+
+    assert run(query()) == (True, False)
+    assert instance.cache[("user", "file.a")] is False
+
+
+def test_is_allowed_many_and_matrix(instance):
+    assert run(instance.is_allowed_many("user", ["post.list", "post.edit"])) \
+        == [True, False]
+    assert run(instance.is_allowed_matrix(["user", "admin"],
+                                          ["post.list", "post.edit"])) \
+        == [[True, False], [True, True]]
+
+
+def test_unknown_role(instance):
+    with pytest.raises(ValueError):
+        run(instance.is_allowed("guest", "post.list"))
+
+
+def test_shared_cache(instance):
+    shared_cache = shared_caches.DictSharedCache()
+    shared_cache.set("1", ("user", "post.edit"), True)
+    instance.set_shared_cache(shared_cache, "1")
+
+    assert run(instance.is_allowed("user", "post.edit")) is True
+    assert run(instance.is_allowed("user", "post.list")) is True
+    assert shared_cache.data == {
+        ("1", "user", "post.edit"): True,
+        ("1", "user", "post.list"): True,
+    }
+
+
+def test_instrument():
+    instrument = mock.Mock(timer=instrumentation.AbstractInstrument.timer)
+    instance = asynchronous.AsyncAcl(instrument=instrument)
+    instance.roles.create_role("user")
+    instance.roles.create_role("admin", ["user"])
+
+    async def allow(role, resource, level, rule):
+        return True
+
+    instance.add_rule("user", rules.WildcardEnding("post.*", allow))
+
+    assert instance.instrument is instrument
+    assert run(instance.is_allowed("admin", "post.edit")) is True
+
+    report = instrument.on_query.call_args[0][0]
+    assert report.role_name == "admin"
+    assert report.is_allowed is True
+    assert report.cache_hit is False
+    assert report.roles_visited == 2
+    assert report.matched_rule.definition == "post.*"
+    assert report.total_time >= report.evaluation_time >= 0
+
+    assert run(instance.is_allowed("admin", "post.edit")) is True
+
+    report = instrument.on_query.call_args[0][0]
+    assert report.cache_hit is True
+    assert report.matched_rule is None
+
+
+class CustomRule(rules.AbstractRule):
+    """Rule resolved by own `resolve`, so it is evaluated while matching.
+
+    """
+
+    def resolve(self, role, resource):
+        if not resource.startswith(self.definition):
+            raise ValueError()
+
+        level = len(self.definition)
+        return rules.Result(self.evaluator(role, resource, level, self), -level)
+
+
+@pytest.mark.parametrize("rule_list_factory", [
+    rules.RuleList, rules.IndexedRuleList, rules.ColumnarRuleList])
+def test_losing_async_results_are_closed(rule_list_factory):
+    instance = asynchronous.AsyncAcl(rule_list_factory=rule_list_factory)
+    instance.roles.create_role("user")
+    instance.roles.create_role("admin", ["user"])
+
+    async def allow(role, resource, level, rule):
+        return True
+
+    async def deny(role, resource, level, rule):
+        return False
+
+    instance.add_rule("user", CustomRule("post", deny))
+    instance.add_rule("user", CustomRule("post.edit", allow))
+    instance.add_rule("user", CustomRule("p", deny))
+    instance.add_rule("admin", CustomRule("po", deny))
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert run(instance.is_allowed("admin", "post.edit")) is True
+        gc.collect()
+
+    assert [w for w in caught if issubclass(w.category, RuntimeWarning)] == []
+
+
+@pytest.fixture
+def instance():
+    instance = asynchronous.AsyncAcl()
+    instance.roles.create_role("user")
+    instance.roles.create_role("admin", ["user"])
+    instance.add_rule("user", rules.Simple("post.list", evaluators.allow))
+    instance.add_rule("admin", rules.WildcardEnding("post.*", evaluators.allow))
+    return instance
+
+
+def run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
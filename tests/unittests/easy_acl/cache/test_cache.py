@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import pytest
+
+import easy_acl.cache as cache
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: cache.LruCache(2),
+    lambda: cache.LfuCache(2),
+    lambda: cache.TtlCache(2, 60),
+])
+def test_get_set(factory):
+    instance = factory()
+    instance["foo"] = True
+
+    assert instance["foo"] is True
+
+    with pytest.raises(KeyError):
+        instance["bar"]
+
+    stats = instance.get_stats()
+    assert stats == cache.CacheStats(1, 1, 0, 1, 2)
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: cache.LruCache(2),
+    lambda: cache.LfuCache(2),
+    lambda: cache.TtlCache(2, 60),
+])
+def test_contains(factory):
+    instance = factory()
+    instance["foo"] = True
+
+    assert "foo" in instance
+    assert "bar" not in instance
+
+    stats = instance.get_stats()
+    assert stats == cache.CacheStats(0, 0, 0, 1, 2)
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: cache.LruCache(2),
+    lambda: cache.LfuCache(2),
+    lambda: cache.TtlCache(2, 60),
+])
+def test_max_size(factory):
+    instance = factory()
+
+    for i in range(10):
+        instance[i] = i
+
+    assert len(instance) == 2
+    assert instance.evictions == 8
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: cache.LruCache(2),
+    lambda: cache.LfuCache(2),
+    lambda: cache.TtlCache(2, 60),
+])
+def test_clear(factory):
+    instance = factory()
+    instance["foo"] = True
+    instance.clear()
+
+    assert len(instance) == 0
+
+    with pytest.raises(KeyError):
+        instance["foo"]
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: cache.LruCache(2),
+    lambda: cache.LfuCache(2),
+    lambda: cache.TtlCache(2, 60),
+])
+def test_pop(factory):
+    instance = factory()
+    instance["foo"] = 1
+    instance["bar"] = 2
+
+    assert instance.pop("foo") == 1
+    assert instance.pop("foo", 3) == 3
+
+    del instance["bar"]
+    assert len(instance) == 0
+
+    with pytest.raises(KeyError):
+        del instance["bar"]
+
+    instance["a"] = 1
+    instance["b"] = 2
+    instance["c"] = 3
+    assert len(instance) == 2
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: cache.LruCache(2),
+    lambda: cache.LfuCache(2),
+    lambda: cache.TtlCache(2, 60),
+])
+def test_eviction_callback(factory):
+    evicted = []
+    instance = factory()
+    instance.eviction_callback = evicted.append
+
+    for i in range(4):
+        instance[i] = i
+
+    assert len(evicted) == 2
+
+    instance.pop(evicted[0], None)
+    assert len(evicted) == 2
+
+
+def test_invalid_max_size():
+    with pytest.raises(ValueError):
+        cache.LruCache(0)
+
+
+def test_lru_eviction():
+    instance = cache.LruCache(2)
+    instance["a"] = 1
+    instance["b"] = 2
+    instance["a"]
+    instance["c"] = 3
+
+    assert instance["a"] == 1
+    assert instance["c"] == 3
+
+    with pytest.raises(KeyError):
+        instance["b"]
+
+
+def test_lfu_eviction():
+    instance = cache.LfuCache(2)
+    instance["a"] = 1
+    instance["b"] = 2
+    instance["a"]
+    instance["a"]
+    instance["b"]
+    instance["c"] = 3
+
+    # "c" is used less than "a"
+    instance["d"] = 4
+
+    assert instance["a"] == 1
+    assert instance["d"] == 4
+
+    with pytest.raises(KeyError):
+        instance["c"]
+
+
+def test_ttl_expiration():
+    clock = [0]
+    instance = cache.TtlCache(10, 5, timer=lambda: clock[0])
+    instance["a"] = 1
+
+    clock[0] = 4
+    assert instance["a"] == 1
+
+    clock[0] = 5
+
+    with pytest.raises(KeyError):
+        instance["a"]
+
+    assert len(instance) == 0
+
+
+def test_ttl_expiration_callback():
+    clock = [0]
+    evicted = []
+    instance = cache.TtlCache(10, 5, timer=lambda: clock[0])
+    instance.eviction_callback = evicted.append
+    instance["a"] = 1
+    clock[0] = 10
+
+    with pytest.raises(KeyError):
+        instance["a"]
+
+    assert evicted == ["a"]
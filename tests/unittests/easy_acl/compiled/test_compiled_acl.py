@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import mock
+import pytest
+
+import easy_acl.acl as acl
+import easy_acl.compiled as compiled
+import easy_acl.role as roles
+import easy_acl.rule as rules
+import easy_acl.evaluator as evaluators
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+RESOURCES = [
+    "a", "a.b", "a.b.c", "a.b.c.d", "a.c", "a.c.d", "b", "b.a", "b.a.c",
+    "c", "c.d", "secret", "secret.x", "x.y.z",
+]
+
+
+def test_compile(instance):
+    compiled_acl = instance.compile()
+
+    assert isinstance(compiled_acl, compiled.CompiledAcl)
+    assert sorted(compiled_acl.role_names) == ["admin", "base", "left", "right"]
+
+
+@pytest.mark.parametrize("role_name", ["admin", "base", "left", "right"])
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_same_decisions(instance, role_name, resource):
+    compiled_acl = instance.compile()
+
+    assert compiled_acl.is_allowed(role_name, resource) == \
+        instance.is_allowed(role_name, resource)
+
+
+def test_role_instance(instance):
+    compiled_acl = instance.compile()
+    admin = instance.roles.get_role("admin")
+
+    assert compiled_acl.is_allowed(admin, "a.b") == \
+        compiled_acl.is_allowed("admin", "a.b")
+
+
+def test_not_registered_role_instance(instance):
+    compiled_acl = instance.compile()
+
+    with pytest.raises(ValueError):
+        compiled_acl.is_allowed(roles.Role("admin"), "a.b")
+
+
+def test_unknown_role(instance):
+    compiled_acl = instance.compile()
+
+    with pytest.raises(ValueError):
+        compiled_acl.is_allowed("nobody", "a")
+
+
+def test_not_affected_by_later_changes(instance):
+    compiled_acl = instance.compile()
+    instance.add_rule("base", rules.Simple("x.y.z", evaluators.allow))
+
+    assert instance.is_allowed("base", "x.y.z")
+    assert not compiled_acl.is_allowed("base", "x.y.z")
+
+
+def test_evaluator_gets_owner_role(instance):
+    evaluator = mock.Mock(return_value=True)
+    instance.add_rule("base", rules.WildcardEnding("z.*", evaluator))
+    compiled_acl = instance.compile()
+
+    assert compiled_acl.is_allowed("admin", "z.z")
+    rule = instance.rules[instance.roles.get_role("base")].rules[-1]
+    evaluator.assert_called_once_with(instance.roles.get_role("base"), "z.z", 1,
+                                      rule)
+
+
+def test_default_evaluator(instance):
+    compiled_acl = instance.compile()
+
+    assert compiled_acl.get_compiled_role("admin").default_evaluator is \
+        evaluators.allow
+    assert compiled_acl.get_compiled_role("base").default_evaluator is \
+        evaluators.deny
+
+
+@pytest.fixture
+def instance():
+    instance = acl.Acl()
+    instance.roles.create_role("base")
+    instance.roles.create_role("left", ["base"])
+    instance.roles.create_role("right", ["base"], evaluators.allow)
+    instance.roles.create_role("admin", ["left", "right"])
+
+    instance.add_rule("base", rules.WildcardEnding("a.*", evaluators.allow))
+    instance.add_rule("base", rules.Simple("secret", evaluators.deny))
+    instance.add_rule("base", rules.WildcardEnding("*", evaluators.deny))
+    instance.add_rule("left", rules.WildcardEnding("a.b.*", evaluators.deny))
+    instance.add_rule("left", rules.Simple("a.c", evaluators.deny))
+    instance.add_rule("right", rules.WildcardEnding("a.*", evaluators.deny))
+    instance.add_rule("right", rules.WildcardEnding("b.a", evaluators.allow))
+    instance.add_rule("right", create_custom_rule("c", True, 0))
+    instance.add_rule("admin", create_custom_rule("b", False, 1))
+    instance.add_rule("admin", rules.WildcardEnding("a.b.c.*", evaluators.allow))
+
+    return instance
+
+
+def create_custom_rule(prefix, is_allowed, level):
+    """Create rule which is not indexed.
+
+    """
+    rule_instance = mock.Mock()
+
+    def resolve(role, resource):
+        if resource.startswith(prefix):
+            return rules.Result(is_allowed, level)
+
+        raise ValueError()
+
+    rule_instance.resolve.side_effect = resolve
+    return rule_instance
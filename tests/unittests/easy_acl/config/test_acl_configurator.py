@@ -5,9 +5,13 @@
 
 from __future__ import absolute_import
 
+import collections
 import mock
 import os
+import pytest
+import time
 
+import easy_acl.acl as acls
 import easy_acl.config as config
 import easy_acl.role as roles
 import easy_acl.rule as rules
@@ -54,6 +58,29 @@ def test_load_data_from_config_file():
     assert_config_rules(instance)
 
 
+def test_source_hash_is_set_when_loaded(tmpdir):
+    filename = tmpdir.join("acl.conf")
+    filename.write("[roles]\nuser=\n")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(filename))
+    source_hash = instance.source_hash
+
+    assert source_hash is not None
+
+    instance = config.AclConfigurator()
+    instance.load_config_file_into(acls.Acl(), str(filename))
+    assert instance.source_hash == source_hash
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_files(str(tmpdir))
+    assert instance.source_hash is not None
+
+    filename.write("[roles]\nuser=\nadmin=user\n")
+    instance.load_data_from_config_file(str(filename))
+    assert instance.source_hash != source_hash
+
+
 def test_create_new_acl():
     instance = config.AclConfigurator()
     instance.load_data_from_config_file(SAMPLE_CONFIG_PATH)
@@ -63,6 +90,469 @@ def test_create_new_acl():
     assert_acl_roles(acl)
 
 
+def test_load_data_from_artifact(tmpdir):
+    artifact = str(tmpdir.join("acl.artifact"))
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(SAMPLE_CONFIG_PATH, artifact)
+
+    assert instance.raw_config is not None
+    assert os.path.exists(artifact)
+
+    instance = config.AclConfigurator()
+
+    with mock.patch.object(config.AclConfigurator, "_read_config") as read_config:
+        instance.load_data_from_config_file(SAMPLE_CONFIG_PATH, artifact)
+
+    read_config.assert_not_called()
+    assert instance.raw_config is None
+    assert instance.default_evaluator is evaluators.allow
+    assert_config_rule_factories(instance)
+    assert_config_evaluators_lookup(instance)
+    assert_config_roles(instance)
+    assert_config_default_role_evaluators(instance)
+    assert_config_rules(instance)
+    assert_acl_roles(instance.create_new_acl())
+
+
+def test_stale_artifact_is_replaced(tmpdir):
+    artifact = str(tmpdir.join("acl.artifact"))
+    source = tmpdir.join("acl.conf")
+    source.write("[roles]\nuser=\n")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(source), artifact)
+
+    source.write("[roles]\nuser=\nadmin=user\n")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(source), artifact)
+
+    assert instance.raw_config is not None
+    assert [r.name for r in instance.roles] == ["user", "admin"]
+
+    instance = config.AclConfigurator()
+    assert instance.load_data_from_artifact(artifact, instance._get_source_hash(
+        str(source)))
+    assert [r.name for r in instance.roles] == ["user", "admin"]
+
+
+def test_invalid_artifact_is_ignored(tmpdir):
+    artifact = tmpdir.join("acl.artifact")
+    artifact.write_binary(config.ARTIFACT_MAGIC + b"garbage")
+
+    instance = config.AclConfigurator()
+
+    assert not instance.load_data_from_artifact(str(artifact))
+    assert not instance.load_data_from_artifact(str(tmpdir.join("missing")))
+
+    instance.load_data_from_config_file(SAMPLE_CONFIG_PATH, str(artifact))
+    assert_config_roles(instance)
+
+
+def test_load_config_file_into():
+    expected = config.AclConfigurator()
+    expected.load_data_from_config_file(SAMPLE_CONFIG_PATH)
+    expected_acl = expected.create_new_acl()
+
+    instance = config.AclConfigurator()
+    acl = acls.Acl()
+    instance.load_config_file_into(acl, SAMPLE_CONFIG_PATH)
+
+    assert_acl_roles(acl)
+    assert instance.rules == {}
+    assert_config_rule_factories(instance)
+    assert_config_evaluators_lookup(instance)
+
+    def get_rules(acl):
+        return {role.name: [(type(r), r.definition, r.evaluator)
+                            for r in rule_list.rules]
+                for role, rule_list in acl.rules.items()}
+
+    assert get_rules(acl) == get_rules(expected_acl)
+
+
+def test_load_config_file_into_syntax(tmpdir):
+    source = tmpdir.join("acl.conf")
+    source.write("""# comment
+[admin_rules]
+; comment
+Post.List = simple,allow
+system.*: wildcardending,deny
+
+[roles]
+user=
+admin=
+    user
+""")
+
+    acl = acls.Acl()
+    config.AclConfigurator().load_config_file_into(acl, str(source))
+
+    admin = acl.roles.get_role("admin")
+    assert admin.parents == (acl.roles.get_role("user"), )
+
+    rule_list = acl.rules[admin]
+    assert [(r.definition, r.evaluator) for r in rule_list.rules] == [
+        ("post.list", evaluators.allow),
+        ("system.*", evaluators.deny),
+    ]
+
+
+def test_load_config_file_into_unknown_evaluator(tmpdir):
+    source = tmpdir.join("acl.conf")
+    source.write("[roles]\nuser=\n\n[user_rules]\npost.list=simple,unknown\n")
+
+    with pytest.raises(KeyError):
+        config.AclConfigurator().load_config_file_into(acls.Acl(), str(source))
+
+
+def test_load_data_from_config_files(tmpdir):
+    tmpdir.join("10_roles.conf").write(
+        "[global]\nevaluator=allow\n\n[roles]\nuser=\npresenter=\n")
+    tmpdir.join("20_admin.conf").write(
+        "[roles]\nadmin=user, presenter\npresenter=\n\n"
+        "[default_evaluators]\nadmin=allow\n\n"
+        "[admin_rules]\ntop-secret.*=wildcardending,deny\n")
+    tmpdir.join("30_user.ini").write(
+        "[user_rules]\npost.list=simple,allow\n\n"
+        "[admin_rules]\nsystem.*=wildcardending,allow\n")
+    tmpdir.join("ignored.txt").write("[roles]\nignored=\n")
+
+    executor = mock.Mock()
+    executor.map.side_effect = map
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_files(str(tmpdir), executor)
+
+    assert executor.map.call_count == 1
+    assert instance.default_evaluator is evaluators.allow
+    assert [r.name for r in instance.roles] == ["user", "presenter", "admin"]
+    assert instance.roles[2].parents == ("user", "presenter")
+    assert instance.default_role_evaluators == {"admin": "allow"}
+    assert [tuple(r) for r in instance.rules["admin"]] == [
+        ("top-secret.*", "wildcardending", "deny"),
+        ("system.*", "wildcardending", "allow"),
+    ]
+    assert [tuple(r) for r in instance.rules["user"]] == [
+        ("post.list", "simple", "allow"),
+    ]
+
+
+def test_load_data_from_config_files_conflict(tmpdir):
+    first = tmpdir.join("first.conf")
+    first.write("[roles]\nuser=\n\n[user_rules]\npost.list=simple,allow\n")
+    second = tmpdir.join("second.conf")
+    second.write("[user_rules]\npost.list=simple,deny\n")
+
+    instance = config.AclConfigurator()
+
+    with pytest.raises(ValueError) as exc_info:
+        instance.load_data_from_config_files([str(first), str(second)])
+
+    message = str(exc_info.value)
+    assert "post.list" in message
+    assert "first.conf" in message
+    assert "second.conf" in message
+
+
+def test_load_data_from_config_files_not_found(tmpdir):
+    tmpdir.join("ignored.txt").write("[roles]\nignored=\n")
+    instance = config.AclConfigurator()
+
+    for filenames in (str(tmpdir), str(tmpdir.join("*.conf")), []):
+        with pytest.raises(ValueError):
+            instance.load_data_from_config_files(filenames)
+
+    assert instance.roles == []
+
+
+def test_reload_config_file(tmpdir):
+    source = tmpdir.join("acl.conf")
+    source.write("""[roles]
+user=
+presenter=
+editor=user
+admin=editor,presenter
+guest=
+
+[default_evaluators]
+presenter=allow
+
+[user_rules]
+post.list=simple,allow
+post.*=wildcardending,deny
+
+[editor_rules]
+post.edit=simple,allow
+
+[guest_rules]
+index=simple,allow
+""")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(source))
+    acl = instance.create_new_acl()
+    resources = ["post.list", "post.edit", "post.delete", "index", "other"]
+    role_names = ["user", "presenter", "editor", "admin"]
+
+    for role_name in role_names:
+        for resource in resources:
+            acl.is_allowed(role_name, resource)
+
+    old_presenter = acl.roles.get_role("presenter")
+
+    source.write("""[roles]
+user=
+presenter=
+editor=user
+admin=editor,presenter
+auditor=user
+
+[default_evaluators]
+editor=allow
+presenter=allow
+
+[user_rules]
+post.list=simple,allow
+post.*=wildcardending,deny
+
+[editor_rules]
+post.edit=simple,deny
+post.delete=simple,allow
+
+[auditor_rules]
+post.*=wildcardending,allow
+""")
+
+    diff = instance.reload_config_file(acl, str(source))
+
+    assert diff.added_roles == ["auditor"]
+    assert diff.changed_roles == ["editor"]
+    assert diff.removed_roles == ["guest"]
+    assert diff.removed_rules == [
+        ("editor", ("post.edit", "simple", "allow")),
+    ]
+    assert diff.added_rules == [
+        ("editor", ("post.edit", "simple", "deny")),
+        ("editor", ("post.delete", "simple", "allow")),
+        ("auditor", ("post.*", "wildcardending", "allow")),
+    ]
+
+    # unchanged roles are kept with their cached decisions
+    assert acl.roles.get_role("presenter") is old_presenter
+    assert ("user", "post.list") in acl.cache
+    assert ("presenter", "post.list") in acl.cache
+    assert ("editor", "post.list") not in acl.cache
+    assert ("admin", "post.list") not in acl.cache
+
+    expected = config.AclConfigurator()
+    expected.load_data_from_config_file(str(source))
+    expected_acl = expected.create_new_acl()
+
+    assert sorted(acl.roles.get_names()) == sorted(expected_acl.roles.get_names())
+
+    for role_name in role_names + ["auditor"]:
+        for resource in resources:
+            assert acl.is_allowed(role_name, resource) == \
+                expected_acl.is_allowed(role_name, resource)
+
+    assert instance.rules == expected.rules
+
+
+def test_reload_config_file_old_role_instance(tmpdir):
+    source = tmpdir.join("acl.conf")
+    source.write("[roles]\nuser=\n\n[user_rules]\ndoc=simple,allow\n")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(source))
+    acl = instance.create_new_acl()
+    old_user = acl.roles.get_role("user")
+
+    source.write("[roles]\nuser=\n\n[default_evaluators]\nuser=deny\n\n"
+                 "[user_rules]\ndoc=simple,allow\n")
+    instance.reload_config_file(acl, str(source))
+
+    assert acl.roles.get_role("user") is not old_user
+
+    with pytest.raises(ValueError):
+        acl.is_allowed(old_user, "doc")
+
+    assert acl.is_allowed("user", "doc")
+
+
+@pytest.mark.parametrize("rule_list_factory", [
+    rules.RuleList, rules.IndexedRuleList, rules.ColumnarRuleList])
+def test_update_instance_removes_rules_in_linear_time(rule_list_factory):
+    count = 10000
+
+    def create_configurator(keep):
+        instance = config.AclConfigurator()
+        instance.process_dict_like_config({
+            "roles": {"user": ""},
+            "user_rules": collections.OrderedDict(
+                ("resource.{}".format(i), "simple,allow")
+                for i in range(count) if keep(i)),
+        })
+        return instance
+
+    instance = create_configurator(lambda i: True)
+    acl = acls.Acl(rule_list_factory=rule_list_factory)
+    instance.setup_instance(acl)
+    other = create_configurator(lambda i: i % 5 != 0)
+
+    started = time.time()
+    diff = instance.update_instance(acl, other)
+    elapsed = time.time() - started
+
+    assert len(diff.removed_rules) == count // 5
+    assert len(acl.rules[acl.roles.get_role("user")].rules) == count - count // 5
+    # the quadratic removal took more than ten seconds
+    assert elapsed < 2
+
+
+def test_reload_config_file_rule_order(tmpdir):
+    source = tmpdir.join("acl.conf")
+    source.write("[roles]\nuser=\n\n[user_rules]\n"
+                 "post.list=simple,allow\npost.*=wildcardending,deny\n")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(source))
+    acl = instance.create_new_acl()
+
+    source.write("[roles]\nuser=\n\n[user_rules]\n"
+                 "post.*=wildcardending,deny\npost.list=simple,allow\n")
+
+    diff = instance.reload_config_file(acl, str(source))
+
+    # rules can be only appended, so all rules are replaced
+    assert len(diff.removed_rules) == 2
+    assert len(diff.added_rules) == 2
+    assert [r.definition for r in acl.rules[acl.roles.get_role("user")].rules] \
+        == ["post.*", "post.list"]
+
+
+def test_reload_config_file_invalid(tmpdir):
+    source = tmpdir.join("acl.conf")
+    source.write("[roles]\nuser=\n")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(source))
+    acl = instance.create_new_acl()
+
+    source.write("[roles]\nuser=\n\n[user_rules]\npost.list=simple,unknown\n")
+
+    with pytest.raises(KeyError):
+        instance.reload_config_file(acl, str(source))
+
+    assert acl.rules == {}
+
+
+def test_reload_config_file_invalid_role_keeps_acl(tmpdir):
+    source = tmpdir.join("acl.conf")
+    source.write("[roles]\nuser=\nguest=\neditor=user\n\n"
+                 "[user_rules]\npost.list=simple,allow\n")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(source))
+    acl = instance.create_new_acl()
+    roles_before = {n: acl.roles.get_role(n) for n in ("user", "guest", "editor")}
+    rules_before = {r.name: list(l.rules) for r, l in acl.rules.items()}
+
+    # user is changed and guest removed before admin would be created
+    source.write("[roles]\nuser=\nadmin=user\neditor=user\n\n"
+                 "[default_evaluators]\nuser=allow\nadmin=unknown\n")
+
+    with pytest.raises(KeyError):
+        instance.reload_config_file(acl, str(source))
+
+    assert {n: acl.roles.get_role(n) for n in roles_before} == roles_before
+    assert {r.name: list(l.rules) for r, l in acl.rules.items()} == rules_before
+
+    with pytest.raises(ValueError):
+        acl.roles.get_role("admin")
+
+
+def test_reload_config_file_rules_of_unknown_role(tmpdir):
+    source = tmpdir.join("acl.conf")
+    source.write("[roles]\nuser=\n")
+
+    instance = config.AclConfigurator()
+    instance.load_data_from_config_file(str(source))
+    acl = instance.create_new_acl()
+
+    source.write("[roles]\nuser=\n\n[guest_rules]\nindex=simple,allow\n")
+
+    with pytest.raises(ValueError) as exc_info:
+        instance.reload_config_file(acl, str(source))
+
+    assert "'guest'" in str(exc_info.value)
+    assert acl.rules == {}
+
+
+def test_get_role_order():
+    instance = config.AclConfigurator()
+    instance.setup_roles(collections.OrderedDict([
+        ("admin", "user,presenter"),
+        ("user", ""),
+        ("antimulti", "presenter"),
+        ("presenter", ""),
+    ]))
+
+    assert instance._get_role_order() == ["user", "presenter", "admin",
+                                          "antimulti"]
+
+
+def test_get_role_order_long_chain():
+    instance = config.AclConfigurator()
+    count = 5000
+    instance.setup_roles(collections.OrderedDict(
+        ("role_{}".format(i), "role_{}".format(i + 1) if i + 1 < count else "")
+        for i in range(count)))
+
+    order = instance._get_role_order()
+
+    assert order == ["role_{}".format(i) for i in reversed(range(count))]
+
+
+def test_get_role_order_cycle():
+    instance = config.AclConfigurator()
+    instance.setup_roles(collections.OrderedDict([
+        ("user", ""),
+        ("a", "user,c"),
+        ("b", "a"),
+        ("c", "b"),
+        ("d", "c"),
+    ]))
+
+    with pytest.raises(ValueError) as exc_info:
+        instance._get_role_order()
+
+    assert "a -> c -> b -> a" in str(exc_info.value)
+
+
+def test_get_role_order_duplicate_role():
+    instance = config.AclConfigurator()
+    instance.setup_roles(collections.OrderedDict([("user", ""), ("admin", "user")]))
+    instance.setup_roles(collections.OrderedDict([("admin", "user"), ("guest", "")]))
+
+    with pytest.raises(ValueError) as exc_info:
+        instance._get_role_order()
+
+    assert "'admin'" in str(exc_info.value)
+    assert "more than once" in str(exc_info.value)
+
+
+def test_get_role_order_unknown_parent():
+    instance = config.AclConfigurator()
+    instance.setup_roles({"user": "nobody"})
+
+    with pytest.raises(ValueError) as exc_info:
+        instance._get_role_order()
+
+    assert "'nobody'" in str(exc_info.value)
+
+
 def assert_config_rule_factories(instance):
     factories = instance.rule_factories
 
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import mock
+import pytest
+
+import easy_acl.acl as acl
+import easy_acl.evaluator as evaluators
+import easy_acl.instrumentation as instrumentation
+import easy_acl.role as roles
+import easy_acl.rule as rules
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+def test_histogram():
+    histogram = instrumentation.Histogram([1, 2])
+
+    for value in (0.5, 1, 1.5, 3):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.export() == {
+        "buckets": [[1, 2], [2, 3], ["+Inf", 4]],
+        "count": 4,
+        "sum": 6,
+    }
+
+
+def test_query_report(instance):
+    instrument = mock.Mock(timer=instrumentation.AbstractInstrument.timer)
+    instance.instrument = instrument
+
+    assert instance.is_allowed("admin", "post.edit") is False
+
+    report = instrument.on_query.call_args[0][0]
+    assert report.role_name == "admin"
+    assert report.resource == "post.edit"
+    assert report.is_allowed is False
+    assert report.cache_hit is False
+    assert report.roles_visited == 3
+    assert report.rules_tested == 3
+    assert report.matched_rule.definition == "post.*"
+    assert report.total_time >= report.rule_matching_time >= 0
+
+    assert instance.is_allowed("admin", "post.edit") is False
+
+    report = instrument.on_query.call_args[0][0]
+    assert report.cache_hit is True
+    assert report.rules_tested == 0
+    assert report.matched_rule is None
+
+
+def test_query_report_default_evaluator(instance):
+    instrument = mock.Mock(timer=instrumentation.AbstractInstrument.timer)
+    instance.instrument = instrument
+
+    # presenter's default evaluator is used
+    assert instance.is_allowed("admin", "unknown") is True
+
+    report = instrument.on_query.call_args[0][0]
+    assert report.matched_rule is None
+    assert report.roles_visited == 3
+
+
+def test_evaluator_gets_owner_role(instance):
+    evaluator = mock.Mock(return_value=True)
+    instance.add_rule("user", rules.Simple("comment.add", evaluator))
+    instance.instrument = instrumentation.MetricsCollector()
+
+    assert instance.is_allowed("admin", "comment.add") is True
+    assert evaluator.call_args[0][0].name == "user"
+
+
+@pytest.mark.parametrize("resource", [
+    "index.index", "post.edit", "post.list", "unknown", "post",
+])
+def test_same_result_as_not_instrumented(instance, resource):
+    expected = instance.is_allowed("admin", resource)
+
+    instance.clear_cache()
+    instance.instrument = instrumentation.MetricsCollector()
+
+    assert instance.is_allowed("admin", resource) is expected
+
+
+def test_metrics_collector(instance):
+    collector = instrumentation.MetricsCollector()
+    instance.instrument = collector
+
+    instance.is_allowed("admin", "post.edit")
+    instance.is_allowed("admin", "post.edit")
+    instance.is_allowed("user", "index.index")
+
+    metrics = collector.export()
+    counters = metrics["counters"]
+
+    assert counters["queries"] == 3
+    assert counters["cache_hits"] == 1
+    assert counters["cache_misses"] == 2
+    assert counters["allowed"] == 1
+    assert counters["roles_visited"] == 4
+    assert metrics["histograms"]["total_time"]["count"] == 3
+    assert metrics["histograms"]["rule_matching_time"]["count"] == 2
+
+    collector.reset()
+    assert collector.export()["counters"]["queries"] == 0
+
+
+@pytest.fixture
+def instance():
+    instance = acl.Acl()
+
+    user = roles.Role("user")
+    presenter = roles.Role("presenter", default_evaluator=evaluators.allow)
+    admin = roles.Role("admin", parents=(user, presenter))
+
+    instance.roles.add_role(user)
+    instance.roles.add_role(presenter)
+    instance.roles.add_role(admin)
+
+    instance.add_rule("user", rules.Simple("index.index", evaluators.allow))
+    instance.add_rule("presenter", rules.WildcardEnding("post.*", evaluators.deny))
+    instance.add_rule("presenter", rules.Simple("post.list", evaluators.allow))
+
+    return instance
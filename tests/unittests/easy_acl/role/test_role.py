@@ -67,3 +67,32 @@ def test_readonly_properties():
 
     with pytest.raises(AttributeError):
         r.default_evaluator = mock.Mock()
+
+
+def test_lineage_without_parents():
+    r = role.Role("my_role")
+    assert r.lineage == (r, )
+
+
+def test_lineage_order():
+    """Ancestors are ordered breadth-first, shared ancestors only once.
+
+    """
+    base = role.Role("base")
+    left = role.Role("left", parents=(base, ))
+    right = role.Role("right", parents=(base, ))
+    other = role.Role("other")
+    child = role.Role("child", parents=(left, right, other))
+
+    assert child.lineage == (child, left, right, other, base)
+
+
+def test_slots():
+    class Custom(role.Role):
+        pass
+
+    assert not hasattr(role.Role("my_role"), "__dict__")
+
+    custom = Custom("my_role")
+    custom.label = "My role"
+    assert custom.label == "My role"
@@ -143,6 +143,88 @@ def test_get_not_existing_role(manager):
         manager.get_role("bar")
 
 
+def test_get_role_after_failed_add(manager):
+    """Role which was not added due to name conflict is not returned.
+
+    """
+    r = manager.create_role("foo")
+
+    with pytest.raises(AssertionError):
+        manager.add_role(role.Role("foo"))
+
+    assert manager.get_role("foo") is r
+
+
+def test_get_descendants(manager):
+    manager.create_role("base")
+    manager.create_role("left", ["base"])
+    manager.create_role("right", ["base"])
+    manager.create_role("child", ["left", "right"])
+    manager.create_role("other")
+
+    names = sorted(r.name for r in manager.get_descendants("base"))
+
+    assert names == ["child", "left", "right"]
+    assert manager.get_descendants("child") == []
+    assert manager.get_descendants("unknown") == []
+
+
+def test_replace_role(manager):
+    user = manager.create_role("user")
+    admin = manager.create_role("admin", ["user"])
+    new_user = role.Role("user", default_evaluator=mock.Mock())
+
+    manager.replace_role(new_user)
+
+    assert manager.get_role("user") is new_user
+    assert manager.get_names() == ["user", "admin"]
+    assert manager.get_descendants("user") == [admin]
+
+    new_admin = role.Role("admin", [new_user])
+    manager.replace_role(new_admin)
+
+    assert manager.get_descendants("user") == [new_admin]
+
+    with pytest.raises(ValueError):
+        manager.replace_role(role.Role("guest"))
+
+
+def test_remove_role(manager):
+    manager.create_role("user")
+    manager.create_role("admin", ["user"])
+
+    with pytest.raises(ValueError):
+        manager.remove_role("user")
+
+    manager.remove_role("admin")
+
+    assert manager.get_names() == ["user"]
+    assert manager.get_descendants("user") == []
+
+    manager.remove_role("user")
+    assert manager.get_names() == []
+
+    with pytest.raises(ValueError):
+        manager.remove_role("user")
+
+
+def test_is_registered(manager):
+    user = manager.create_role("user")
+    admin = manager.create_role("admin", ["user"])
+
+    assert manager.is_registered(user)
+    assert not manager.is_registered(role.Role("user"))
+
+    new_user = role.Role("user")
+    manager.replace_role(new_user)
+
+    assert manager.is_registered(new_user)
+    assert not manager.is_registered(user)
+
+    manager.remove_role("admin")
+    assert not manager.is_registered(admin)
+
+
 def assert_role(role_instance, name, parents, default_evaluator):
     assert isinstance(role_instance, role.Role)
     assert role_instance.name == name
@@ -40,3 +40,96 @@ def test_split_resource_to_parts_simple():
     expected = ("foo", "bar", "foo-bar")
     splitted = rule.AbstractRule.split_resource_to_parts(name)
     assert splitted == expected
+
+
+def test_resolve_with_parts_uses_match_resource():
+    """Rules implementing only `_match_resource` work with pre-split parts.
+
+    """
+    class Custom(rule.AbstractRule):
+        def _match_resource(self, resource):
+            return 3
+
+    evaluator = mock.Mock(return_value=True)
+    instance = Custom("foo", evaluator)
+    result = instance.resolve(mock.Mock(), "foo.bar", ("foo", "bar"))
+
+    assert result == rule.Result(True, 3)
+
+
+def test_try_match_adapts_match_resource():
+    class Custom(rule.AbstractRule):
+        def _match_resource(self, resource):
+            if resource != "foo":
+                raise ValueError()
+
+            return 2
+
+    instance = Custom("foo", mock.Mock(return_value=False))
+
+    assert instance.try_match("foo") == 2
+    assert instance.try_match("bar") is None
+    assert instance.try_resolve(mock.Mock(), "foo") == rule.Result(False, 2)
+    assert instance.try_resolve(mock.Mock(), "bar") is None
+
+
+def test_try_resolve_any_rule():
+    """Rules not derived from `AbstractRule` are resolved by `resolve`.
+
+    """
+    matching = mock.Mock()
+    matching.resolve.return_value = rule.Result(True, 1)
+    not_matching = mock.Mock()
+    not_matching.resolve.side_effect = ValueError()
+
+    assert rule.try_resolve(matching, mock.Mock(), "foo") == rule.Result(True, 1)
+    assert rule.try_resolve(not_matching, mock.Mock(), "foo") is None
+
+
+class OverridingResolve(rule.AbstractRule):
+    """Rule overriding the public `resolve` method only.
+
+    """
+
+    def resolve(self, role, resource):
+        if resource != self.definition:
+            raise ValueError()
+
+        return rule.Result(True, 0)
+
+
+class OverridingSimpleResolve(rule.Simple):
+
+    def resolve(self, role, resource):
+        if not resource.startswith(self.definition):
+            raise ValueError()
+
+        return rule.Result(True, 1)
+
+
+def test_try_resolve_rule_overriding_resolve():
+    instance = OverridingResolve("foo", mock.Mock())
+
+    assert not rule.is_matchable(instance)
+    assert rule.try_resolve(instance, mock.Mock(), "foo", ("foo",)) == rule.Result(True, 0)
+    assert rule.try_resolve(instance, mock.Mock(), "bar", ("bar",)) is None
+
+
+def test_rule_overriding_resolve_is_not_indexed():
+    instance = OverridingSimpleResolve("foo", mock.Mock())
+
+    assert not rule.is_matchable(instance)
+    assert rule.get_index_key(instance) is None
+    assert rule.is_matchable(rule.Simple("foo", mock.Mock()))
+
+
+@pytest.mark.parametrize("rule_list_class", [
+    rule.RuleList, rule.IndexedRuleList, rule.ColumnarRuleList])
+def test_rule_lists_resolve_rule_overriding_resolve(rule_list_class):
+    rule_list = rule_list_class()
+    rule_list.add_rule(OverridingResolve("foo.bar", mock.Mock()))
+    rule_list.add_rule(OverridingSimpleResolve("foo", mock.Mock()))
+
+    assert rule_list.get_best_result(mock.Mock(), "foo.bar") == rule.Result(True, 0)
+    assert rule_list.get_best_result(mock.Mock(), "foo.baz") == rule.Result(True, 1)
+    assert rule_list.get_best_result(mock.Mock(), "bar") is None
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import mock
+import random
+import pytest
+
+import easy_acl.rule as rule
+import easy_acl.evaluator as evaluators
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+def test_init():
+    instance = rule.ColumnarRuleList()
+    assert instance.rules == []
+
+
+def test_exact_match():
+    instance = rule.ColumnarRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(rule.Simple("foo.bar", evaluators.allow))
+
+    result = instance.get_best_result(mock.Mock(), "foo.bar")
+
+    assert result.level == 0
+    assert result.is_allowed is True
+
+
+def test_deepest_wildcard_wins():
+    instance = rule.ColumnarRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(rule.WildcardEnding("foo.bar.*", evaluators.allow))
+
+    result = instance.get_best_result(mock.Mock(), "foo.bar.baz.qux")
+
+    assert result.level == 2
+    assert result.is_allowed is True
+
+
+def test_first_added_wins_on_same_level():
+    instance = rule.ColumnarRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.allow))
+
+    result = instance.get_best_result(mock.Mock(), "foo.bar")
+
+    assert result.level == 1
+    assert result.is_allowed is False
+
+
+def test_not_matching():
+    instance = rule.ColumnarRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.bar.*", evaluators.allow))
+    instance.add_rule(rule.Simple("foo", evaluators.allow))
+
+    assert instance.get_best_result(mock.Mock(), "foo.bar") is None
+    assert instance.get_best_result(mock.Mock(), "foo.baz.bar") is None
+
+
+def test_rules_are_created_from_columns():
+    evaluator = mock.Mock()
+    instance = rule.ColumnarRuleList(rule.PartTable())
+    instance.add_rule(rule.WildcardEnding(u"foo.č.*", evaluator))
+    instance.add_rule(rule.WildcardEnding("foo", evaluators.deny))
+    instance.add_rule(rule.Simple("foo.*", evaluators.allow))
+
+    rules = instance.rules
+
+    assert [type(r) for r in rules] == [rule.WildcardEnding, rule.WildcardEnding,
+                                        rule.Simple]
+    assert [r.definition for r in rules] == [u"foo.č.*", "foo", "foo.*"]
+    assert [r.evaluator for r in rules] == [evaluator, evaluators.deny,
+                                            evaluators.allow]
+    assert instance.get_best_result(mock.Mock(), "foo.*").is_allowed is True
+
+
+def test_same_instance_while_alive():
+    exact = rule.Simple("foo", evaluators.allow)
+    instance = rule.ColumnarRuleList()
+    instance.add_rule(exact)
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.allow))
+
+    created = instance.rules[1]
+
+    assert instance.rules[0] is exact
+    assert instance.rules[1] is created
+    assert instance.find_rules("foo.*") == [created]
+
+    # only the instance is removed, not a rule with same definition
+    instance.add_rule(rule.Simple("foo", evaluators.deny))
+    assert instance.remove_rule(exact) == [exact]
+    assert instance.get_best_result(mock.Mock(), "foo").is_allowed is False
+
+    with pytest.raises(ValueError):
+        instance.remove_rule(rule.WildcardEnding("foo.*", evaluators.allow))
+
+
+def test_replace_rule_by_definition():
+    instance = rule.ColumnarRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(rule.WildcardEnding("foo.bar.*", evaluators.allow))
+
+    old_rule = instance.replace_rule("foo.*", rule.Simple("foo.bar", evaluators.allow))
+
+    assert old_rule.evaluator is evaluators.deny
+    assert instance.get_best_result(mock.Mock(), "foo.bar").is_allowed is True
+    assert instance.get_best_result(mock.Mock(), "foo.baz") is None
+    assert instance.get_best_result(mock.Mock(), "foo.bar.baz").is_allowed is True
+
+    with pytest.raises(ValueError):
+        instance.replace_rule("bar", rule.Simple("bar", evaluators.allow))
+
+
+def test_custom_rules_are_tested():
+    instance = rule.ColumnarRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(create_matching_rule(True, 1))
+
+    result = instance.get_best_result(mock.Mock(), "foo.bar")
+
+    # both rules have level 1, the first one wins
+    assert result.is_allowed is False
+
+    instance.add_rule(create_matching_rule(True, 0))
+    result = instance.get_best_result(mock.Mock(), "foo.bar")
+
+    assert result.is_allowed is True
+    assert result.level == 0
+
+
+def test_custom_rules_replaced_out_of_order():
+    instance = rule.ColumnarRuleList()
+    exact = [rule.Simple("foo.{}".format(i), evaluators.allow) for i in range(4)]
+
+    for r in exact:
+        instance.add_rule(r)
+
+    # objects are put on positions 3, 1, 2 and 0
+    for position, is_allowed in ((3, True), (1, False), (2, True)):
+        instance.replace_rule(exact[position], create_matching_rule(is_allowed, 1))
+
+    assert instance.get_best_result(mock.Mock(), "bar").is_allowed is False
+
+    first = create_matching_rule(True, 1)
+    instance.replace_rule(exact[0], first)
+
+    assert instance.get_best_result(mock.Mock(), "bar").is_allowed is True
+    assert instance.rules[0] is first
+
+    instance.remove_rule(first)
+    assert instance.get_best_result(mock.Mock(), "bar").is_allowed is False
+
+
+def test_remove_rule():
+    exact = rule.Simple("foo.bar", evaluators.allow)
+    wildcard = rule.WildcardEnding("foo.*", evaluators.deny)
+
+    instance = rule.ColumnarRuleList()
+    instance.add_rule(exact)
+    instance.add_rule(wildcard)
+    assert instance.get_best_result(mock.Mock(), "foo.bar").is_allowed is True
+
+    # the count of rules is same after remove and add
+    instance.remove_rule(exact)
+    instance.add_rule(rule.Simple("foo.baz", evaluators.allow))
+
+    assert instance.get_best_result(mock.Mock(), "foo.bar").is_allowed is False
+    assert instance.get_best_result(mock.Mock(), "foo.baz").is_allowed is True
+
+
+@pytest.mark.parametrize("resource", [
+    "a", "b", "a.b", "a.b.c", "a.c.b", "b.a.c.d", "c", "a.b.c.d.e", "*", "a.*",
+])
+def test_same_result_as_rule_list(resource):
+    definitions = [
+        ("a.*", "wildcardending", evaluators.deny),
+        ("a.b.*", "wildcardending", evaluators.allow),
+        ("a.b", "simple", evaluators.deny),
+        ("b.a.*", "wildcardending", evaluators.allow),
+        ("a.*", "simple", evaluators.allow),
+        ("c", "wildcardending", evaluators.allow),
+        ("*", "wildcardending", evaluators.deny),
+    ]
+    factories = {"simple": rule.Simple, "wildcardending": rule.WildcardEnding}
+
+    plain = rule.RuleList()
+    columnar = rule.ColumnarRuleList()
+
+    for definition, rule_type, evaluator in definitions:
+        plain.add_rule(factories[rule_type](definition, evaluator))
+        columnar.add_rule(factories[rule_type](definition, evaluator))
+
+    role = mock.Mock()
+    assert columnar.get_best_result(role, resource) == \
+        plain.get_best_result(role, resource)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_same_result_as_rule_list_after_changes(seed):
+    rng = random.Random(seed)
+    definitions = ["a", "a.b", "a.*", "a.b.*", "*", "b.*", "b.c"]
+    resources = ["a", "a.b", "a.c", "a.b.c", "b", "b.c", "c"]
+
+    def create_rule():
+        definition = rng.choice(definitions)
+        evaluator = rng.choice([evaluators.allow, evaluators.deny])
+        factory = rule.WildcardEnding if definition.endswith("*") and \
+            rng.random() < 0.8 else rule.Simple
+        return factory(definition, evaluator)
+
+    plain = rule.RuleList()
+    columnar = rule.ColumnarRuleList()
+    role = mock.Mock()
+
+    for _ in range(200):
+        action = rng.random()
+        current = plain.rules
+
+        if action < 0.5 or not current:
+            new_rule = create_rule()
+            plain.add_rule(new_rule)
+            columnar.add_rule(new_rule)
+        elif action < 0.8:
+            old_rule = rng.choice(current)
+            plain.remove_rule(old_rule)
+            columnar.remove_rule(old_rule)
+        else:
+            old_rule = rng.choice(current)
+            new_rule = create_rule()
+            plain.replace_rule(old_rule, new_rule)
+            columnar.replace_rule(old_rule, new_rule)
+
+        resource = rng.choice(resources)
+        assert columnar.get_best_result(role, resource) == \
+            plain.get_best_result(role, resource)
+
+        definition = rng.choice(definitions)
+        assert columnar.find_rules(definition) == plain.find_rules(definition)
+
+
+def create_matching_rule(is_allowed, level):
+    rule_instance = mock.Mock()
+    rule_instance.resolve.return_value = rule.Result(is_allowed, level)
+    return rule_instance
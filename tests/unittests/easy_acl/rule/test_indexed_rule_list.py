@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import mock
+import random
+import pytest
+
+import easy_acl.rule as rule
+import easy_acl.evaluator as evaluators
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+def test_init():
+    instance = rule.IndexedRuleList()
+    assert instance.rules == []
+
+
+def test_exact_match():
+    instance = rule.IndexedRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(rule.Simple("foo.bar", evaluators.allow))
+
+    result = instance.get_best_result(mock.Mock(), "foo.bar")
+
+    assert result.level == 0
+    assert result.is_allowed is True
+
+
+def test_deepest_wildcard_wins():
+    instance = rule.IndexedRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(rule.WildcardEnding("foo.bar.*", evaluators.allow))
+
+    result = instance.get_best_result(mock.Mock(), "foo.bar.baz.qux")
+
+    assert result.level == 2
+    assert result.is_allowed is True
+
+
+def test_first_added_wins_on_same_level():
+    instance = rule.IndexedRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.allow))
+
+    result = instance.get_best_result(mock.Mock(), "foo.bar")
+
+    assert result.level == 1
+    assert result.is_allowed is False
+
+
+def test_not_matching():
+    instance = rule.IndexedRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.bar.*", evaluators.allow))
+    instance.add_rule(rule.Simple("foo", evaluators.allow))
+
+    assert instance.get_best_result(mock.Mock(), "foo.bar") is None
+    assert instance.get_best_result(mock.Mock(), "foo.baz.bar") is None
+
+
+def test_rules_appended_directly_are_indexed():
+    instance = rule.IndexedRuleList()
+    assert instance.get_best_result(mock.Mock(), "foo") is None
+
+    instance.rules.append(rule.Simple("foo", evaluators.allow))
+
+    assert instance.get_best_result(mock.Mock(), "foo").is_allowed is True
+
+
+def test_custom_rules_are_tested():
+    instance = rule.IndexedRuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluators.deny))
+    instance.add_rule(create_matching_rule(True, 1))
+
+    result = instance.get_best_result(mock.Mock(), "foo.bar")
+
+    # both rules have level 1, the first one wins
+    assert result.is_allowed is False
+
+    instance.add_rule(create_matching_rule(True, 0))
+    result = instance.get_best_result(mock.Mock(), "foo.bar")
+
+    assert result.is_allowed is True
+    assert result.level == 0
+
+
+def test_remove_rule():
+    exact = rule.Simple("foo.bar", evaluators.allow)
+    wildcard = rule.WildcardEnding("foo.*", evaluators.deny)
+
+    instance = rule.IndexedRuleList()
+    instance.add_rule(exact)
+    instance.add_rule(wildcard)
+    assert instance.get_best_result(mock.Mock(), "foo.bar").is_allowed is True
+
+    # the count of rules is same after remove and add
+    instance.remove_rule(exact)
+    instance.add_rule(rule.Simple("foo.baz", evaluators.allow))
+
+    assert instance.get_best_result(mock.Mock(), "foo.bar").is_allowed is False
+    assert instance.get_best_result(mock.Mock(), "foo.baz").is_allowed is True
+
+
+@pytest.mark.parametrize("resource", [
+    "a", "b", "a.b", "a.b.c", "a.c.b", "b.a.c.d", "c", "a.b.c.d.e", "*", "a.*",
+])
+def test_same_result_as_rule_list(resource):
+    definitions = [
+        ("a.*", "wildcardending", evaluators.deny),
+        ("a.b.*", "wildcardending", evaluators.allow),
+        ("a.b", "simple", evaluators.deny),
+        ("b.a.*", "wildcardending", evaluators.allow),
+        ("a.*", "simple", evaluators.allow),
+        ("c", "wildcardending", evaluators.allow),
+        ("*", "wildcardending", evaluators.deny),
+    ]
+    factories = {"simple": rule.Simple, "wildcardending": rule.WildcardEnding}
+
+    plain = rule.RuleList()
+    indexed = rule.IndexedRuleList()
+
+    for definition, rule_type, evaluator in definitions:
+        plain.add_rule(factories[rule_type](definition, evaluator))
+        indexed.add_rule(factories[rule_type](definition, evaluator))
+
+    role = mock.Mock()
+    assert indexed.get_best_result(role, resource) == \
+        plain.get_best_result(role, resource)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_same_result_as_rule_list_after_changes(seed):
+    rng = random.Random(seed)
+    definitions = ["a", "a.b", "a.*", "a.b.*", "*", "b.*", "b.c"]
+    resources = ["a", "a.b", "a.c", "a.b.c", "b", "b.c", "c"]
+
+    def create_rule():
+        definition = rng.choice(definitions)
+        evaluator = rng.choice([evaluators.allow, evaluators.deny])
+        factory = rule.WildcardEnding if definition.endswith("*") and \
+            rng.random() < 0.8 else rule.Simple
+        return factory(definition, evaluator)
+
+    plain = rule.RuleList()
+    indexed = rule.IndexedRuleList()
+    role = mock.Mock()
+
+    for _ in range(200):
+        action = rng.random()
+        current = plain.rules
+        # reading the rules drops holes after removed rules
+        assert indexed.rules == current
+
+        if action < 0.5 or not current:
+            new_rule = create_rule()
+            plain.add_rule(new_rule)
+            indexed.add_rule(new_rule)
+        elif action < 0.8:
+            old_rule = rng.choice(current)
+            plain.remove_rule(old_rule)
+            indexed.remove_rule(old_rule)
+        else:
+            old_rule = rng.choice(current)
+            new_rule = create_rule()
+            plain.replace_rule(old_rule, new_rule)
+            indexed.replace_rule(old_rule, new_rule)
+
+        resource = rng.choice(resources)
+        assert indexed.get_best_result(role, resource) == \
+            plain.get_best_result(role, resource)
+
+        definition = rng.choice(definitions)
+        assert indexed.find_rules(definition) == plain.find_rules(definition)
+
+
+def create_matching_rule(is_allowed, level):
+    rule_instance = mock.Mock()
+    rule_instance.resolve.return_value = rule.Result(is_allowed, level)
+    return rule_instance
@@ -7,7 +7,9 @@ from __future__ import absolute_import
 
 import mock
 import pytest
+import time
 
+import easy_acl.evaluator as evaluators
 import easy_acl.rule as rule
 
 __copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
@@ -78,6 +80,141 @@ def test_get_best_result_more_matching():
     assert result.level == 1
 
 
+def test_remove_rule():
+    rule_1 = create_matching_rule(True, 0)
+    rule_2 = create_matching_rule(False, 0)
+
+    instance = rule.RuleList()
+    instance.add_rule(rule_1)
+    instance.add_rule(rule_2)
+    instance.remove_rule(rule_1)
+
+    assert instance.rules == [rule_2]
+
+    with pytest.raises(ValueError):
+        instance.remove_rule(rule_1)
+
+
+def test_remove_rule_by_definition():
+    instance = rule.RuleList()
+    simple = rule.Simple("foo.*", evaluators.allow)
+    wildcard = rule.WildcardEnding("foo.*", evaluators.deny)
+    other = rule.Simple("bar", evaluators.allow)
+
+    for r in (simple, other, wildcard):
+        instance.add_rule(r)
+
+    assert instance.find_rules("foo.*") == [simple, wildcard]
+    assert instance.remove_rule("foo.*") == [simple, wildcard]
+    assert instance.find_rules("foo.*") == []
+    assert instance.get_best_result(mock.Mock(), "foo.bar") is None
+    assert instance.rules == [other]
+
+    with pytest.raises(ValueError):
+        instance.remove_rule("foo.*")
+
+
+def test_replace_rule_keeps_position():
+    instance = rule.RuleList()
+    first = rule.WildcardEnding("foo.*", evaluators.allow)
+    second = rule.WildcardEnding("foo.bar.*", evaluators.deny)
+    instance.add_rule(first)
+    instance.add_rule(second)
+    instance.add_rule(rule.Simple("foo.baz", evaluators.deny))
+
+    new_rule = rule.WildcardEnding("foo.*", evaluators.deny)
+    assert instance.replace_rule("foo.*", new_rule) is first
+    assert instance.rules[0] is new_rule
+    assert instance.find_rules("foo.*") == [new_rule]
+    assert instance.get_best_result(mock.Mock(), "foo.qux").is_allowed is False
+
+    instance.add_rule(rule.Simple("foo.bar.*", evaluators.allow))
+
+    with pytest.raises(ValueError):
+        instance.replace_rule("foo.bar.*", new_rule)
+
+    with pytest.raises(ValueError):
+        instance.replace_rule(first, new_rule)
+
+
+def test_removed_rules_are_compacted():
+    instance = rule.RuleList()
+    rules = [rule.Simple("foo.{}".format(i), evaluators.allow) for i in range(10)]
+
+    for r in rules:
+        instance.add_rule(r)
+
+    for r in rules[:6]:
+        instance.remove_rule(r)
+
+    # holes are dropped, positions of the rest are found again
+    assert instance.rules == rules[6:]
+    assert instance.remove_rule(rules[8]) == [rules[8]]
+    assert instance.rules == [rules[6], rules[7], rules[9]]
+
+
+def test_reading_rules_keeps_holes():
+    instance = rule.RuleList()
+    rules = [rule.Simple("foo.{}".format(i % 3), evaluators.allow)
+             for i in range(9)]
+
+    for r in rules:
+        instance.add_rule(r)
+
+    instance.remove_rule(rules[0])
+    instance.remove_rule(rules[4])
+
+    assert instance.rules == rules[1:4] + rules[5:]
+    assert instance.find_rules("foo.1") == [rules[1], rules[7]]
+    assert instance.replace_rule(rules[6], rules[0]) is rules[6]
+    assert instance.rules == rules[1:4] + [rules[5], rules[0]] + rules[7:]
+
+
+def test_reading_rules_between_removals_keeps_index():
+    instance = rule.RuleList()
+    count = 10000
+    rules = [rule.Simple("foo.{}".format(i), evaluators.allow) for i in range(count)]
+
+    for r in rules:
+        instance.add_rule(r)
+
+    started = time.time()
+
+    for r in rules[::5]:
+        instance.remove_rule(r)
+        assert instance.rules
+
+    elapsed = time.time() - started
+
+    assert len(instance.rules) == count - count // 5
+    # the index of positions is not rebuilt after each read
+    assert elapsed < 5
+
+
+def test_find_best_match_does_not_evaluate():
+    evaluator = mock.Mock(return_value=True)
+
+    instance = rule.RuleList()
+    instance.add_rule(rule.WildcardEnding("foo.*", evaluator))
+    instance.add_rule(rule.Simple("foo.bar", evaluator))
+    instance.add_rule(rule.Simple("baz", evaluator))
+
+    match, tested = instance.find_best_match(mock.Mock(), "foo.bar")
+
+    assert match.level == 0
+    assert match.rule is instance.rules[1]
+    assert match.result is None
+    assert tested == 2
+    evaluator.assert_not_called()
+
+
+def test_find_best_match_not_matching():
+    instance = rule.RuleList()
+    instance.rules.append(create_not_matching_rule())
+
+    assert instance.find_best_match(mock.Mock(), "foo") == (None, 1)
+
+
 def create_matching_rule(is_allowed, level):
     rule_instance = mock.Mock()
     rule_instance.resolve.return_value = rule.Result(is_allowed, level)
@@ -57,6 +57,34 @@ def test_resolve_not_matching():
         instance.resolve(role, not_definition)
 
 
+def test_get_index_key():
+    instance = rule.Simple("foo.bar", create_evaluator(True))
+    assert instance.get_index_key() == (rule.INDEX_EXACT, "foo.bar")
+
+
+def test_get_index_key_custom_matching():
+    class Custom(rule.Simple):
+        def _match_resource(self, resource):
+            return 1
+
+    instance = Custom("foo.bar", create_evaluator(True))
+    assert instance.get_index_key() is None
+
+
+def test_try_match():
+    instance = rule.Simple("foo-bar", create_evaluator(True))
+
+    assert instance.try_match("foo-bar") == 0
+    assert instance.try_match("bar-foo") is None
+
+
+def test_try_resolve():
+    instance = rule.Simple("foo-bar", create_evaluator(True))
+
+    assert instance.try_resolve(mock.Mock(), "foo-bar") == rule.Result(True, 0)
+    assert instance.try_resolve(mock.Mock(), "bar-foo") is None
+
+
 def create_evaluator(result):
     evaluator = mock.Mock()
     evaluator.return_value = result
@@ -5,6 +5,8 @@
 
 from __future__ import absolute_import
 
+import sys
+
 import mock
 import pytest
 
@@ -102,3 +104,108 @@ def test_resolve_not_matching_with_wildcard_edgecase():
 
     with pytest.raises(ValueError):
         instance.resolve(role, resource)
+
+
+def test_get_index_key_with_wildcard():
+    instance = rule.WildcardEnding("foo.bar.*", mock.Mock())
+    assert instance.get_index_key() == (rule.INDEX_PREFIX, ("foo", "bar"))
+
+
+def test_get_index_key_without_wildcard():
+    instance = rule.WildcardEnding("foo.bar", mock.Mock())
+    assert instance.get_index_key() == (rule.INDEX_EXACT, "foo.bar")
+
+
+def test_resolve_with_parts():
+    definition = "foo.bar.*"
+    resource = "foo.bar.baz.qux"
+    evaluator = mock.Mock(return_value=True)
+    instance = rule.WildcardEnding(definition, evaluator)
+
+    with mock.patch.object(rule.WildcardEnding, "split_resource_to_parts") as split:
+        result = instance.resolve(mock.Mock(), resource, ("foo", "bar", "baz", "qux"))
+
+    assert not split.called
+    assert result.level == 2
+
+
+def test_resolve_with_parts_not_matching():
+    instance = rule.WildcardEnding("foo.bar.*", mock.Mock())
+
+    with pytest.raises(ValueError):
+        instance.resolve(mock.Mock(), "foo.bar", ("foo", "bar"))
+
+    with pytest.raises(ValueError):
+        instance.resolve(mock.Mock(), "foo.baz.x", ("foo", "baz", "x"))
+
+
+def test_resolve_with_parts_custom_delimiter():
+    """Parts split by the default delimiter are ignored.
+
+    """
+    class SlashRule(rule.WildcardEnding):
+        RESOURCE_PART_DELIMITER = "/"
+
+    instance = SlashRule("foo/*", mock.Mock(return_value=True))
+    resource = "foo/bar.baz"
+    parts = rule.AbstractRule.split_resource_to_parts(resource)
+
+    assert instance.resolve(mock.Mock(), resource, parts).level == 1
+    assert instance.get_index_key() is None
+
+
+def test_try_match():
+    instance = rule.WildcardEnding("foo.bar.*", mock.Mock())
+
+    assert instance.try_match("foo.bar.baz") == 1
+    assert instance.try_match("foo.bar.baz.qux", ("foo", "bar", "baz", "qux")) == 2
+    assert instance.try_match("foo.bar") is None
+    assert instance.try_match("foo") is None
+
+
+def test_try_match_without_wildcard():
+    instance = rule.WildcardEnding("foo.bar", mock.Mock())
+
+    assert instance.try_match("foo.bar") == 0
+    assert instance.try_match("foo.bar.baz") is None
+
+
+def test_try_match_subclass_with_custom_match_resource():
+    class Custom(rule.WildcardEnding):
+        def _match_resource(self, resource):
+            return 5
+
+    instance = Custom("foo.*", mock.Mock())
+
+    assert instance.try_match("bar", ("bar", )) == 5
+    assert instance.get_index_key() is None
+
+
+def test_try_match_subclass_calling_super():
+    class Custom(rule.WildcardEnding):
+        def try_match(self, resource, parts=None):
+            return super(Custom, self).try_match(resource, parts)
+
+    instance = Custom("foo.*", mock.Mock())
+
+    assert instance.try_match("foo.bar", ("foo", "bar")) == 1
+    assert instance.try_match("bar", ("bar", )) is None
+
+
+def test_slots_and_interned_strings():
+    class Custom(rule.WildcardEnding):
+        pass
+
+    # built at runtime, so the strings are not interned by the compiler
+    definition = ".".join(["foo", "bar", "*"])
+    instance = rule.WildcardEnding(definition, mock.Mock())
+    other = rule.WildcardEnding("".join(["foo.bar.", "baz"]), mock.Mock())
+
+    assert not hasattr(instance, "__dict__")
+    assert instance.definition is sys.intern("foo.bar.*")
+    assert instance.definition_parts[0] is other.definition_parts[0]
+
+    custom = Custom("foo.*", mock.Mock())
+    custom.label = "Foo"
+    assert custom.label == "Foo"
+    assert custom.try_match("foo.bar") == 1
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import multiprocessing
+
+import pytest
+
+import easy_acl.shared_cache as shared_caches
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+def test_get_set(shared_cache):
+    assert shared_cache.get("1", ("user", "post.list")) is None
+
+    shared_cache.set("1", ("user", "post.list"), True)
+    shared_cache.set("1", ("user", "post.edit"), False)
+
+    assert shared_cache.get("1", ("user", "post.list")) is True
+    assert shared_cache.get("1", ("user", "post.edit")) is False
+    assert shared_cache.get("2", ("user", "post.list")) is None
+
+    shared_cache.set("1", ("user", "post.list"), False)
+    assert shared_cache.get("1", ("user", "post.list")) is False
+
+
+def test_clear(shared_cache):
+    shared_cache.set("1", ("user", "post.list"), True)
+    shared_cache.clear()
+
+    assert shared_cache.get("1", ("user", "post.list")) is None
+
+
+def test_mapped_full_bucket(tmpdir):
+    with shared_caches.MappedSharedCache(str(tmpdir.join("acl.cache")), 8) as instance:
+        assert instance.capacity == 8
+
+        for i in range(100):
+            instance.set("1", ("user", str(i)), True)
+
+        assert instance.get("1", ("user", "99")) is True
+        assert sum(instance.get("1", ("user", str(i))) is not None
+                   for i in range(100)) == 8
+
+
+def test_mapped_existing_file(tmpdir):
+    filename = str(tmpdir.join("acl.cache"))
+
+    with shared_caches.MappedSharedCache(filename, 64) as instance:
+        instance.set("1", ("user", "post.list"), True)
+
+    with shared_caches.MappedSharedCache(filename, 1024) as instance:
+        assert instance.capacity == 64
+        assert instance.get("1", ("user", "post.list")) is True
+
+
+def test_mapped_shared_by_processes(tmpdir):
+    filename = str(tmpdir.join("acl.cache"))
+
+    with shared_caches.MappedSharedCache(filename, 64) as instance:
+        process = multiprocessing.Process(target=store_decision, args=(filename,))
+        process.start()
+        process.join()
+
+        assert process.exitcode == 0
+        assert instance.get("1", ("user", "post.list")) is False
+
+
+def test_mapped_invalid_file(tmpdir):
+    filename = tmpdir.join("acl.cache")
+    filename.write_binary(b"[roles]\nuser=\n" * 20)
+
+    with pytest.raises(ValueError):
+        shared_caches.MappedSharedCache(str(filename))
+
+
+def store_decision(filename):
+    with shared_caches.MappedSharedCache(filename) as instance:
+        instance.set("1", ("user", "post.list"), False)
+
+
+@pytest.fixture(params=["dict", "mapped"])
+def shared_cache(request, tmpdir):
+    if request.param == "dict":
+        yield shared_caches.DictSharedCache()
+    else:
+        instance = shared_caches.MappedSharedCache(str(tmpdir.join("acl.cache")), 64)
+        yield instance
+        instance.close()
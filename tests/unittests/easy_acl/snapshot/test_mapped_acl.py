@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import random
+
+import pytest
+
+import easy_acl.acl as acl
+import easy_acl.evaluator as evaluators
+import easy_acl.role as roles
+import easy_acl.rule as rules
+import easy_acl.snapshot as snapshot
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+@pytest.mark.parametrize("role_name", ["user", "presenter", "admin"])
+@pytest.mark.parametrize("resource", [
+    "index.index", "post.edit", "post.list", "unknown", "post", "post.edit.x",
+    "comment.add", "comment.remove.all",
+])
+def test_same_result_as_acl(instance, mapped, role_name, resource):
+    assert mapped.is_allowed(role_name, resource) is \
+        instance.is_allowed(role_name, resource)
+
+
+def test_role_instance_and_names(instance, mapped):
+    assert mapped.role_names == ("user", "presenter", "admin")
+    assert mapped.is_allowed(instance.roles.get_role("user"), "index.index") is True
+
+
+def test_unknown_role(mapped):
+    with pytest.raises(ValueError):
+        mapped.is_allowed("unknown", "index.index")
+
+
+def test_custom_evaluator(instance, tmpdir):
+    instance.add_rule("user", rules.WildcardEnding("blog.*", is_owner_user))
+    filename = str(tmpdir.join("acl.snapshot"))
+    snapshot.write_snapshot(instance, filename)
+
+    with snapshot.MappedAcl(filename) as mapped:
+        # the evaluator gets the owner of the rule
+        assert mapped.is_allowed("admin", "blog.post") is True
+        assert mapped.is_allowed("presenter", "blog.post") is True
+        assert CALLS[-1] == ("user", "blog.post", 1, "blog.*")
+
+
+@pytest.mark.parametrize("is_lambda", [True, False])
+def test_evaluator_not_importable(instance, tmpdir, is_lambda):
+    if is_lambda:
+        evaluator = lambda *args: True  # noqa: E731
+    else:
+        evaluator = create_local_evaluator()
+
+    instance.add_rule("user", rules.Simple("blog.list", evaluator))
+
+    with pytest.raises(ValueError):
+        snapshot.write_snapshot(instance, str(tmpdir.join("acl.snapshot")))
+
+    assert not tmpdir.listdir()
+
+
+def test_rule_not_indexable(instance, tmpdir):
+    instance.add_rule("user", CustomRule("blog.list", evaluators.allow))
+
+    with pytest.raises(ValueError):
+        snapshot.write_snapshot(instance, str(tmpdir.join("acl.snapshot")))
+
+
+def test_not_snapshot(tmpdir):
+    filename = tmpdir.join("acl.snapshot")
+    filename.write_binary(b"[roles]\nuser=\n")
+
+    with pytest.raises(ValueError):
+        snapshot.MappedAcl(str(filename))
+
+
+def test_replaced_snapshot(instance, tmpdir):
+    filename = str(tmpdir.join("acl.snapshot"))
+    snapshot.write_snapshot(instance, filename)
+    old = snapshot.MappedAcl(filename)
+
+    instance.add_rule("user", rules.Simple("post.edit", evaluators.allow))
+    snapshot.write_snapshot(instance, filename)
+    new = snapshot.MappedAcl(filename)
+
+    # opened snapshot still maps the old file
+    assert old.is_allowed("admin", "post.edit") is False
+    assert new.is_allowed("admin", "post.edit") is True
+
+    old.close()
+    new.close()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_acl(tmpdir, seed):
+    rng = random.Random(seed)
+    definitions = ["a", "a.b", "a.*", "a.b.*", "*", "b.*", "b.c", "a.b.c.*",
+                   u"č.*", u"č.d"]
+    resources = ["a", "a.b", "a.c", "a.b.c", "a.b.c.d", "b", "b.c", "c",
+                 u"č", u"č.d", u"č.e.f"]
+
+    instance = acl.Acl(default_evaluator=rng.choice([evaluators.allow,
+                                                     evaluators.deny]))
+    role_list = []
+
+    for i in range(8):
+        parents = rng.sample(role_list, min(len(role_list), rng.randint(0, 2)))
+        default_evaluator = rng.choice([None, None, evaluators.allow,
+                                        evaluators.deny])
+        role = roles.Role("role_{}".format(i), parents, default_evaluator)
+        instance.roles.add_role(role)
+        role_list.append(role)
+
+        for _ in range(rng.randint(0, 6)):
+            definition = rng.choice(definitions)
+            factory = rules.WildcardEnding if rng.random() < 0.8 else rules.Simple
+            evaluator = rng.choice([evaluators.allow, evaluators.deny])
+            instance.add_rule(role.name, factory(definition, evaluator))
+
+    filename = str(tmpdir.join("acl.snapshot"))
+    snapshot.write_snapshot(instance, filename)
+
+    with snapshot.MappedAcl(filename) as mapped:
+        for role in role_list:
+            for resource in resources:
+                assert mapped.is_allowed(role.name, resource) is \
+                    instance.is_allowed(role.name, resource), (role.name, resource)
+
+
+CALLS = []
+
+
+def is_owner_user(role, resource, level, rule):
+    CALLS.append((role.name, resource, level, rule.definition))
+    return role.name == "user"
+
+
+def create_local_evaluator():
+    def evaluator(role, resource, level, rule):
+        return True
+
+    return evaluator
+
+
+class CustomRule(rules.Simple):
+
+    def _match_resource(self, resource):
+        return 0
+
+
+@pytest.fixture
+def instance():
+    instance = acl.Acl()
+
+    user = roles.Role("user")
+    presenter = roles.Role("presenter", default_evaluator=evaluators.allow)
+    admin = roles.Role("admin", parents=(user, presenter))
+
+    instance.roles.add_role(user)
+    instance.roles.add_role(presenter)
+    instance.roles.add_role(admin)
+
+    instance.add_rule("user", rules.Simple("index.index", evaluators.allow))
+    instance.add_rule("user", rules.WildcardEnding("comment.*", evaluators.allow))
+    instance.add_rule("presenter", rules.WildcardEnding("post.*", evaluators.deny))
+    instance.add_rule("presenter", rules.Simple("post.list", evaluators.allow))
+    instance.add_rule("presenter", rules.WildcardEnding("comment.remove.*",
+                                                        evaluators.deny))
+    instance.add_rule("admin", rules.WildcardEnding("*", evaluators.deny))
+
+    return instance
+
+
+@pytest.fixture
+def mapped(instance, tmpdir):
+    filename = str(tmpdir.join("acl.snapshot"))
+    snapshot.write_snapshot(instance, filename)
+
+    mapped = snapshot.MappedAcl(filename)
+    yield mapped
+    mapped.close()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import threading
+
+import pytest
+
+import easy_acl.threadsafe as threadsafe
+import easy_acl.role as roles
+import easy_acl.rule as rules
+import easy_acl.evaluator as evaluators
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+def test_init():
+    instance = threadsafe.ThreadSafeAcl()
+    assert instance.role_names == ()
+
+
+def test_add_rule(instance):
+    assert not instance.is_allowed("user", "post.list")
+
+    instance.add_rule("user", rules.Simple("post.list", evaluators.allow))
+
+    assert instance.is_allowed("user", "post.list")
+    assert instance.is_allowed("admin", "post.list")
+
+
+def test_update_publishes_at_the_end(instance):
+    with instance.update() as acl:
+        acl.add_rule("user", rules.Simple("post.list", evaluators.allow))
+
+        with instance.update() as nested:
+            nested.add_rule("user", rules.Simple("post.edit", evaluators.allow))
+
+        assert not instance.is_allowed("user", "post.list")
+        assert not instance.is_allowed("user", "post.edit")
+
+    assert instance.is_allowed("user", "post.list")
+    assert instance.is_allowed("user", "post.edit")
+
+
+def test_snapshot_is_not_changed(instance):
+    snapshot = instance.snapshot()
+    instance.add_rule("user", rules.Simple("post.list", evaluators.allow))
+
+    assert not snapshot.is_allowed("user", "post.list")
+    assert instance.snapshot().is_allowed("user", "post.list")
+
+
+def test_unknown_role(instance):
+    with pytest.raises(ValueError):
+        instance.is_allowed("nobody", "post.list")
+
+
+def test_replaced_role_instance():
+    instance = threadsafe.ThreadSafeAcl()
+    old_user = instance.create_role("user", default_evaluator=evaluators.allow)
+    assert instance.is_allowed(old_user, "post.list")
+
+    new_user = roles.Role("user")
+    with instance.update() as acl:
+        acl.roles.replace_role(new_user)
+
+    with pytest.raises(ValueError):
+        instance.is_allowed(old_user, "post.list")
+    assert not instance.is_allowed(new_user, "post.list")
+
+
+def test_concurrent_reads_and_writes(instance):
+    """Readers see consistent state while the writer adds rules.
+
+    Each update adds two rules at once, so both resources have to be allowed
+    or denied in any snapshot. Once allowed, resource stays allowed.
+
+    """
+    rule_count = 200
+    reader_count = 8
+    errors = []
+    writer_done = threading.Event()
+
+    def writer():
+        for i in range(rule_count):
+            with instance.update() as acl:
+                acl.add_rule("user", rules.Simple("a.{}".format(i), evaluators.allow))
+                acl.add_rule("user", rules.Simple("b.{}".format(i), evaluators.allow))
+
+        writer_done.set()
+
+    def reader(offset):
+        allowed = set()
+
+        while not writer_done.is_set():
+            for i in range(offset, rule_count, reader_count):
+                snapshot = instance.snapshot()
+                a = snapshot.is_allowed("admin", "a.{}".format(i))
+                b = snapshot.is_allowed("admin", "b.{}".format(i))
+
+                if a != b:
+                    errors.append(("inconsistent", i))
+
+                current = instance.is_allowed("admin", "a.{}".format(i))
+
+                if i in allowed and not current:
+                    errors.append(("not monotonic", i))
+                elif current:
+                    allowed.add(i)
+
+    threads = [threading.Thread(target=reader, args=(i, ))
+               for i in range(reader_count)]
+    threads.append(threading.Thread(target=writer))
+
+    for t in threads:
+        t.start()
+
+    for t in threads:
+        t.join()
+
+    assert errors == []
+
+    for i in range(rule_count):
+        assert instance.is_allowed("admin", "a.{}".format(i))
+        assert instance.is_allowed("admin", "b.{}".format(i))
+
+
+@pytest.fixture
+def instance():
+    instance = threadsafe.ThreadSafeAcl()
+
+    with instance.update() as acl:
+        acl.roles.create_role("user")
+        acl.roles.create_role("admin", ["user"])
+
+    return instance
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+from __future__ import absolute_import
+
+import random
+
+import pytest
+
+import easy_acl.acl as acl
+import easy_acl.evaluator as evaluators
+import easy_acl.role as roles
+import easy_acl.rule as rules
+
+numpy = pytest.importorskip("numpy")
+vectorized = pytest.importorskip("easy_acl.vectorized")
+
+__copyright__ = "Copyright (c) 2015-2019 Ing. Petr Jindra. All Rights Reserved."
+
+
+RESOURCES = [
+    "index.index", "post.edit", "post.list", "unknown", "post", "post.edit.x",
+    "comment.add", "comment.remove.all", "",
+]
+
+
+def test_matrix_same_result_as_acl(instance):
+    role_names = ["user", "presenter", "admin"]
+    matrix = vectorized.VectorizedAcl(instance).is_allowed_matrix(role_names,
+                                                                 RESOURCES)
+
+    assert matrix.shape == (3, len(RESOURCES))
+    assert matrix.tolist() == [[instance.is_allowed(r, s) for s in RESOURCES]
+                               for r in role_names]
+
+
+def test_pairs_same_result_as_acl(instance):
+    role_names = ["admin", "user", instance.roles.get_role("presenter")] * \
+        len(RESOURCES)
+    resources = RESOURCES * 3
+    decisions = vectorized.VectorizedAcl(instance).is_allowed_pairs(role_names,
+                                                                    resources)
+
+    assert decisions.tolist() == [instance.is_allowed(r, s)
+                                  for r, s in zip(role_names, resources)]
+
+
+def test_custom_evaluators_and_rules(instance):
+    instance.add_rule("user", rules.WildcardEnding("blog.*", is_owner_user))
+    instance.add_rule("presenter", CustomRule("blog.post.x", evaluators.deny))
+    instance.roles.create_role("guest", default_evaluator=is_owner_user)
+    instance.roles.create_role("member", ["guest"])
+    role_names = ["user", "admin", "presenter", "guest", "member"]
+    resources = ["blog.post", "blog.post.x", "blog", "index.index"]
+
+    matrix = vectorized.VectorizedAcl(instance).is_allowed_matrix(role_names,
+                                                                 resources)
+
+    assert matrix.tolist() == [[instance.is_allowed(r, s) for s in resources]
+                               for r in role_names]
+
+
+def test_snapshot_is_not_changed(instance):
+    instance_vectorized = vectorized.VectorizedAcl(instance)
+    instance.add_rule("user", rules.Simple("post.edit", evaluators.allow))
+
+    assert instance_vectorized.is_allowed_pairs(["user"], ["post.edit"]).tolist() \
+        == [False]
+
+
+def test_invalid_input(instance):
+    instance_vectorized = vectorized.VectorizedAcl(instance)
+
+    with pytest.raises(ValueError):
+        instance_vectorized.is_allowed_pairs(["unknown"], ["index.index"])
+
+    with pytest.raises(ValueError):
+        instance_vectorized.is_allowed_pairs(["user", "admin"], ["index.index"])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_acl(seed):
+    rng = random.Random(seed)
+    definitions = ["a", "a.b", "a.*", "a.b.*", "*", "b.*", "b.c", "a.b.c.*",
+                   u"č.*", u"č.d"]
+    resources = ["a", "a.b", "a.c", "a.b.c", "a.b.c.d", "b", "b.c", "c",
+                 u"č", u"č.d", u"č.e.f", "a.*"]
+
+    instance = acl.Acl(default_evaluator=rng.choice([evaluators.allow,
+                                                     evaluators.deny]))
+    role_list = []
+
+    for i in range(8):
+        parents = rng.sample(role_list, min(len(role_list), rng.randint(0, 2)))
+        default_evaluator = rng.choice([None, None, evaluators.allow,
+                                        evaluators.deny])
+        role = roles.Role("role_{}".format(i), parents, default_evaluator)
+        instance.roles.add_role(role)
+        role_list.append(role)
+
+        for _ in range(rng.randint(0, 6)):
+            definition = rng.choice(definitions)
+            factory = rules.WildcardEnding if rng.random() < 0.8 else rules.Simple
+            evaluator = rng.choice([evaluators.allow, evaluators.deny])
+            instance.add_rule(role.name, factory(definition, evaluator))
+
+    role_names = [r.name for r in role_list]
+    matrix = vectorized.VectorizedAcl(instance).is_allowed_matrix(role_names,
+                                                                 resources)
+
+    assert matrix.tolist() == [[instance.is_allowed(r, s) for s in resources]
+                               for r in role_names]
+
+
+def is_owner_user(role, resource, level, rule):
+    return role.name == "user"
+
+
+class CustomRule(rules.Simple):
+
+    def _match_resource(self, resource):
+        if not resource.startswith(self.definition):
+            raise ValueError()
+
+        return 0
+
+
+@pytest.fixture
+def instance():
+    instance = acl.Acl()
+
+    user = roles.Role("user")
+    presenter = roles.Role("presenter", default_evaluator=evaluators.allow)
+    admin = roles.Role("admin", parents=(user, presenter))
+
+    instance.roles.add_role(user)
+    instance.roles.add_role(presenter)
+    instance.roles.add_role(admin)
+
+    instance.add_rule("user", rules.Simple("index.index", evaluators.allow))
+    instance.add_rule("user", rules.WildcardEnding("comment.*", evaluators.allow))
+    instance.add_rule("presenter", rules.WildcardEnding("post.*", evaluators.deny))
+    instance.add_rule("presenter", rules.Simple("post.list", evaluators.allow))
+    instance.add_rule("presenter", rules.WildcardEnding("comment.remove.*",
+                                                        evaluators.deny))
+    instance.add_rule("admin", rules.WildcardEnding("*", evaluators.deny))
+
+    return instance